@@ -9,15 +9,31 @@ dbManager.initialize().catch(error => {
     console.error('Failed to initialize database:', error);
 });
 
-// Customers API endpoints
-router.get('/customers', cors(), async (req, res) => {
+/**
+ * Send the rows of a list query. Paged responses carry the next page's cursor
+ * in X-Next-Cursor (empty on the last page); invalid filters answer 400.
+ */
+async function sendList(res, table, query, label) {
     try {
-        const customers = await dbManager.getCustomers();
-        res.json(customers || []);
+        const { rows, paged, nextCursor } = await dbManager.listRows(table, query);
+        if (paged) {
+            res.set('X-Next-Cursor', nextCursor || '');
+            res.set('Access-Control-Expose-Headers', 'X-Next-Cursor');
+        }
+        res.json(rows);
     } catch (error) {
-        console.error('Error fetching customers:', error);
-        res.status(500).json({ error: 'Failed to fetch customers' });
+        if (error.statusCode === 400) {
+            res.status(400).json({ error: error.message });
+            return;
+        }
+        console.error(`Error fetching ${label}:`, error);
+        res.status(500).json({ error: `Failed to fetch ${label}` });
     }
+}
+
+// Customers API endpoints
+router.get('/customers', cors(), async (req, res) => {
+    await sendList(res, 'customers', req.query, 'customers');
 });
 
 router.get('/customers/:id', cors(), async (req, res) => {
@@ -84,13 +100,7 @@ router.delete('/customers/:id', cors(), async (req, res) => {
 
 // Work Requests API endpoints
 router.get('/work-requests', cors(), async (req, res) => {
-    try {
-        const workRequests = await dbManager.getWorkRequests();
-        res.json(workRequests || []);
-    } catch (error) {
-        console.error('Error fetching work requests:', error);
-        res.status(500).json({ error: 'Failed to fetch work requests' });
-    }
+    await sendList(res, 'work_requests', req.query, 'work requests');
 });
 
 router.get('/work-requests/:id', cors(), async (req, res) => {
@@ -149,13 +159,7 @@ router.delete('/work-requests/:id', cors(), async (req, res) => {
 
 // Projects API endpoints
 router.get('/projects', cors(), async (req, res) => {
-    try {
-        const projects = await dbManager.getProjects();
-        res.json(projects || []);
-    } catch (error) {
-        console.error('Error fetching projects:', error);
-        res.status(500).json({ error: 'Failed to fetch projects' });
-    }
+    await sendList(res, 'projects', req.query, 'projects');
 });
 
 router.get('/projects/:id', cors(), async (req, res) => {
@@ -213,6 +217,17 @@ router.delete('/projects/:id', cors(), async (req, res) => {
 });
 
 // Dashboard metrics endpoint
+// Tombstones of deleted customers, work requests and projects (?after_id=<last seen id>)
+router.get('/deleted-rows', cors(), async (req, res) => {
+    try {
+        const deletedRows = await dbManager.getDeletedRows(req.query.after_id);
+        res.json(deletedRows || []);
+    } catch (error) {
+        console.error('Error fetching deleted rows:', error);
+        res.status(500).json({ error: 'Failed to fetch deleted rows' });
+    }
+});
+
 router.get('/dashboard/metrics', cors(), async (req, res) => {
     try {
         const metrics = await dbManager.getDashboardMetrics();
@@ -223,6 +238,22 @@ router.get('/dashboard/metrics', cors(), async (req, res) => {
     }
 });
 
+// Dashboard metrics snapshot computed by the agent (langgraph/metrics_engine.py)
+router.put('/dashboard/metrics/snapshot', cors(), async (req, res) => {
+    const rows = req.body && req.body.metrics;
+    if (!Array.isArray(rows) || rows.some(row => !row || !row.metric_name)) {
+        res.status(400).json({ error: 'metrics must be a list of { metric_name, metric_value }' });
+        return;
+    }
+    try {
+        const result = await dbManager.saveDashboardMetrics(rows);
+        res.json(result);
+    } catch (error) {
+        console.error('Error saving dashboard metrics:', error);
+        res.status(500).json({ error: 'Failed to save dashboard metrics' });
+    }
+});
+
 // Database backup endpoint
 router.post('/database/backup', cors(), async (req, res) => {
     try {
@@ -6,12 +6,172 @@ import { fileURLToPath } from 'url';
 const __filename = fileURLToPath(import.meta.url);
 const __dirname = path.dirname(__filename);
 
+// Filters, sort keys and paging accepted by the list endpoints
+// (GET /api/database/<table>?status=pending,in-progress&priority=high&sort=-created_date&limit=50&cursor=...).
+// Mirrored by LIST_QUERIES in langgraph/data_filters.py and SQL_QUERIES in langgraph/sqlite_backend.py.
+const MAX_PAGE_SIZE = 1000;
+
+// Tombstones (deleted_rows) older than this are pruned when /deleted-rows is read, at most once per
+// TOMBSTONE_PRUNE_INTERVAL_MS. Keep it above the agents' full reload interval
+// (AGENT_MIRROR_RECONCILE_SECONDS, default 1 hour): every mirrored table is reloaded within that
+// window, so it never needs a tombstone older than it.
+const tombstoneRetention = Number(process.env.TOMBSTONE_RETENTION_HOURS);
+const TOMBSTONE_RETENTION_HOURS = tombstoneRetention > 0 ? tombstoneRetention : 24;
+const TOMBSTONE_PRUNE_INTERVAL_MS = 10 * 60 * 1000;
+const PRIORITY_ORDER = "CASE {column} WHEN 'high' THEN 0 WHEN 'medium' THEN 1 WHEN 'low' THEN 2 ELSE 3 END";
+
+const LIST_QUERIES = {
+    work_requests: {
+        select: `SELECT wr.*, c.name as customer_name
+                 FROM work_requests wr
+                 LEFT JOIN customers c ON wr.customer_id = c.id`,
+        filters: { status: 'wr.status', priority: 'wr.priority', customer_id: 'wr.customer_id' },
+        customerColumn: 'c.name',
+        dateColumn: 'wr.created_date',
+        updatedColumn: 'wr.updated_at',
+        sorts: {
+            created_date: 'wr.created_date', target_date: 'wr.target_date', priority: 'wr.priority',
+            budget: 'wr.budget', status: 'wr.status', customer_name: 'c.name', id: 'wr.id'
+        },
+        idColumn: 'wr.id',
+        defaultOrder: 'wr.created_date DESC'
+    },
+    customers: {
+        select: 'SELECT * FROM customers',
+        filters: { tier: 'tier' },
+        customerColumn: 'name',
+        dateColumn: null,
+        updatedColumn: 'updated_at',
+        sorts: {
+            name: 'name', tier: 'tier', total_value: 'total_value', total_projects: 'total_projects',
+            completion_rate: 'completion_rate', id: 'id'
+        },
+        idColumn: 'id',
+        defaultOrder: 'name'
+    },
+    projects: {
+        select: `SELECT p.*, c.name as customer_name
+                 FROM projects p
+                 LEFT JOIN customers c ON p.customer_id = c.id`,
+        filters: { status: 'p.status', priority: 'p.priority', customer_id: 'p.customer_id', type: 'p.type' },
+        customerColumn: 'c.name',
+        dateColumn: 'p.start_date',
+        updatedColumn: 'p.updated_at',
+        sorts: {
+            start_date: 'p.start_date', target_date: 'p.target_date', priority: 'p.priority', budget: 'p.budget',
+            status: 'p.status', name: 'p.name', customer_name: 'c.name', id: 'p.id'
+        },
+        idColumn: 'p.id',
+        defaultOrder: 'p.start_date DESC'
+    }
+};
+
+class ListQueryError extends Error {
+    constructor(message) {
+        super(message);
+        this.name = 'ListQueryError';
+        this.statusCode = 400;
+    }
+}
+
+function encodeCursor(offset) {
+    return Buffer.from(JSON.stringify({ offset })).toString('base64url');
+}
+
+function decodeCursor(cursor) {
+    try {
+        const offset = Number(JSON.parse(Buffer.from(String(cursor), 'base64url').toString('utf8')).offset);
+        if (Number.isInteger(offset) && offset >= 0) {
+            return offset;
+        }
+    } catch (error) {
+        // fall through to the error below
+    }
+    throw new ListQueryError(`Invalid cursor: ${cursor}`);
+}
+
+function listValues(value) {
+    return String(value).split(',').map(item => item.trim()).filter(Boolean);
+}
+
+/**
+ * Build the SQL for a filtered, sorted and optionally paged list query
+ */
+function buildListQuery(table, query = {}) {
+    const spec = LIST_QUERIES[table];
+    const where = [];
+    const params = [];
+
+    for (const [name, column] of Object.entries(spec.filters)) {
+        if (query[name] === undefined || query[name] === '') continue;
+        const values = listValues(query[name]);
+        // Equality (IN) on the raw column keeps the status/priority/customer_id/tier indexes usable
+        const collate = name === 'tier' ? ' COLLATE NOCASE' : '';
+        where.push(`${column}${collate} IN (${values.map(() => '?').join(', ')})`);
+        params.push(...values.map(value => (name === 'customer_id' ? Number(value) : value)));
+    }
+    if (query.customer) {
+        where.push(`${spec.customerColumn} = ? COLLATE NOCASE`);
+        params.push(String(query.customer).trim());
+    }
+    if (query.date_from || query.date_to) {
+        if (!spec.dateColumn) {
+            throw new ListQueryError(`${table} has no date to filter by`);
+        }
+        if (query.date_from) {
+            where.push(`${spec.dateColumn} >= ?`);
+            params.push(String(query.date_from).slice(0, 10));
+        }
+        if (query.date_to) {
+            where.push(`${spec.dateColumn} < date(?, '+1 day')`);
+            params.push(String(query.date_to).slice(0, 10));
+        }
+    }
+    if (query.updated_since) {
+        // Rows changed at or after this updated_at ("YYYY-MM-DD HH:MM:SS"), for delta sync
+        where.push(`${spec.updatedColumn} >= ?`);
+        params.push(String(query.updated_since).replace('T', ' ').slice(0, 19));
+    }
+
+    let sql = spec.select;
+    if (where.length) {
+        sql += ` WHERE ${where.join(' AND ')}`;
+    }
+
+    if (query.sort) {
+        const descending = String(query.sort).startsWith('-');
+        const key = String(query.sort).replace(/^-/, '');
+        const column = spec.sorts[key];
+        if (!column) {
+            throw new ListQueryError(`${table} cannot be sorted by ${query.sort}`);
+        }
+        const direction = descending ? 'DESC' : 'ASC';
+        const expression = key === 'priority' ? PRIORITY_ORDER.replace('{column}', column) : column;
+        sql += ` ORDER BY ${expression} ${direction}, ${spec.idColumn} ${direction}`;
+    } else {
+        sql += ` ORDER BY ${spec.defaultOrder}`;
+    }
+
+    const paged = query.limit !== undefined || query.cursor !== undefined;
+    let limit = null;
+    let offset = 0;
+    if (paged) {
+        limit = Math.min(Math.max(parseInt(query.limit, 10) || 50, 1), MAX_PAGE_SIZE);
+        offset = query.cursor ? decodeCursor(query.cursor) : 0;
+        // One extra row tells whether another page follows
+        sql += ' LIMIT ? OFFSET ?';
+        params.push(limit + 1, offset);
+    }
+    return { sql, params, paged, limit, offset };
+}
+
 class DatabaseManager {
     constructor() {
         this.db = null;
         // Use environment variable for database path, fallback to local path
         const dbPath = process.env.DATABASE_PATH || path.join(__dirname, 'sc_micro.db');
         this.dbPath = dbPath;
+        this.tombstonesPrunedAt = 0;
         console.log(`🗄️ Database path: ${this.dbPath}`);
     }
 
@@ -35,6 +195,14 @@ class DatabaseManager {
                         return;
                     }
 
+                    // WAL lets co-located agents read the file (langgraph/sqlite_backend.py)
+                    // without blocking writes
+                    this.db.run('PRAGMA journal_mode = WAL', (err) => {
+                        if (err) {
+                            console.error('❌ Failed to enable WAL journal mode:', err);
+                        }
+                    });
+
                     // Enable foreign keys
                     this.db.run('PRAGMA foreign_keys = ON', (err) => {
                         if (err) {
@@ -86,20 +254,43 @@ class DatabaseManager {
     }
 
     /**
-     * Get all customers
+     * List rows of customers, work_requests or projects matching the query
+     * (see LIST_QUERIES). Resolves to { rows, paged, nextCursor }; nextCursor
+     * is null on the last page.
      */
-    getCustomers() {
+    listRows(table, query = {}) {
         return new Promise((resolve, reject) => {
-            this.db.all('SELECT * FROM customers ORDER BY name', (err, rows) => {
+            let built;
+            try {
+                built = buildListQuery(table, query);
+            } catch (error) {
+                reject(error);
+                return;
+            }
+            const { sql, params, paged, limit, offset } = built;
+            this.db.all(sql, params, (err, rows) => {
                 if (err) {
                     reject(err);
-                } else {
-                    resolve(rows || []);
+                    return;
+                }
+                rows = rows || [];
+                let nextCursor = null;
+                if (paged && rows.length > limit) {
+                    rows = rows.slice(0, limit);
+                    nextCursor = encodeCursor(offset + limit);
                 }
+                resolve({ rows, paged, nextCursor });
             });
         });
     }
 
+    /**
+     * Get all customers, optionally filtered (see listRows)
+     */
+    getCustomers(query = {}) {
+        return this.listRows('customers', query).then(result => result.rows);
+    }
+
     /**
      * Get customer by ID
      */
@@ -189,24 +380,10 @@ class DatabaseManager {
     }
 
     /**
-     * Get all work requests
+     * Get all work requests, optionally filtered (see listRows)
      */
-    getWorkRequests() {
-        return new Promise((resolve, reject) => {
-            const sql = `
-                SELECT wr.*, c.name as customer_name 
-                FROM work_requests wr 
-                LEFT JOIN customers c ON wr.customer_id = c.id 
-                ORDER BY wr.created_date DESC
-            `;
-            this.db.all(sql, (err, rows) => {
-                if (err) {
-                    reject(err);
-                } else {
-                    resolve(rows || []);
-                }
-            });
-        });
+    getWorkRequests(query = {}) {
+        return this.listRows('work_requests', query).then(result => result.rows);
     }
 
     /**
@@ -319,24 +496,10 @@ class DatabaseManager {
     }
 
     /**
-     * Get all projects
+     * Get all projects, optionally filtered (see listRows)
      */
-    getProjects() {
-        return new Promise((resolve, reject) => {
-            const sql = `
-                SELECT p.*, c.name as customer_name 
-                FROM projects p 
-                LEFT JOIN customers c ON p.customer_id = c.id 
-                ORDER BY p.start_date DESC
-            `;
-            this.db.all(sql, (err, rows) => {
-                if (err) {
-                    reject(err);
-                } else {
-                    resolve(rows || []);
-                }
-            });
-        });
+    getProjects(query = {}) {
+        return this.listRows('projects', query).then(result => result.rows);
     }
 
     /**
@@ -465,6 +628,49 @@ class DatabaseManager {
         });
     }
 
+    /**
+     * Drop tombstones older than TOMBSTONE_RETENTION_HOURS, at most once per TOMBSTONE_PRUNE_INTERVAL_MS
+     */
+    pruneDeletedRows() {
+        const now = Date.now();
+        if (now - this.tombstonesPrunedAt < TOMBSTONE_PRUNE_INTERVAL_MS) {
+            return Promise.resolve({ changes: 0 });
+        }
+        this.tombstonesPrunedAt = now;
+        return new Promise((resolve, reject) => {
+            const sql = "DELETE FROM deleted_rows WHERE deleted_at < datetime('now', ?)";
+            this.db.run(sql, [`-${TOMBSTONE_RETENTION_HOURS} hours`], function(err) {
+                if (err) {
+                    reject(err);
+                } else {
+                    resolve({ changes: this.changes });
+                }
+            });
+        });
+    }
+
+    /**
+     * Get rows deleted after the given tombstone id, oldest first
+     */
+    async getDeletedRows(afterId = 0) {
+        try {
+            await this.pruneDeletedRows();
+        } catch (error) {
+            // Serving tombstones matters more than pruning them; the next interval retries
+            console.error('Error pruning deleted rows:', error);
+        }
+        return new Promise((resolve, reject) => {
+            const sql = 'SELECT id, table_name, row_id, deleted_at FROM deleted_rows WHERE id > ? ORDER BY id';
+            this.db.all(sql, [Number(afterId) || 0], (err, rows) => {
+                if (err) {
+                    reject(err);
+                } else {
+                    resolve(rows || []);
+                }
+            });
+        });
+    }
+
     /**
      * Get dashboard metrics
      */
@@ -521,6 +727,32 @@ class DatabaseManager {
         });
     }
 
+    /**
+     * Save a dashboard metrics snapshot ([{ metric_name, metric_value, calculated_at }])
+     */
+    saveDashboardMetrics(rows) {
+        return new Promise((resolve, reject) => {
+            const sql = `INSERT OR REPLACE INTO dashboard_metrics (metric_name, metric_value, calculated_at)
+                         VALUES (?, ?, COALESCE(?, CURRENT_TIMESTAMP))`;
+            this.db.serialize(() => {
+                this.db.run('BEGIN');
+                const statement = this.db.prepare(sql);
+                for (const row of rows) {
+                    statement.run([String(row.metric_name), String(row.metric_value), row.calculated_at || null]);
+                }
+                statement.finalize();
+                this.db.run('COMMIT', (err) => {
+                    if (err) {
+                        this.db.run('ROLLBACK');
+                        reject(err);
+                    } else {
+                        resolve({ saved: rows.length });
+                    }
+                });
+            });
+        });
+    }
+
     /**
      * Backup database
      */
@@ -86,10 +86,38 @@ INSERT OR IGNORE INTO projects (id, name, customer_id, customer_name, type, stat
 (2, 'Die Attach Development', 2, 'Innovate Solutions', 'die_attach', 'planning', 'medium', 30000, 12000, '2024-02-01', '2024-04-01', 'Development of new die attach process for medical devices', 'Q-2024-002', '', 'Jane Doe', 'Dr. Williams', 'Medical device certification required'),
 (3, 'Flip Chip Assembly', 1, 'TechCorp Industries', 'flip_chip', 'active', 'high', 75000, 28000, '2024-01-20', '2024-02-20', 'Flip chip assembly for automotive applications', 'Q-2024-003', 'PO-2024-002', 'Mike Brown', 'Sarah Wilson', 'Automotive grade requirements');
 
+-- Deleted rows, so agents mirroring the tables (langgraph/data_mirror.py) can drop them.
+-- Pruned after TOMBSTONE_RETENTION_HOURS (database/db.js).
+CREATE TABLE IF NOT EXISTS deleted_rows (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    table_name TEXT NOT NULL,
+    row_id INTEGER NOT NULL,
+    deleted_at DATETIME DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE TRIGGER IF NOT EXISTS customers_deleted AFTER DELETE ON customers
+BEGIN
+    INSERT INTO deleted_rows (table_name, row_id) VALUES ('customers', OLD.id);
+END;
+
+CREATE TRIGGER IF NOT EXISTS work_requests_deleted AFTER DELETE ON work_requests
+BEGIN
+    INSERT INTO deleted_rows (table_name, row_id) VALUES ('work_requests', OLD.id);
+END;
+
+CREATE TRIGGER IF NOT EXISTS projects_deleted AFTER DELETE ON projects
+BEGIN
+    INSERT INTO deleted_rows (table_name, row_id) VALUES ('projects', OLD.id);
+END;
+
 -- Create indexes for better performance
 CREATE INDEX IF NOT EXISTS idx_work_requests_customer_id ON work_requests(customer_id);
 CREATE INDEX IF NOT EXISTS idx_work_requests_status ON work_requests(status);
 CREATE INDEX IF NOT EXISTS idx_work_requests_priority ON work_requests(priority);
 CREATE INDEX IF NOT EXISTS idx_projects_customer_id ON projects(customer_id);
 CREATE INDEX IF NOT EXISTS idx_projects_status ON projects(status);
-CREATE INDEX IF NOT EXISTS idx_customers_tier ON customers(tier); 
\ No newline at end of file
+CREATE INDEX IF NOT EXISTS idx_customers_tier ON customers(tier);
+CREATE INDEX IF NOT EXISTS idx_customers_updated_at ON customers(updated_at);
+CREATE INDEX IF NOT EXISTS idx_work_requests_updated_at ON work_requests(updated_at);
+CREATE INDEX IF NOT EXISTS idx_projects_updated_at ON projects(updated_at);
+CREATE INDEX IF NOT EXISTS idx_deleted_rows_deleted_at ON deleted_rows(deleted_at);
\ No newline at end of file
@@ -0,0 +1,600 @@
+#!/usr/bin/env python3
+"""
+SC Micro Agent Benchmark
+Offline micro-benchmarks of the agent pipeline against a local database API stub and a fake LLM.
+
+    python3 agent_benchmark.py --rows 3 1000 100000 --iterations 20 --llm-latency-ms 50 --output bench.json
+    python3 agent_benchmark.py --import-time --import-budget-ms 1500
+
+Output is JSON with sorted keys and a fixed layout so runs can be diffed across commits.
+"""
+
+import os
+import sys
+import json
+import time
+import re
+import random
+import bisect
+import sqlite3
+import tempfile
+import contextlib
+import asyncio
+import logging
+import argparse
+import statistics
+import subprocess
+import threading
+import urllib.parse
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+
+import langgraph_agent as agent
+from agent_cache import get_intent_cache, get_response_cache
+from agent_env import env_float
+from backend_client import reset_backend_client
+from intent_model import classify_intent
+from llm_json import StreamingJSONParser, parse_llm_json
+from data_mirror import reset_data_mirror
+from semantic_cache import get_semantic_cache
+from sqlite_backend import reset_sqlite_backend
+
+BENCHMARK_VERSION = 6
+
+# Cold import of the agent module must stay under this (AGENT_IMPORT_BUDGET_MS overrides)
+DEFAULT_IMPORT_BUDGET_MS = 1500.0
+
+_IMPORT_TIME_LINE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)\s*$")
+
+# Messages cycled through by every stage, one or more per intent
+MESSAGES = (
+    "Show me the dashboard overview",
+    "What customers do we have?",
+    "Tell me about TechCorp Industries",
+    "Show me high-priority pending requests",
+    "Help me with project tracking",
+    "How do I import a CSV file?",
+    "What is 2+2?",
+    "hello",
+)
+
+# Messages the local intent model is unsure of: an intent LLM call in the staged graph
+AMBIGUOUS_MESSAGES = (
+    "hello",
+    "Any trouble with TechCorp?",
+    "what should I look at next",
+)
+
+SAMPLE_CUSTOMERS = (
+    ("TechCorp Industries", "Premium"),
+    ("Innovate Solutions", "Gold"),
+    ("MicroTech Systems", "Silver"),
+)
+NAME_PREFIXES = ("Apex", "Blue", "Cedar", "Delta", "Ember", "Falcon", "Granite", "Harbor", "Iron", "Juniper")
+NAME_SUFFIXES = ("Dynamics", "Labs", "Systems", "Devices", "Photonics", "Robotics", "Semiconductor", "Works")
+TIERS = ("Premium", "Gold", "Silver", "Bronze")
+PROJECT_TYPES = ("wirebond", "die_attach", "flip_chip", "encapsulation", "testing")
+WORK_REQUEST_STATUSES = ("pending", "in-progress", "completed", "on-hold")
+PROJECT_STATUSES = ("planning", "active", "completed", "on-hold")
+PRIORITIES = ("high", "medium", "low")
+
+
+def build_dataset(rows: int, seed: int = 0) -> Dict[str, Any]:
+    """Deterministic tables shaped like the database API responses, `rows` rows each"""
+    rng = random.Random(seed + rows)
+    # Distinct, increasing updated_at per table, as delta sync expects
+    epoch = datetime(2024, 12, 1)
+
+    def updated_at(index: int) -> str:
+        return (epoch + timedelta(seconds=index)).isoformat(sep=" ")
+
+    customers = []
+    for index in range(rows):
+        if index < len(SAMPLE_CUSTOMERS):
+            name, tier = SAMPLE_CUSTOMERS[index]
+        else:
+            name = f"{NAME_PREFIXES[index % 10]} {NAME_SUFFIXES[(index // 10) % 8]} {index}"
+            tier = TIERS[rng.randrange(len(TIERS))]
+        customers.append({
+            "id": index + 1,
+            "name": name,
+            "tier": tier,
+            "total_projects": rng.randrange(1, 40),
+            "completion_rate": round(rng.uniform(0.5, 1.0), 2),
+            "total_value": rng.randrange(5, 500) * 1000,
+            "contact": f"Contact {index + 1}",
+            "email": f"contact{index + 1}@example.com",
+            "phone": f"555-{index % 10000:04d}",
+            "updated_at": updated_at(index),
+        })
+
+    def owner():
+        customer = customers[rng.randrange(rows)]
+        return customer["id"], customer["name"]
+
+    work_requests = []
+    for index in range(rows):
+        customer_id, customer_name = owner()
+        project_type = PROJECT_TYPES[rng.randrange(len(PROJECT_TYPES))]
+        work_requests.append({
+            "id": index + 1,
+            "customer_id": customer_id,
+            "customer_name": customer_name,
+            "project_type": project_type,
+            "status": WORK_REQUEST_STATUSES[rng.randrange(len(WORK_REQUEST_STATUSES))],
+            "priority": PRIORITIES[rng.randrange(len(PRIORITIES))],
+            "description": f"{project_type.replace('_', ' ').title()} assembly for request {index + 1}",
+            "created_date": f"2024-{rng.randrange(1, 13):02d}-{rng.randrange(1, 29):02d}",
+            "target_date": f"2025-{rng.randrange(1, 13):02d}-{rng.randrange(1, 29):02d}",
+            "quote_number": f"Q-2024-{index + 1:06d}",
+            "po_number": f"PO-2024-{index + 1:06d}",
+            "budget": rng.randrange(5, 100) * 1000,
+            "updated_at": updated_at(index),
+        })
+
+    projects = []
+    for index in range(rows):
+        customer_id, customer_name = owner()
+        project_type = PROJECT_TYPES[rng.randrange(len(PROJECT_TYPES))]
+        budget = rng.randrange(10, 150) * 1000
+        projects.append({
+            "id": index + 1,
+            "name": f"{project_type.replace('_', ' ').title()} Project {index + 1}",
+            "customer_id": customer_id,
+            "customer_name": customer_name,
+            "type": project_type,
+            "status": PROJECT_STATUSES[rng.randrange(len(PROJECT_STATUSES))],
+            "priority": PRIORITIES[rng.randrange(len(PRIORITIES))],
+            "budget": budget,
+            "actual_cost": int(budget * rng.uniform(0.1, 1.1)),
+            "start_date": f"2024-{rng.randrange(1, 13):02d}-{rng.randrange(1, 29):02d}",
+            "target_date": f"2025-{rng.randrange(1, 13):02d}-{rng.randrange(1, 29):02d}",
+            "updated_at": updated_at(index),
+        })
+
+    metrics = {
+        "totalCustomers": len(customers),
+        "totalWorkRequests": len(work_requests),
+        "totalProjects": len(projects),
+        "pendingWorkRequests": sum(1 for row in work_requests if row["status"] == "pending"),
+        "activeProjects": sum(1 for row in projects if row["status"] == "active"),
+    }
+    return {
+        "customers": customers,
+        "work-requests": work_requests,
+        "projects": projects,
+        "dashboard/metrics": metrics,
+    }
+
+
+SCHEMA_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "database", "schema.sql")
+
+
+def write_sqlite_dataset(dataset: Dict[str, Any], path: str):
+    """Write a dataset into a SQLite file with the API's schema, in WAL mode like the API"""
+    connection = sqlite3.connect(path)
+    try:
+        connection.execute("PRAGMA journal_mode = WAL")
+        with open(SCHEMA_PATH, encoding="utf-8") as schema:
+            connection.executescript(schema.read())
+        for table, key in (("customers", "customers"), ("work_requests", "work-requests"), ("projects", "projects")):
+            connection.execute(f"DELETE FROM {table}")
+            rows = dataset[key]
+            columns = list(rows[0]) if rows else []
+            if columns:
+                connection.executemany(
+                    f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))})",
+                    [tuple(row[column] for column in columns) for row in rows])
+        connection.commit()
+    finally:
+        connection.close()
+
+
+@contextlib.contextmanager
+def _patched_env(**values: str):
+    original = {name: os.environ.get(name) for name in values}
+    os.environ.update(values)
+    try:
+        yield
+    finally:
+        for name, value in original.items():
+            if value is None:
+                os.environ.pop(name, None)
+            else:
+                os.environ[name] = value
+
+
+class StubDatabaseServer:
+    """Serves a dataset as the read endpoints of /api/database on a free localhost port"""
+
+    def __init__(self, dataset: Dict[str, Any]):
+        # Encode once so the stub costs the same at every table size
+        bodies = {f"/api/database/{path}": json.dumps(value).encode("utf-8") for path, value in dataset.items()}
+        rows_by_id = {str(row["id"]): json.dumps(row).encode("utf-8") for row in dataset["work-requests"]}
+        # ?updated_since= answers with the tail of each table (rows are in updated_at order)
+        changes = {f"/api/database/{path}": ([str(row.get("updated_at")) for row in rows], rows)
+                   for path, rows in dataset.items() if isinstance(rows, list)}
+        bodies["/api/database/deleted-rows"] = b"[]"
+
+        def changed_since(path: str, query: str) -> Optional[bytes]:
+            since = urllib.parse.parse_qs(query).get("updated_since")
+            if not since or path not in changes:
+                return None
+            stamps, rows = changes[path]
+            return json.dumps(rows[bisect.bisect_left(stamps, since[0]):]).encode("utf-8")
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            # Headers and body go out as separate writes; without this the
+            # client's delayed ACK adds ~40 ms to every response
+            disable_nagle_algorithm = True
+
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                path, _, query = self.path.partition("?")
+                body = changed_since(path, query) or bodies.get(path)
+                if body is None and path.startswith("/api/database/work-requests/"):
+                    body = rows_by_id.get(path.rsplit("/", 1)[1])
+                status = 200 if body is not None else 404
+                body = body if body is not None else b'{"error": "Not found"}'
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self._server.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/api/database"
+
+    def __enter__(self) -> "StubDatabaseServer":
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self._server.shutdown()
+        self._server.server_close()
+
+
+class FakeLatencyChatModel(BaseChatModel):
+    """Deterministic chat model that answers after a fixed delay.
+
+    Intent prompts get the local classifier's answer; every other prompt
+    gets a fenced JSON response like the real providers tend to return,
+    with the local classifier's intent when the prompt asks for one.
+    """
+
+    latency: float = 0.0
+
+    @property
+    def _llm_type(self) -> str:
+        return "benchmark-fake"
+
+    def _reply(self, messages: List[BaseMessage]) -> AIMessage:
+        prompt = "\n".join(str(message.content) for message in messages)
+        if "intent classifier" in prompt:
+            text = classify_intent(str(messages[-1].content)).intent
+        else:
+            reply: Dict[str, Any] = {}
+            if "intent (first" in prompt:
+                reply["intent"] = classify_intent(prompt.rsplit("User:", 1)[-1]).intent
+            reply.update({
+                "response_message": "Here is a summary of the requested data.",
+                "suggested_actions": [{"action": "View Dashboard", "description": "Open the dashboard", "route": "/"}],
+                "follow_up_questions": ["Show me the dashboard overview"],
+            })
+            text = "```json\n" + json.dumps(reply) + "\n```"
+        input_tokens = len(prompt) // 4
+        output_tokens = len(text) // 4
+        return AIMessage(content=text, usage_metadata={
+            "input_tokens": input_tokens,
+            "output_tokens": output_tokens,
+            "total_tokens": input_tokens + output_tokens,
+        })
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+        if self.latency:
+            time.sleep(self.latency)
+        return ChatResult(generations=[ChatGeneration(message=self._reply(messages))])
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        return ChatResult(generations=[ChatGeneration(message=self._reply(messages))])
+
+
+def _summarize(samples: Sequence[float]) -> Dict[str, Any]:
+    ordered = sorted(samples)
+    return {
+        "iterations": len(ordered),
+        "mean_ms": round(statistics.fmean(ordered) * 1000, 3),
+        "p50_ms": round(ordered[len(ordered) // 2] * 1000, 3),
+        "p95_ms": round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))] * 1000, 3),
+        "min_ms": round(ordered[0] * 1000, 3),
+        "max_ms": round(ordered[-1] * 1000, 3),
+    }
+
+
+def measure(func: Callable[[int], Any], iterations: int, warmup: int = len(MESSAGES),
+            setup: Optional[Callable[[int], Any]] = None) -> Dict[str, Any]:
+    """Time func(i) per iteration; setup(i) runs untimed before each call"""
+    samples = []
+    for index in range(warmup + iterations):
+        if setup is not None:
+            setup(index)
+        started = time.perf_counter()
+        func(index)
+        elapsed = time.perf_counter() - started
+        if index >= warmup:
+            samples.append(elapsed)
+    return _summarize(samples)
+
+
+async def ameasure(func: Callable[[int], Any], iterations: int, warmup: int = len(MESSAGES),
+                   setup: Optional[Callable[[int], Any]] = None) -> Dict[str, Any]:
+    """Async variant of measure for coroutine functions"""
+    samples = []
+    for index in range(warmup + iterations):
+        if setup is not None:
+            setup(index)
+        started = time.perf_counter()
+        await func(index)
+        elapsed = time.perf_counter() - started
+        if index >= warmup:
+            samples.append(elapsed)
+    return _summarize(samples)
+
+
+def _state(message: str, intent: str = "", context: Optional[Dict] = None) -> Dict:
+    state = agent._initial_state(message, "/", "operator")
+    state["intent"] = intent
+    state["context"] = context or {}
+    return state
+
+
+def _drop_data():
+    """Forget every cached and mirrored row"""
+    agent.invalidate_data_cache()
+    reset_data_mirror()
+
+
+def bench_rows(rows: int, iterations: int, warmup: int, llm_latency: float) -> Dict[str, Dict[str, Any]]:
+    """Run every stage against a stub serving `rows` rows per table"""
+    results: Dict[str, Dict[str, Any]] = {}
+    fake_llm = FakeLatencyChatModel(latency=llm_latency)
+    original_get_llm = agent.get_llm
+    dataset = build_dataset(rows)
+
+    def message(index: int) -> str:
+        return MESSAGES[index % len(MESSAGES)]
+
+    with StubDatabaseServer(dataset) as server, _patched_env(AGENT_API_BASE_URL=server.base_url,
+                                                             AGENT_DATA_BACKEND="http"):
+        reset_backend_client()
+        reset_sqlite_backend()
+        _drop_data()
+        try:
+            # Template path everywhere except run_agent_llm
+            agent.get_llm = lambda *args, **kwargs: None
+
+            results["intent_classifier"] = measure(
+                lambda i: agent.intent_classifier(_state(message(i))),
+                iterations, warmup, setup=lambda i: get_intent_cache().clear())
+
+            dashboard_state = lambda i: _state(message(i), "dashboard_analysis")
+            results["context_gatherer_cold"] = measure(
+                lambda i: agent.context_gatherer(dashboard_state(i)),
+                iterations, warmup, setup=lambda i: _drop_data())
+            results["context_gatherer_warm"] = measure(
+                lambda i: agent.context_gatherer(dashboard_state(i)), iterations, warmup)
+            # Cache expired, mirror loaded: a delta sync with nothing changed
+            results["context_gatherer_delta"] = measure(
+                lambda i: agent.context_gatherer(dashboard_state(i)),
+                iterations, warmup, setup=lambda i: agent.invalidate_data_cache())
+
+            prepared = []
+            for text in MESSAGES:
+                intent = classify_intent(text).intent
+                prepared.append(agent.context_gatherer(_state(text, intent)))
+            results["generate_template_response"] = measure(
+                lambda i: agent.generate_template_response(prepared[i % len(prepared)]), iterations, warmup)
+
+            fenced = fake_llm._reply([AIMessage(content="benchmark")]).content
+            results["clean_json_response"] = measure(
+                lambda i: json.loads(agent.clean_json_response(fenced)), iterations, warmup)
+            # An answer cut off mid-array, repaired; and one streamed in 4-character chunks
+            truncated = fenced[:fenced.index('"follow_up_questions"') + 30]
+            results["parse_llm_json_repaired"] = measure(
+                lambda i: parse_llm_json(truncated), iterations, warmup)
+            chunks = [fenced[start:start + 4] for start in range(0, len(fenced), 4)]
+
+            def stream_parse(i: int) -> None:
+                parser = StreamingJSONParser()
+                for chunk in chunks:
+                    parser.feed(chunk)
+                parser.close()
+
+            results["stream_json_parser"] = measure(stream_parse, iterations, warmup)
+
+            async def run_all() -> None:
+                results["run_agent_template"] = await ameasure(
+                    lambda i: agent.run_agent(message(i)), iterations, warmup)
+                agent.get_llm = lambda *args, **kwargs: fake_llm
+                results["run_agent_llm"] = await ameasure(
+                    lambda i: agent.run_agent(message(i)), iterations, warmup,
+                    setup=lambda i: (get_response_cache().clear(), get_semantic_cache().clear()))
+                # Same questions against unchanged data: answered from the response cache
+                results["run_agent_llm_cached"] = await ameasure(
+                    lambda i: agent.run_agent(message(i)), iterations, warmup)
+
+                # Unsure messages: intent call + response call, then one fused call
+                def forget(i: int) -> None:
+                    get_intent_cache().clear()
+                    get_response_cache().clear()
+                    get_semantic_cache().clear()
+
+                ambiguous = lambda i: agent.run_agent(AMBIGUOUS_MESSAGES[i % len(AMBIGUOUS_MESSAGES)])
+                results["run_agent_llm_ambiguous"] = await ameasure(ambiguous, iterations, warmup, setup=forget)
+                with _patched_env(AGENT_GRAPH_MODE="fused"):
+                    results["run_agent_llm_fused"] = await ameasure(ambiguous, iterations, warmup, setup=forget)
+
+            asyncio.run(run_all())
+            agent.get_llm = lambda *args, **kwargs: None
+
+            # Same cold read straight from a SQLite file (sqlite_backend.py)
+            with tempfile.TemporaryDirectory() as directory:
+                path = os.path.join(directory, "sc_micro.db")
+                write_sqlite_dataset(dataset, path)
+                with _patched_env(AGENT_DATA_BACKEND="sqlite", AGENT_SQLITE_PATH=path):
+                    reset_sqlite_backend()
+                    results["context_gatherer_cold_sqlite"] = measure(
+                        lambda i: agent.context_gatherer(dashboard_state(i)),
+                        iterations, warmup, setup=lambda i: _drop_data())
+                    reset_sqlite_backend()
+        finally:
+            agent.get_llm = original_get_llm
+            reset_backend_client()
+            reset_sqlite_backend()
+            _drop_data()
+            get_intent_cache().clear()
+            get_response_cache().clear()
+    return results
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        output = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                                cwd=os.path.dirname(os.path.abspath(__file__)), timeout=5)
+    except (OSError, subprocess.SubprocessError):
+        return None
+    return output.stdout.strip() or None
+
+
+def _import_profile(module: str) -> List[Dict[str, Any]]:
+    """Entries of `python -X importtime -c "import module"` in a fresh interpreter"""
+    completed = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                               capture_output=True, text=True, timeout=120,
+                               cwd=os.path.dirname(os.path.abspath(__file__)))
+    if completed.returncode != 0:
+        raise RuntimeError(f"Importing {module} failed: {completed.stderr.strip().splitlines()[-1:]}")
+    entries = []
+    for line in completed.stderr.splitlines():
+        match = _IMPORT_TIME_LINE.match(line)
+        if match:
+            self_us, cumulative_us, indent, name = match.groups()
+            entries.append({
+                "name": name,
+                "depth": (len(indent) - 1) // 2,
+                "self_ms": round(int(self_us) / 1000, 3),
+                "cumulative_ms": round(int(cumulative_us) / 1000, 3),
+            })
+    return entries
+
+
+def measure_import_time(module: str = "langgraph_agent", runs: int = 3, top: int = 15,
+                        budget_ms: Optional[float] = None) -> Dict[str, Any]:
+    """Cold-import cost of a module, -X importtime style, checked against a budget.
+
+    Each run imports the module in a new interpreter; the run with the
+    median total is reported with its slowest top-level dependencies.
+    """
+    if budget_ms is None:
+        budget_ms = env_float("AGENT_IMPORT_BUDGET_MS", DEFAULT_IMPORT_BUDGET_MS)
+    profiles = []
+    for _ in range(runs):
+        entries = _import_profile(module)
+        total = next((entry["cumulative_ms"] for entry in entries if entry["name"] == module), 0.0)
+        profiles.append((total, entries))
+    profiles.sort(key=lambda item: item[0])
+    total_ms, entries = profiles[len(profiles) // 2]
+    # Direct imports of the module (depth 1) are the ones this repo controls
+    children = [entry for entry in entries if entry["depth"] == 1]
+    return {
+        "module": module,
+        "runs": runs,
+        "samples_ms": [round(total, 3) for total, _ in profiles],
+        "total_ms": total_ms,
+        "budget_ms": budget_ms,
+        "within_budget": total_ms <= budget_ms,
+        "top_imports": sorted(children, key=lambda entry: -entry["cumulative_ms"])[:top],
+    }
+
+
+def run_benchmarks(rows: Sequence[int] = (3, 1000), iterations: int = 20, warmup: int = len(MESSAGES),
+                   llm_latency_ms: float = 0.0) -> Dict[str, Any]:
+    """Benchmark every stage at each table size and return the report"""
+    return {
+        "benchmark": "agent_pipeline",
+        "version": BENCHMARK_VERSION,
+        "commit": _git_commit(),
+        "python": ".".join(str(part) for part in sys.version_info[:3]),
+        "config": {
+            "rows": list(rows),
+            "iterations": iterations,
+            "warmup": warmup,
+            "llm_latency_ms": llm_latency_ms,
+        },
+        "results": {
+            str(count): bench_rows(count, iterations, warmup, llm_latency_ms / 1000.0) for count in rows
+        },
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the SC Micro agent pipeline offline")
+    parser.add_argument("--rows", type=int, nargs="+", default=[3, 1000],
+                        help="Rows per table, one benchmark run per value (3 to 100000)")
+    parser.add_argument("--iterations", type=int, default=20, help="Timed iterations per stage")
+    parser.add_argument("--warmup", type=int, default=len(MESSAGES),
+                        help="Untimed iterations per stage (default: one pass over the messages)")
+    parser.add_argument("--llm-latency-ms", type=float, default=0.0, help="Delay of each fake LLM call")
+    parser.add_argument("--output", help="Write the JSON report here instead of stdout")
+    parser.add_argument("--verbose", action="store_true", help="Keep the agent's INFO logging")
+    parser.add_argument("--import-time", action="store_true",
+                        help="Only measure the cold import of --import-module; exit 1 when over budget")
+    parser.add_argument("--import-module", default="langgraph_agent", help="Module checked by --import-time")
+    parser.add_argument("--import-budget-ms", type=float,
+                        help=f"Import budget (default AGENT_IMPORT_BUDGET_MS or {DEFAULT_IMPORT_BUDGET_MS:g})")
+    args = parser.parse_args(argv)
+
+    if args.import_time:
+        report = measure_import_time(args.import_module, budget_ms=args.import_budget_ms)
+        _write_report(report, args.output)
+        if not report["within_budget"]:
+            sys.exit(1)
+        return
+
+    if not args.verbose:
+        logging.getLogger().setLevel(logging.WARNING)
+    for count in args.rows:
+        if not 1 <= count <= 100000:
+            parser.error(f"--rows values must be between 1 and 100000, got {count}")
+
+    report = run_benchmarks(args.rows, args.iterations, args.warmup, args.llm_latency_ms)
+    _write_report(report, args.output)
+
+
+def _write_report(report: Dict[str, Any], path: Optional[str]):
+    output = json.dumps(report, indent=2, sort_keys=True)
+    if path:
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(output + "\n")
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    main()
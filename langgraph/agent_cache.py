@@ -0,0 +1,484 @@
+#!/usr/bin/env python3
+"""
+SC Micro Agent Caches
+In-process TTL/LRU caches for agent data, classified intents and generated responses.
+"""
+
+import os
+import re
+import copy
+import json
+import hashlib
+import time
+import atexit
+import asyncio
+import logging
+import threading
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable, List, Optional, Tuple
+
+from agent_env import env_float, env_int
+
+logger = logging.getLogger(__name__)
+
+_MISSING = object()
+# Result of an async flight whose leader was cancelled
+_RETRY = object()
+
+
+class _Flight:
+    """A load in progress that concurrent callers for the same key wait on"""
+    __slots__ = ("event", "value", "error")
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.value = None
+        self.error = None
+
+
+class TTLCache:
+    """Thread-safe LRU cache whose entries expire after ttl seconds.
+
+    get_or_load()/aget_or_load() coalesce concurrent misses for the same key
+    into one loader call (single flight). A ttl of 0 disables caching but
+    keeps the coalescing.
+    """
+
+    def __init__(self, maxsize: int = 128, ttl: float = 60.0, name: str = "cache"):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.name = name
+        self._data: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.RLock()
+        self._inflight: Dict[Hashable, _Flight] = {}
+        self._ainflight: Dict[Hashable, asyncio.Future] = {}
+        # Bumped on invalidation so loads started earlier never store stale data
+        self._epoch = 0
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            value = self._lookup(key)
+            if value is _MISSING:
+                self.misses += 1
+                return default
+            self.hits += 1
+            return value
+
+    def peek(self, key: Hashable, default: Any = None) -> Any:
+        """The live value without counting a hit or miss or refreshing its LRU position"""
+        with self._lock:
+            entry = self._data.get(key)
+        if entry is None or entry[1] < time.monotonic():
+            return default
+        return entry[0]
+
+    def _lookup(self, key: Hashable) -> Any:
+        entry = self._data.get(key)
+        if entry is None:
+            return _MISSING
+        value, expires_at = entry
+        if expires_at < time.monotonic():
+            del self._data[key]
+            self.expirations += 1
+            return _MISSING
+        self._data.move_to_end(key)
+        return value
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None):
+        ttl = self.ttl if ttl is None else ttl
+        if ttl <= 0 or self.maxsize <= 0:
+            return
+        with self._lock:
+            self._data[key] = (value, time.monotonic() + ttl)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def _store_if_current(self, key: Hashable, value: Any, epoch: int):
+        with self._lock:
+            if epoch == self._epoch:
+                self.set(key, value)
+
+    def get_or_load(self, key: Hashable, loader: Callable[[], Any]) -> Any:
+        """Return the cached value, calling loader() once on a miss"""
+        with self._lock:
+            value = self._lookup(key)
+            if value is not _MISSING:
+                self.hits += 1
+                return value
+            flight = self._inflight.get(key)
+            leader = flight is None
+            if leader:
+                self.misses += 1
+                flight = self._inflight[key] = _Flight()
+                epoch = self._epoch
+            else:
+                self.coalesced += 1
+
+        if not leader:
+            flight.event.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.value
+
+        try:
+            flight.value = loader()
+            self._store_if_current(key, flight.value, epoch)
+            return flight.value
+        except BaseException as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+            flight.event.set()
+
+    async def aget_or_load(self, key: Hashable, loader: Callable[[], Awaitable[Any]]) -> Any:
+        """Async variant of get_or_load for coroutine loaders"""
+        loop = asyncio.get_running_loop()
+        while True:
+            with self._lock:
+                value = self._lookup(key)
+                if value is not _MISSING:
+                    self.hits += 1
+                    return value
+                future = self._ainflight.get(key)
+                leader = future is None or future.get_loop() is not loop
+                if leader:
+                    self.misses += 1
+                    future = self._ainflight[key] = loop.create_future()
+                    epoch = self._epoch
+                else:
+                    self.coalesced += 1
+
+            if not leader:
+                value = await asyncio.shield(future)
+                if value is _RETRY:
+                    # The leader was cancelled: look again, possibly as the new leader
+                    continue
+                return value
+
+            try:
+                value = await loader()
+                self._store_if_current(key, value, epoch)
+                future.set_result(value)
+                return value
+            except asyncio.CancelledError:
+                # Only the leader was cancelled; its followers retry instead of failing
+                future.set_result(_RETRY)
+                raise
+            except BaseException as e:
+                future.set_exception(e)
+                # Mark retrieved so an unawaited failure does not log a warning
+                future.exception()
+                raise
+            finally:
+                with self._lock:
+                    if self._ainflight.get(key) is future:
+                        del self._ainflight[key]
+
+    def items(self) -> List[Tuple[Hashable, Any, float]]:
+        """Live entries as (key, value, remaining ttl seconds), oldest first"""
+        now = time.monotonic()
+        with self._lock:
+            return [(key, value, expires_at - now) for key, (value, expires_at) in self._data.items()
+                    if expires_at >= now]
+
+    def invalidate(self, key: Hashable = _MISSING):
+        """Drop one key, or every entry when no key is given"""
+        with self._lock:
+            self._epoch += 1
+            if key is _MISSING:
+                self._data.clear()
+            else:
+                self._data.pop(key, None)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._data),
+                "maxsize": self.maxsize,
+                "ttl": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "coalesced": self.coalesced,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            }
+
+
+# Default TTLs (seconds) per backend entity; override with AGENT_CACHE_TTL_<ENTITY>
+DEFAULT_ENTITY_TTLS = {
+    "customers": 300.0,
+    "work_requests": 30.0,
+    "projects": 60.0,
+    "dashboard_metrics": 30.0,
+}
+
+
+class EntityCache:
+    """Read-through cache in front of the backend tables, one TTLCache per entity"""
+
+    def __init__(self, ttls: Optional[Dict[str, float]] = None, maxsize: Optional[int] = None):
+        ttls = {**DEFAULT_ENTITY_TTLS, **(ttls or {})}
+        if maxsize is None:
+            maxsize = env_int("AGENT_CACHE_MAXSIZE", 64)
+        self._caches: Dict[str, TTLCache] = {}
+        for entity, ttl in ttls.items():
+            ttl = env_float(f"AGENT_CACHE_TTL_{entity.upper()}", ttl)
+            self._caches[entity] = TTLCache(maxsize=maxsize, ttl=ttl, name=entity)
+
+    def cache(self, entity: str) -> TTLCache:
+        return self._caches[entity]
+
+    def get_or_load(self, entity: str, key: Hashable, loader: Callable[[], Any]) -> Any:
+        return self._caches[entity].get_or_load(key, loader)
+
+    async def aget_or_load(self, entity: str, key: Hashable, loader: Callable[[], Awaitable[Any]]) -> Any:
+        return await self._caches[entity].aget_or_load(key, loader)
+
+    def invalidate(self, *entities: str):
+        """Invalidate the given entities, or all of them when none are named"""
+        for entity in entities or tuple(self._caches):
+            self._caches[entity].invalidate()
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        return {entity: cache.stats() for entity, cache in self._caches.items()}
+
+
+_entity_cache: Optional[EntityCache] = None
+_entity_cache_lock = threading.Lock()
+
+
+def get_entity_cache() -> EntityCache:
+    """Return the process-wide entity cache"""
+    global _entity_cache
+    if _entity_cache is None:
+        with _entity_cache_lock:
+            if _entity_cache is None:
+                _entity_cache = EntityCache()
+    return _entity_cache
+
+
+_PUNCTUATION = re.compile(r"[^\w\s+\-*/]")
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_message(message: str) -> str:
+    """Fold case, punctuation and whitespace so trivially different phrasings share a key.
+
+    Arithmetic operators are kept so "2+2" and "22" stay distinct.
+    """
+    folded = _PUNCTUATION.sub(" ", message.casefold())
+    return _WHITESPACE.sub(" ", folded).strip()
+
+
+class _FileBackedCache(ABC):
+    """A TTLCache whose live entries can be kept in a JSON file.
+
+    When a path is given the cache is loaded from it on start and written
+    back every save_every new entries and at interpreter exit. Subclasses
+    map values to and from the list stored before each entry's expiry.
+    """
+
+    kind = "cache"
+
+    def __init__(self, maxsize: int, ttl: float, path: Optional[str], save_every: int):
+        self._cache = TTLCache(maxsize=maxsize, ttl=ttl, name=self.kind)
+        self._lock = threading.Lock()
+        self.path = path
+        self.save_every = save_every
+        self._dirty = 0
+        if path:
+            self._load()
+            atexit.register(self.save)
+
+    @abstractmethod
+    def _encode(self, value: Any) -> List[Any]:
+        """The JSON-serializable fields stored for value"""
+
+    @abstractmethod
+    def _decode(self, fields: List[Any]) -> Any:
+        """The value rebuilt from the fields _encode stored"""
+
+    def _store(self, key: str, value: Any):
+        self._cache.set(key, value)
+        if self.path:
+            with self._lock:
+                self._dirty += 1
+                flush = self._dirty >= self.save_every
+            if flush:
+                self.save()
+
+    def clear(self):
+        self._cache.invalidate()
+
+    def _load(self):
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                payload = json.load(f)
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError) as e:
+            logger.warning(f"Could not load {self.kind} cache from {self.path}: {e}")
+            return
+        now = time.time()
+        for key, fields in payload.get("entries", {}).items():
+            expires_at = fields[-1]
+            if expires_at > now:
+                self._cache.set(key, self._decode(fields[:-1]), ttl=expires_at - now)
+
+    def save(self):
+        """Write live entries to the backing file (atomic replace)"""
+        if not self.path:
+            return
+        now = time.time()
+        entries = {key: [*self._encode(value), now + remaining] for key, value, remaining in self._cache.items()}
+        tmp_path = f"{self.path}.tmp"
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump({"version": 1, "entries": entries}, f)
+            os.replace(tmp_path, self.path)
+            with self._lock:
+                self._dirty = 0
+        except OSError as e:
+            logger.warning(f"Could not save {self.kind} cache to {self.path}: {e}")
+
+    def stats(self) -> Dict[str, Any]:
+        return self._cache.stats()
+
+
+class IntentCache(_FileBackedCache):
+    """Bounded LRU+TTL memo of normalized message -> (intent, confidence).
+
+    Pinned entries (e.g. the follow-up questions the templates suggest)
+    never expire or get evicted. When a path is given the memo persists
+    across restarts.
+    """
+
+    kind = "intent"
+
+    def __init__(self, maxsize: int = 2048, ttl: float = 86400.0, path: Optional[str] = None,
+                 save_every: int = 25):
+        self._pinned: Dict[str, Tuple[str, float]] = {}
+        self.pinned_hits = 0
+        super().__init__(maxsize, ttl, path, save_every)
+
+    def _encode(self, value: Tuple[str, float]) -> List[Any]:
+        return list(value)
+
+    def _decode(self, fields: List[Any]) -> Tuple[str, float]:
+        intent, confidence = fields
+        return intent, confidence
+
+    def get(self, message: str) -> Optional[Tuple[str, float]]:
+        key = normalize_message(message)
+        pinned = self._pinned.get(key)
+        if pinned is not None:
+            with self._lock:
+                self.pinned_hits += 1
+            return pinned
+        return self._cache.get(key)
+
+    def put(self, message: str, intent: str, confidence: float):
+        self._store(normalize_message(message), (intent, confidence))
+
+    def pin(self, message: str, intent: str, confidence: float = 1.0):
+        self._pinned[normalize_message(message)] = (intent, confidence)
+
+    def stats(self) -> Dict[str, Any]:
+        stats = self._cache.stats()
+        stats["pinned"] = len(self._pinned)
+        stats["pinned_hits"] = self.pinned_hits
+        lookups = stats["hits"] + stats["misses"] + self.pinned_hits
+        stats["hit_rate"] = round((stats["hits"] + self.pinned_hits) / lookups, 4) if lookups else 0.0
+        return stats
+
+
+_intent_cache: Optional[IntentCache] = None
+_intent_cache_lock = threading.Lock()
+
+
+def get_intent_cache() -> IntentCache:
+    """Return the process-wide intent cache (persistent when AGENT_INTENT_CACHE_FILE is set)"""
+    global _intent_cache
+    if _intent_cache is None:
+        with _intent_cache_lock:
+            if _intent_cache is None:
+                _intent_cache = IntentCache(
+                    maxsize=env_int("AGENT_INTENT_CACHE_MAXSIZE", 2048),
+                    ttl=env_float("AGENT_INTENT_CACHE_TTL", 86400.0),
+                    path=os.getenv("AGENT_INTENT_CACHE_FILE") or None,
+                )
+    return _intent_cache
+
+
+def context_fingerprint(context_json: str) -> str:
+    """Short digest of the serialized context sent with a prompt"""
+    return hashlib.blake2b(context_json.encode("utf-8"), digest_size=12).hexdigest()
+
+
+class ResponseCache(_FileBackedCache):
+    """LRU+TTL memo of generated answers keyed on (intent, normalized message, context fingerprint).
+
+    The fingerprint covers the context actually sent to the model, so an
+    answer is reused only while the rows it was based on are unchanged;
+    clear() drops everything when the data is known to have changed (for
+    example after the agent writes to it). Values are response dicts
+    (response_message, suggested_actions, follow_up_questions) and callers
+    always get their own copy.
+    """
+
+    kind = "response"
+
+    def __init__(self, maxsize: int = 512, ttl: float = 900.0, path: Optional[str] = None,
+                 save_every: int = 10):
+        super().__init__(maxsize, ttl, path, save_every)
+
+    def _encode(self, value: Dict[str, Any]) -> List[Any]:
+        return [value]
+
+    def _decode(self, fields: List[Any]) -> Dict[str, Any]:
+        return fields[0]
+
+    @staticmethod
+    def key(intent: str, message: str, fingerprint: str) -> str:
+        # normalize_message() collapses whitespace, so the separator cannot occur inside a part
+        return "\n".join((intent, fingerprint, normalize_message(message)))
+
+    def get(self, intent: str, message: str, fingerprint: str) -> Optional[Dict[str, Any]]:
+        response = self._cache.get(self.key(intent, message, fingerprint))
+        return copy.deepcopy(response) if response is not None else None
+
+    def put(self, intent: str, message: str, fingerprint: str, response: Dict[str, Any]):
+        self._store(self.key(intent, message, fingerprint), copy.deepcopy(response))
+
+
+_response_cache: Optional[ResponseCache] = None
+_response_cache_lock = threading.Lock()
+
+
+def get_response_cache() -> ResponseCache:
+    """Return the process-wide response cache (persistent when AGENT_RESPONSE_CACHE_FILE is set)"""
+    global _response_cache
+    if _response_cache is None:
+        with _response_cache_lock:
+            if _response_cache is None:
+                _response_cache = ResponseCache(
+                    maxsize=env_int("AGENT_RESPONSE_CACHE_MAXSIZE", 512),
+                    ttl=env_float("AGENT_RESPONSE_CACHE_TTL", 900.0),
+                    path=os.getenv("AGENT_RESPONSE_CACHE_FILE") or None,
+                )
+    return _response_cache
@@ -0,0 +1,34 @@
+#!/usr/bin/env python3
+"""
+SC Micro Agent Environment
+Numeric settings read from the environment, falling back to the default (with a warning) on bad values.
+"""
+
+import os
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+def env_float(name: str, default: float) -> float:
+    """float(os.environ[name]), or default when unset, empty or invalid"""
+    raw = os.getenv(name)
+    if raw is None or not raw.strip():
+        return default
+    try:
+        return float(raw)
+    except ValueError:
+        logger.warning(f"Ignoring invalid {name}={raw!r}, using {default}")
+        return default
+
+
+def env_int(name: str, default: int) -> int:
+    """int(os.environ[name]), or default when unset, empty or invalid"""
+    raw = os.getenv(name)
+    if raw is None or not raw.strip():
+        return default
+    try:
+        return int(raw)
+    except ValueError:
+        logger.warning(f"Ignoring invalid {name}={raw!r}, using {default}")
+        return default
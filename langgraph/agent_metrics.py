@@ -0,0 +1,358 @@
+#!/usr/bin/env python3
+"""
+SC Micro Agent Metrics
+Per-node timing, LLM token usage, payload sizes and cache hits, as an in-process registry and per-request traces.
+"""
+
+import os
+import time
+import asyncio
+import bisect
+import functools
+import threading
+import contextvars
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+# Upper bounds of the histogram buckets
+SECONDS_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+BYTES_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+METRIC_HELP = {
+    "agent_request_seconds": "Wall time of a run_agent call",
+    "agent_span_seconds": "Wall time of graph nodes, tools, LLM calls, fetches and parsing",
+    "agent_span_errors_total": "Spans that raised",
+    "agent_llm_calls_total": "LLM calls",
+    "agent_llm_tokens_total": "LLM tokens reported by the provider",
+    "agent_payload_bytes": "Size of backend responses and prompt context",
+    "agent_cache_lookups_total": "Entity cache lookups",
+    "agent_model_routes_total": "Model tier chosen per stage and intent, with the reason",
+    "agent_llm_parses_total": "LLM answers by parse outcome (parsed, repaired, unstructured)",
+}
+
+Labels = Tuple[Tuple[str, str], ...]
+
+
+class Histogram:
+    """Cumulative-bucket histogram in the Prometheus style"""
+    __slots__ = ("buckets", "counts", "count", "sum")
+
+    def __init__(self, buckets: Sequence[float]):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def to_dict(self) -> Dict[str, Any]:
+        cumulative, running = {}, 0
+        for bound, count in zip(self.buckets + (float("inf"),), self.counts):
+            running += count
+            cumulative[_bound(bound)] = running
+        return {"count": self.count, "sum": round(self.sum, 6), "buckets": cumulative}
+
+
+def _bound(bound: float) -> str:
+    if bound == float("inf"):
+        return "+Inf"
+    return str(int(bound)) if float(bound).is_integer() else repr(float(bound))
+
+
+def _labels(labels: Dict[str, Any]) -> Labels:
+    return tuple(sorted((key, str(value)) for key, value in labels.items()))
+
+
+def _format_labels(labels: Labels, extra: str = "") -> str:
+    parts = [f'{key}="{value}"' for key, value in labels]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+class MetricsRegistry:
+    """Thread-safe counters and histograms keyed by metric name and labels"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters: Dict[str, Dict[Labels, float]] = {}
+        self._histograms: Dict[str, Dict[Labels, Histogram]] = {}
+
+    def inc(self, metric: str, value: float = 1.0, **labels: Any):
+        key = _labels(labels)
+        with self._lock:
+            series = self._counters.setdefault(metric, {})
+            series[key] = series.get(key, 0.0) + value
+
+    def observe(self, metric: str, value: float, buckets: Sequence[float] = SECONDS_BUCKETS, **labels: Any):
+        key = _labels(labels)
+        with self._lock:
+            series = self._histograms.setdefault(metric, {})
+            histogram = series.get(key)
+            if histogram is None:
+                histogram = series[key] = Histogram(buckets)
+            histogram.observe(value)
+
+    def reset(self):
+        with self._lock:
+            self._counters.clear()
+            self._histograms.clear()
+
+    def snapshot(self) -> Dict[str, Any]:
+        """JSON-serializable dump of every series"""
+        with self._lock:
+            return {
+                "counters": {
+                    name: [{"labels": dict(labels), "value": value} for labels, value in series.items()]
+                    for name, series in self._counters.items()
+                },
+                "histograms": {
+                    name: [{"labels": dict(labels), **histogram.to_dict()} for labels, histogram in series.items()]
+                    for name, series in self._histograms.items()
+                },
+            }
+
+    def render_prometheus(self) -> str:
+        """Dump every series in the Prometheus text exposition format"""
+        lines: List[str] = []
+        with self._lock:
+            for name, series in sorted(self._counters.items()):
+                lines.append(f"# HELP {name} {METRIC_HELP.get(name, name)}")
+                lines.append(f"# TYPE {name} counter")
+                for labels, value in series.items():
+                    lines.append(f"{name}{_format_labels(labels)} {value:g}")
+            for name, series in sorted(self._histograms.items()):
+                lines.append(f"# HELP {name} {METRIC_HELP.get(name, name)}")
+                lines.append(f"# TYPE {name} histogram")
+                for labels, histogram in series.items():
+                    running = 0
+                    for bound, count in zip(histogram.buckets + (float("inf"),), histogram.counts):
+                        running += count
+                        bucket_labels = _format_labels(labels, 'le="' + _bound(bound) + '"')
+                        lines.append(f"{name}_bucket{bucket_labels} {running}")
+                    lines.append(f"{name}_sum{_format_labels(labels)} {histogram.sum:.6f}")
+                    lines.append(f"{name}_count{_format_labels(labels)} {histogram.count}")
+        return "\n".join(lines) + "\n"
+
+
+class RequestTrace:
+    """Everything recorded while handling one request"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.started = time.perf_counter()
+        self.spans: List[Dict[str, Any]] = []
+        self.llm: List[Dict[str, Any]] = []
+        self.payload_bytes: Dict[str, int] = {}
+        self.cache: Dict[str, Dict[str, int]] = {}
+        self.routes: List[Dict[str, Any]] = []
+
+    def to_dict(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "total_ms": round((time.perf_counter() - self.started) * 1000, 3),
+                "spans": list(self.spans),
+                "llm": list(self.llm),
+                "payload_bytes": dict(self.payload_bytes),
+                "cache": {entity: dict(counts) for entity, counts in self.cache.items()},
+                "routes": list(self.routes),
+            }
+
+
+_registry = MetricsRegistry()
+_enabled = os.getenv("AGENT_METRICS", "").lower() in ("1", "true", "yes", "on")
+_current_trace: "contextvars.ContextVar[Optional[RequestTrace]]" = contextvars.ContextVar("agent_trace", default=None)
+
+
+def get_metrics_registry() -> MetricsRegistry:
+    return _registry
+
+
+def metrics_enabled() -> bool:
+    return _enabled
+
+
+def enable_metrics(enabled: bool = True):
+    """Turn registry collection on or off (AGENT_METRICS sets the initial state)"""
+    global _enabled
+    _enabled = enabled
+
+
+def current_trace() -> Optional[RequestTrace]:
+    return _current_trace.get()
+
+
+def _record_span(kind: str, name: str, seconds: float, error: Optional[BaseException]):
+    if _enabled:
+        _registry.observe("agent_span_seconds", seconds, kind=kind, name=name)
+        if error is not None:
+            _registry.inc("agent_span_errors_total", kind=kind, name=name)
+    trace = _current_trace.get()
+    if trace is not None:
+        span = {"kind": kind, "name": name, "ms": round(seconds * 1000, 3)}
+        if error is not None:
+            span["error"] = type(error).__name__
+        with trace._lock:
+            trace.spans.append(span)
+
+
+class _Span:
+    __slots__ = ("kind", "name", "started")
+
+    def __init__(self, kind: str, name: str):
+        self.kind = kind
+        self.name = name
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        _record_span(self.kind, self.name, time.perf_counter() - self.started, exc)
+        return False
+
+
+class _NoSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+_NO_SPAN = _NoSpan()
+
+
+def span(kind: str, name: str):
+    """Context manager timing a block; a shared no-op when nothing is recording"""
+    if not _enabled and _current_trace.get() is None:
+        return _NO_SPAN
+    return _Span(kind, name)
+
+
+def instrument(func: Callable, kind: str, name: str) -> Callable:
+    """Wrap a sync or async callable so each call is recorded as a span.
+
+    The wrapper keeps the wrapped signature (LangGraph inspects node
+    signatures) and calls straight through when nothing is recording.
+    """
+    if asyncio.iscoroutinefunction(func):
+        @functools.wraps(func)
+        async def async_wrapper(*args, **kwargs):
+            if not _enabled and _current_trace.get() is None:
+                return await func(*args, **kwargs)
+            with _Span(kind, name):
+                return await func(*args, **kwargs)
+        return async_wrapper
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        if not _enabled and _current_trace.get() is None:
+            return func(*args, **kwargs)
+        with _Span(kind, name):
+            return func(*args, **kwargs)
+    return wrapper
+
+
+def instrument_tool(tool: Any) -> Any:
+    """Record every sync and async invocation of a LangChain tool"""
+    if tool.func is not None:
+        tool.func = instrument(tool.func, "tool", tool.name)
+    if getattr(tool, "coroutine", None) is not None:
+        tool.coroutine = instrument(tool.coroutine, "tool", tool.name)
+    return tool
+
+
+def record_llm_usage(stage: str, message: Any):
+    """Record one LLM call and the token usage its response reports"""
+    if not _enabled and _current_trace.get() is None:
+        return
+    usage = getattr(message, "usage_metadata", None) or {}
+    if not usage:
+        token_usage = (getattr(message, "response_metadata", None) or {}).get("token_usage") or {}
+        usage = {
+            "input_tokens": token_usage.get("prompt_tokens", 0),
+            "output_tokens": token_usage.get("completion_tokens", 0),
+        }
+    input_tokens = int(usage.get("input_tokens") or 0)
+    output_tokens = int(usage.get("output_tokens") or 0)
+    if _enabled:
+        _registry.inc("agent_llm_calls_total", stage=stage)
+        _registry.inc("agent_llm_tokens_total", input_tokens, stage=stage, kind="input")
+        _registry.inc("agent_llm_tokens_total", output_tokens, stage=stage, kind="output")
+    trace = _current_trace.get()
+    if trace is not None:
+        with trace._lock:
+            trace.llm.append({"stage": stage, "input_tokens": input_tokens, "output_tokens": output_tokens})
+
+
+def record_payload(source: str, nbytes: int):
+    """Record the size of a backend response or prompt payload"""
+    if _enabled:
+        _registry.observe("agent_payload_bytes", nbytes, buckets=BYTES_BUCKETS, source=source)
+    trace = _current_trace.get()
+    if trace is not None:
+        with trace._lock:
+            trace.payload_bytes[source] = trace.payload_bytes.get(source, 0) + nbytes
+
+
+def record_cache(entity: str, hit: bool):
+    """Record an entity cache lookup"""
+    if _enabled:
+        _registry.inc("agent_cache_lookups_total", entity=entity, result="hit" if hit else "miss")
+    trace = _current_trace.get()
+    if trace is not None:
+        with trace._lock:
+            counts = trace.cache.setdefault(entity, {"hits": 0, "misses": 0})
+            counts["hits" if hit else "misses"] += 1
+
+
+def record_route(stage: str, intent: str, tier: str, reason: str):
+    """Record the model tier picked for an LLM stage ("none" when answering without one)"""
+    if _enabled:
+        _registry.inc("agent_model_routes_total", stage=stage, intent=intent or "-", tier=tier, reason=reason)
+    trace = _current_trace.get()
+    if trace is not None:
+        with trace._lock:
+            trace.routes.append({"stage": stage, "intent": intent, "tier": tier, "reason": reason})
+
+
+def record_parse(stage: str, outcome: str):
+    """Record how an LLM answer was parsed"""
+    if _enabled:
+        _registry.inc("agent_llm_parses_total", stage=stage, outcome=outcome)
+
+
+class request_scope:
+    """Time one request and, when trace is set, collect a RequestTrace for it.
+
+    Usable as a sync or async context manager; the trace (or None) is the
+    value bound by `as`.
+    """
+
+    def __init__(self, trace: bool = False):
+        self.trace = RequestTrace() if trace else None
+        self._token = None
+
+    def __enter__(self) -> Optional[RequestTrace]:
+        self.started = time.perf_counter()
+        if self.trace is not None:
+            self._token = _current_trace.set(self.trace)
+        return self.trace
+
+    def __exit__(self, exc_type, exc, tb):
+        if self._token is not None:
+            _current_trace.reset(self._token)
+        if _enabled:
+            _registry.observe("agent_request_seconds", time.perf_counter() - self.started)
+        return False
+
+    async def __aenter__(self) -> Optional[RequestTrace]:
+        return self.__enter__()
+
+    async def __aexit__(self, exc_type, exc, tb):
+        return self.__exit__(exc_type, exc, tb)
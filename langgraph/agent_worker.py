@@ -0,0 +1,289 @@
+#!/usr/bin/env python3
+"""
+SC Micro Agent Worker
+Resident agent process speaking a JSON-lines protocol over stdin/stdout or a local socket.
+
+Each line is one JSON object. Requests:
+    {"id": "1", "type": "chat", "message": "...", "current_page": "/", "user_role": "operator", "stream": false}
+    {"id": "2", "type": "health"}
+    {"id": "3", "type": "metrics", "format": "json"}                       (or "prometheus")
+    {"id": "4", "type": "shutdown"}
+
+A chat request with "trace": true gets per-node timings in result["trace"], and
+"latency_budget_ms" overrides the model policy's per-request budget.
+
+Responses carry the request id:
+    {"id": "1", "type": "result", "result": {...run_agent response...}}
+    {"id": "1", "type": "event", "event": {...stream_agent event...}}    (stream: true)
+    {"id": "1", "type": "error", "error": "..."}
+    {"id": null, "type": "error", "error": "..."}                        (unreadable line, e.g. over MAX_LINE_BYTES)
+    {"id": "2", "type": "health", "status": "ok", "ready": true, "inflight": 0, ...}
+    {"id": "3", "type": "metrics", "enabled": true, "metrics": {...} or "..."}
+
+Unsolicited messages: {"type": "ready", ...} once setup is done and
+{"type": "drained", ...} after a shutdown request, SIGTERM/SIGINT or end of
+input, once every in-flight request has been answered.
+"""
+
+import os
+import sys
+import json
+import time
+import signal
+import asyncio
+import logging
+import argparse
+from typing import Any, AsyncIterator, Callable, Dict, Optional, Set
+
+import langgraph_agent
+from agent_env import env_int
+from agent_metrics import get_metrics_registry, metrics_enabled
+
+logger = logging.getLogger(__name__)
+
+PROTOCOL_VERSION = 1
+
+# Largest accepted request line, in bytes
+MAX_LINE_BYTES = 16 * 1024 * 1024
+
+
+class AgentWorker:
+    """Serves agent requests concurrently on one event loop"""
+
+    def __init__(self, concurrency: Optional[int] = None):
+        if concurrency is None:
+            concurrency = env_int("AGENT_WORKER_CONCURRENCY", 16)
+        self.concurrency = concurrency
+        self._semaphore = asyncio.Semaphore(concurrency)
+        self._tasks: Set[asyncio.Task] = set()
+        self._draining = False
+        self._drained = asyncio.Event()
+        self.ready = False
+        self.started_at = time.time()
+        self.served = 0
+        self.failed = 0
+
+    def warm_up(self):
+        """Compile the graph and build the LLM client before accepting work"""
+        langgraph_agent.warm_up_agent()
+        self.ready = True
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            "status": "draining" if self._draining else "ok",
+            "ready": self.ready and not self._draining,
+            "pid": os.getpid(),
+            "protocol": PROTOCOL_VERSION,
+            "inflight": len(self._tasks),
+            "concurrency": self.concurrency,
+            "served": self.served,
+            "failed": self.failed,
+            "uptime": round(time.time() - self.started_at, 3),
+        }
+
+    def submit(self, line: bytes, send: Callable[[Dict[str, Any]], None]):
+        """Parse one request line and dispatch it"""
+        try:
+            request = json.loads(line)
+            if not isinstance(request, dict):
+                raise ValueError("request must be a JSON object")
+        except ValueError as e:
+            send({"id": None, "type": "error", "error": f"Invalid request: {e}"})
+            return
+
+        request_id = request.get("id")
+        kind = request.get("type", "chat")
+        if kind == "health":
+            send({"id": request_id, "type": "health", **self.status()})
+        elif kind == "metrics":
+            registry = get_metrics_registry()
+            if request.get("format") == "prometheus":
+                metrics = registry.render_prometheus()
+            else:
+                metrics = registry.snapshot()
+            send({"id": request_id, "type": "metrics", "enabled": metrics_enabled(), "metrics": metrics})
+        elif kind == "shutdown":
+            send({"id": request_id, "type": "shutdown", "inflight": len(self._tasks)})
+            self.drain()
+        elif kind == "chat":
+            if self._draining:
+                send({"id": request_id, "type": "error", "error": "Worker is draining"})
+                return
+            task = asyncio.get_running_loop().create_task(self._chat(request, send))
+            self._tasks.add(task)
+            task.add_done_callback(self._task_done)
+        else:
+            send({"id": request_id, "type": "error", "error": f"Unknown request type: {kind}"})
+
+    def _task_done(self, task: asyncio.Task):
+        self._tasks.discard(task)
+        if self._draining and not self._tasks:
+            self._drained.set()
+
+    async def _chat(self, request: Dict[str, Any], send: Callable[[Dict[str, Any]], None]):
+        request_id = request.get("id")
+        message = request.get("message")
+        if not isinstance(message, str) or not message:
+            self.failed += 1
+            send({"id": request_id, "type": "error", "error": "Message is required"})
+            return
+        current_page = request.get("current_page") or "/"
+        user_role = request.get("user_role") or "operator"
+
+        async with self._semaphore:
+            try:
+                budget = request.get("latency_budget_ms")
+                if request.get("stream"):
+                    async for event in langgraph_agent.stream_agent(message, current_page, user_role,
+                                                                    latency_budget_ms=budget):
+                        send({"id": request_id, "type": "event", "event": event})
+                else:
+                    result = await langgraph_agent.run_agent(message, current_page, user_role,
+                                                             trace=bool(request.get("trace")),
+                                                             latency_budget_ms=budget)
+                    send({"id": request_id, "type": "result", "result": result})
+                self.served += 1
+            except Exception as e:
+                self.failed += 1
+                logger.error(f"Worker request {request_id} failed: {e}")
+                send({"id": request_id, "type": "error", "error": str(e)})
+
+    def drain(self):
+        """Stop accepting chat requests; wait_drained() returns once in-flight ones finish"""
+        self._draining = True
+        if not self._tasks:
+            self._drained.set()
+
+    async def wait_drained(self):
+        await self._drained.wait()
+
+
+def _encode(message: Dict[str, Any]) -> bytes:
+    return (json.dumps(message, default=str) + "\n").encode("utf-8")
+
+
+async def _request_lines(reader: asyncio.StreamReader, send) -> AsyncIterator[bytes]:
+    """Lines read from a client; a line over MAX_LINE_BYTES gets an error reply and is skipped"""
+    overlong = False
+    while True:
+        try:
+            line = await reader.readuntil(b"\n")
+        except asyncio.IncompleteReadError as e:
+            # End of input, possibly after a last line without a newline
+            if e.partial and not overlong:
+                yield e.partial
+            return
+        except asyncio.LimitOverrunError as e:
+            if not overlong:
+                overlong = True
+                send({"id": None, "type": "error", "error": f"Request line exceeds {MAX_LINE_BYTES} bytes"})
+            # Nothing was consumed; drop what is buffered and keep skipping to the newline
+            await reader.read(e.consumed)
+            continue
+        if overlong:
+            # The rest of the skipped line
+            overlong = False
+            continue
+        yield line
+
+
+async def serve_stdio(worker: AgentWorker):
+    """Serve requests read from stdin, answering on stdout"""
+    loop = asyncio.get_running_loop()
+    # Keep the protocol channel clean: anything else printed goes to stderr
+    out = sys.stdout.buffer
+    sys.stdout = sys.stderr
+
+    def send(message: Dict[str, Any]):
+        out.write(_encode(message))
+        out.flush()
+
+    reader = asyncio.StreamReader(limit=MAX_LINE_BYTES)
+    await loop.connect_read_pipe(lambda: asyncio.StreamReaderProtocol(reader), sys.stdin)
+
+    await loop.run_in_executor(None, worker.warm_up)
+    send({"type": "ready", **worker.status()})
+
+    async def read_requests():
+        async for line in _request_lines(reader, send):
+            if line.strip():
+                worker.submit(line, send)
+
+    reading = loop.create_task(read_requests())
+    drained = loop.create_task(worker.wait_drained())
+    await asyncio.wait({reading, drained}, return_when=asyncio.FIRST_COMPLETED)
+    # End of input or shutdown: finish what is in flight, then exit
+    worker.drain()
+    await worker.wait_drained()
+    reading.cancel()
+    send({"type": "drained", **worker.status()})
+
+
+async def serve_socket(worker: AgentWorker, path: Optional[str] = None, port: Optional[int] = None):
+    """Serve requests over a Unix domain socket (path) or localhost TCP (port)"""
+    loop = asyncio.get_running_loop()
+    writers = set()
+
+    async def handle(reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        writers.add(writer)
+
+        def send(message: Dict[str, Any]):
+            if not writer.is_closing():
+                writer.write(_encode(message))
+
+        send({"type": "ready", **worker.status()})
+        try:
+            async for line in _request_lines(reader, send):
+                if line.strip():
+                    worker.submit(line, send)
+        finally:
+            writers.discard(writer)
+
+    await loop.run_in_executor(None, worker.warm_up)
+    if path:
+        if os.path.exists(path):
+            os.unlink(path)
+        server = await asyncio.start_unix_server(handle, path=path, limit=MAX_LINE_BYTES)
+        logger.info(f"Agent worker listening on {path}")
+    else:
+        server = await asyncio.start_server(handle, host="127.0.0.1", port=port, limit=MAX_LINE_BYTES)
+        logger.info(f"Agent worker listening on 127.0.0.1:{port}")
+
+    async with server:
+        await worker.wait_drained()
+        server.close()
+        for writer in list(writers):
+            writer.write(_encode({"type": "drained", **worker.status()}))
+            writer.close()
+    if path and os.path.exists(path):
+        os.unlink(path)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run the SC Micro agent as a resident worker")
+    parser.add_argument("--socket", help="Serve on this Unix domain socket instead of stdin/stdout")
+    parser.add_argument("--port", type=int, help="Serve on this localhost TCP port instead of stdin/stdout")
+    parser.add_argument("--concurrency", type=int, help="Maximum requests processed at once")
+    args = parser.parse_args(argv)
+
+    async def run():
+        worker = AgentWorker(args.concurrency)
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGTERM, signal.SIGINT):
+            try:
+                loop.add_signal_handler(sig, worker.drain)
+            except (NotImplementedError, RuntimeError):
+                pass
+        try:
+            if args.socket or args.port:
+                await serve_socket(worker, path=args.socket, port=args.port)
+            else:
+                await serve_stdio(worker)
+        finally:
+            await langgraph_agent.shutdown_agent()
+
+    asyncio.run(run())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+"""
+SC Micro Backend HTTP Client
+Shared, connection-pooled access to the Node.js database API for the agent tools.
+"""
+
+import os
+import asyncio
+import functools
+import logging
+import threading
+import weakref
+from typing import Any, Dict, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+
+try:
+    import httpx
+except ImportError:  # async calls fall back to the pooled requests session
+    httpx = None
+
+try:
+    import h2  # noqa: F401  (enables HTTP/2 in httpx)
+    HTTP2_AVAILABLE = httpx is not None
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+from agent_env import env_float, env_int
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BASE_URL = "http://localhost:3001/api/database"
+
+
+class BackendClient:
+    """Keep-alive HTTP client for the SC Micro database API.
+
+    Synchronous calls go through one requests.Session with a bounded
+    connection pool. Async calls use an httpx.AsyncClient per event loop
+    (HTTP/2 when the h2 package is installed), or the same session on the
+    default executor when httpx is missing. Both return response objects
+    exposing status_code and json().
+
+    Configuration comes from the environment:
+        AGENT_API_BASE_URL   base URL of the database API
+        AGENT_API_TIMEOUT    per-request timeout in seconds (default 5)
+        AGENT_API_POOL_SIZE  max pooled connections per host (default 10)
+        AGENT_API_KEEPALIVE  idle keep-alive expiry in seconds for the async
+                             (httpx) clients (default 30); the requests
+                             session keeps idle connections until the
+                             server closes them
+
+    close() closes the session and every async client; call aclose() from
+    a loop that is about to stop, so its client is closed on it.
+    """
+
+    def __init__(self, base_url: Optional[str] = None, timeout: Optional[float] = None,
+                 pool_size: Optional[int] = None, keepalive: Optional[float] = None):
+        self.base_url = (base_url or os.getenv("AGENT_API_BASE_URL", DEFAULT_BASE_URL)).rstrip("/")
+        self.timeout = timeout if timeout is not None else env_float("AGENT_API_TIMEOUT", 5.0)
+        self.pool_size = pool_size if pool_size is not None else env_int("AGENT_API_POOL_SIZE", 10)
+        self.keepalive = keepalive if keepalive is not None else env_float("AGENT_API_KEEPALIVE", 30.0)
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=self.pool_size, pool_maxsize=self.pool_size, pool_block=True)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+        # httpx clients are bound to the loop they were created on
+        self._async_clients = weakref.WeakKeyDictionary()
+        self._lock = threading.Lock()
+
+    def url(self, path: str) -> str:
+        return f"{self.base_url}/{path.lstrip('/')}"
+
+    # Synchronous API
+    def request(self, method: str, path: str, **kwargs):
+        kwargs.setdefault("timeout", self.timeout)
+        return self.session.request(method, self.url(path), **kwargs)
+
+    def get(self, path: str, **kwargs):
+        return self.request("GET", path, **kwargs)
+
+    def post(self, path: str, json: Any = None, **kwargs):
+        return self.request("POST", path, json=json, **kwargs)
+
+    def put(self, path: str, json: Any = None, **kwargs):
+        return self.request("PUT", path, json=json, **kwargs)
+
+    # Asynchronous API
+    def _async_client(self):
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            client = self._async_clients.get(loop)
+            if client is None:
+                client = httpx.AsyncClient(
+                    base_url=self.base_url + "/",
+                    timeout=self.timeout,
+                    http2=HTTP2_AVAILABLE,
+                    limits=httpx.Limits(
+                        max_connections=self.pool_size,
+                        max_keepalive_connections=self.pool_size,
+                        keepalive_expiry=self.keepalive,
+                    ),
+                )
+                self._async_clients[loop] = client
+            return client
+
+    async def arequest(self, method: str, path: str, **kwargs):
+        if httpx is None:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(None, functools.partial(self.request, method, path, **kwargs))
+        return await self._async_client().request(method, path.lstrip("/"), **kwargs)
+
+    async def aget(self, path: str, **kwargs):
+        return await self.arequest("GET", path, **kwargs)
+
+    async def apost(self, path: str, json: Any = None, **kwargs):
+        return await self.arequest("POST", path, json=json, **kwargs)
+
+    async def aput(self, path: str, json: Any = None, **kwargs):
+        return await self.arequest("PUT", path, json=json, **kwargs)
+
+    async def aclose(self):
+        """Close the async client bound to the running loop, if any"""
+        with self._lock:
+            client = self._async_clients.pop(asyncio.get_running_loop(), None)
+        if client is not None:
+            await client.aclose()
+
+    def close(self):
+        """Close the session and the async clients of every loop"""
+        with self._lock:
+            clients = list(self._async_clients.items())
+            self._async_clients.clear()
+        for loop, client in clients:
+            if loop.is_closed():
+                # Nothing can run on it any more; its sockets go with the client
+                continue
+            if loop.is_running():
+                asyncio.run_coroutine_threadsafe(client.aclose(), loop)
+            else:
+                loop.run_until_complete(client.aclose())
+        self.session.close()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "base_url": self.base_url,
+            "timeout": self.timeout,
+            "pool_size": self.pool_size,
+            "http2": HTTP2_AVAILABLE,
+            "async_clients": len(self._async_clients),
+        }
+
+
+_client: Optional[BackendClient] = None
+_client_lock = threading.Lock()
+
+
+def get_backend_client() -> BackendClient:
+    """Return the process-wide backend client"""
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = BackendClient()
+    return _client
+
+
+def reset_backend_client():
+    """Close and drop the shared client; the next call re-reads the environment"""
+    global _client
+    with _client_lock:
+        if _client is not None:
+            _client.close()
+        _client = None
@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+"""
+SC Micro Context Projection
+Selects, trims and compactly serializes agent context so LLM prompts stay within a token budget.
+"""
+
+import json
+import math
+import logging
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from agent_env import env_int
+from customer_index import CustomerIndex, get_customer_index
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TOKEN_BUDGET = 3000
+
+# Columns sent to the model per table; intents may narrow them further
+TABLE_COLUMNS = {
+    "work_requests": ("id", "customer_id", "customer_name", "project_type", "status", "priority",
+                      "description", "created_date", "target_date", "budget"),
+    "customers": ("id", "name", "tier", "total_projects", "completion_rate", "total_value",
+                  "contact", "email", "phone"),
+    "projects": ("id", "name", "customer_id", "customer_name", "type", "status", "priority",
+                 "budget", "actual_cost", "start_date", "target_date", "completion_date"),
+}
+
+INTENT_COLUMNS = {
+    "dashboard_analysis": {
+        "work_requests": ("id", "customer_name", "project_type", "status", "priority", "target_date"),
+        "customers": ("id", "name", "tier", "total_value"),
+        "projects": ("id", "name", "customer_name", "type", "status", "budget", "actual_cost", "target_date"),
+    },
+}
+
+# Rows in these states are listed before the rest
+OPEN_STATUSES = frozenset({"pending", "in-progress", "active", "planning"})
+PRIORITY_RANK = {"high": 0, "medium": 1, "low": 2}
+
+# When a value was computed, not what it is; left out so unchanged data gives an identical prompt
+VOLATILE_KEYS = frozenset({"calculated_at"})
+
+# Long free-text fields are clipped to this many characters
+MAX_TEXT_CHARS = 160
+
+
+def estimate_tokens(text: str) -> int:
+    """Cheap local token estimate (~4 characters per token for English and JSON)"""
+    return max(1, math.ceil(len(text) / 4)) if text else 0
+
+
+def _compact(obj: Any) -> str:
+    return json.dumps(obj, separators=(",", ":"), ensure_ascii=False, default=str)
+
+
+def _clip(value: Any) -> Any:
+    if isinstance(value, str) and len(value) > MAX_TEXT_CHARS:
+        return value[:MAX_TEXT_CHARS - 1] + "…"
+    return value
+
+
+def _columns_for(table: str, intent: str, rows: Sequence[Dict[str, Any]]) -> List[str]:
+    wanted = INTENT_COLUMNS.get(intent, {}).get(table) or TABLE_COLUMNS.get(table)
+    present = set()
+    for row in rows[:50]:
+        present.update(row)
+    if wanted is None:
+        return sorted(present)
+    return [column for column in wanted if column in present]
+
+
+def _mentioned_customers(context: Dict[str, Any], message: str) -> List[Dict[str, Any]]:
+    customers = context.get("customers")
+    if isinstance(customers, list) and customers:
+        index = get_customer_index(customers)
+    else:
+        # No customer table in context: index the names the other tables carry
+        seen = {}
+        for table in ("work_requests", "projects"):
+            for row in context.get(table) or []:
+                if isinstance(row, dict) and row.get("customer_name"):
+                    seen.setdefault(row["customer_name"], {"id": row.get("customer_id"), "name": row["customer_name"]})
+        if not seen:
+            return []
+        index = CustomerIndex(list(seen.values()))
+    # Full-name mentions win; otherwise only an unambiguous token mention counts
+    matches = index.scan(message)
+    named = [match.customer for match in matches if match.kind == "name"]
+    if named:
+        return named
+    customer = index.find_in_message(message)
+    return [customer] if customer is not None else []
+
+
+def _rank_rows(table: str, rows: Sequence[Dict[str, Any]], mentioned_ids: set, mentioned_names: set) -> List[Dict[str, Any]]:
+    def key(item: Tuple[int, Dict[str, Any]]):
+        position, row = item
+        if table == "customers":
+            mentioned = row.get("id") in mentioned_ids or row.get("name") in mentioned_names
+        else:
+            mentioned = row.get("customer_id") in mentioned_ids or row.get("customer_name") in mentioned_names
+        open_row = str(row.get("status", "")).lower() in OPEN_STATUSES
+        priority = PRIORITY_RANK.get(str(row.get("priority", "")).lower(), 3)
+        # Backend order (newest first) breaks ties
+        return (not mentioned, not open_row, priority, position)
+
+    return [row for _, row in sorted(enumerate(rows), key=key)]
+
+
+def project_context(context: Dict[str, Any], intent: str, message: str,
+                    token_budget: Optional[int] = None) -> Tuple[str, Dict[str, Any]]:
+    """Build the prompt context string for an intent within a token budget.
+
+    Tables are serialized column-wise ({"columns": [...], "rows": [[...]]})
+    with only the relevant columns. Rows about customers mentioned in the
+    message come first, then open and high-priority rows. Rows are added
+    round-robin across tables until the budget is spent; non-tabular
+    entries (such as metrics) are always included, minus VOLATILE_KEYS. Returns the serialized
+    context and stats on what was sent.
+    """
+    if token_budget is None:
+        token_budget = env_int("AGENT_CONTEXT_TOKEN_BUDGET", DEFAULT_TOKEN_BUDGET)
+
+    mentioned = _mentioned_customers(context, message)
+    mentioned_ids = {c.get("id") for c in mentioned if c.get("id") is not None}
+    mentioned_names = {c.get("name") for c in mentioned if c.get("name")}
+
+    payload: Dict[str, Any] = {}
+    tables: Dict[str, Dict[str, Any]] = {}
+    pending: Dict[str, Iterator[Dict[str, Any]]] = {}
+    for key, value in context.items():
+        if isinstance(value, list) and value and all(isinstance(row, dict) for row in value):
+            tables[key] = {"columns": _columns_for(key, intent, value), "rows": [], "total_rows": len(value)}
+            pending[key] = iter(_rank_rows(key, value, mentioned_ids, mentioned_names))
+        elif isinstance(value, dict):
+            payload[key] = {name: item for name, item in value.items() if name not in VOLATILE_KEYS}
+        else:
+            payload[key] = value
+
+    used = estimate_tokens(_compact({**payload, **tables}))
+    while pending:
+        for key in list(pending):
+            row = next(pending[key], None)
+            if row is None:
+                del pending[key]
+                continue
+            projected = [_clip(row.get(column)) for column in tables[key]["columns"]]
+            cost = estimate_tokens(_compact(projected)) + 1
+            if used + cost > token_budget:
+                del pending[key]
+                continue
+            tables[key]["rows"].append(projected)
+            used += cost
+
+    payload.update(tables)
+    serialized = _compact(payload)
+    stats = {
+        "tokens": estimate_tokens(serialized),
+        "token_budget": token_budget,
+        "rows_sent": {key: len(table["rows"]) for key, table in tables.items()},
+        "rows_total": {key: table["total_rows"] for key, table in tables.items()},
+        "mentioned_customers": sorted(mentioned_names),
+    }
+    return serialized, stats
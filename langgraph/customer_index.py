@@ -0,0 +1,198 @@
+#!/usr/bin/env python3
+"""
+SC Micro Customer Index
+Exact, case-folded, token and prefix lookup of customers plus one-pass message scanning.
+"""
+
+import bisect
+import re
+import threading
+from collections import deque
+from typing import Any, Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+# Tokens too generic to identify a customer on their own
+GENERIC_NAME_TOKENS = frozenset({
+    "the", "and", "inc", "llc", "ltd", "corp", "co", "company", "group", "plc", "gmbh",
+})
+
+_TOKEN = re.compile(r"\w+")
+
+
+def _fold(text: str) -> str:
+    return " ".join(_TOKEN.findall(text.casefold()))
+
+
+class CustomerMatch(NamedTuple):
+    customer: Dict[str, Any]
+    kind: str  # "name" or "token"
+    score: float
+
+
+class AhoCorasick:
+    """Multi-pattern matcher that reports every whole-word pattern occurrence in one pass"""
+
+    def __init__(self, patterns: Sequence[str]):
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._out: List[List[int]] = [[]]
+        self.patterns = list(patterns)
+        for index, pattern in enumerate(self.patterns):
+            node = 0
+            for char in pattern:
+                nxt = self._goto[node].get(char)
+                if nxt is None:
+                    nxt = len(self._goto)
+                    self._goto[node][char] = nxt
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._out.append([])
+                node = nxt
+            self._out[node].append(index)
+
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for char, nxt in self._goto[node].items():
+                queue.append(nxt)
+                fail = self._fail[node]
+                while fail and char not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[nxt] = self._goto[fail].get(char, 0)
+                self._out[nxt].extend(self._out[self._fail[nxt]])
+
+    def scan(self, text: str) -> List[Tuple[int, int]]:
+        """Return (pattern index, end offset) for whole-word matches in text"""
+        matches = []
+        goto, fail, out = self._goto, self._fail, self._out
+        node = 0
+        length = len(text)
+        for position, char in enumerate(text):
+            while node and char not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(char, 0)
+            if not out[node]:
+                continue
+            end = position + 1
+            if end < length and text[end].isalnum():
+                continue
+            for index in out[node]:
+                start = end - len(self.patterns[index])
+                if start == 0 or not text[start - 1].isalnum():
+                    matches.append((index, end))
+        return matches
+
+
+class CustomerIndex:
+    """Lookup structures over one snapshot of the customer table"""
+
+    def __init__(self, customers: Sequence[Dict[str, Any]]):
+        self.customers = customers
+        self._by_name: Dict[str, Dict[str, Any]] = {}
+        self._by_id: Dict[str, Dict[str, Any]] = {}
+        self._by_token: Dict[str, List[Dict[str, Any]]] = {}
+        for customer in customers:
+            name = _fold(customer.get("name") or "")
+            if not name:
+                continue
+            self._by_name.setdefault(name, customer)
+            if customer.get("id") is not None:
+                self._by_id[str(customer["id"])] = customer
+            for token in set(name.split()):
+                if len(token) > 2 and token not in GENERIC_NAME_TOKENS:
+                    self._by_token.setdefault(token, []).append(customer)
+
+        self._sorted_names = sorted(self._by_name)
+        # Full names and identifying tokens share one automaton
+        self._pattern_kinds: List[Tuple[str, str]] = [(name, "name") for name in self._by_name]
+        self._pattern_kinds += [(token, "token") for token in self._by_token if token not in self._by_name]
+        self._matcher = AhoCorasick([pattern for pattern, _ in self._pattern_kinds])
+
+    def __len__(self) -> int:
+        return len(self._by_name)
+
+    def get_by_id(self, customer_id: Any) -> Optional[Dict[str, Any]]:
+        return self._by_id.get(str(customer_id))
+
+    def prefix(self, text: str, limit: int = 10) -> List[Dict[str, Any]]:
+        """Customers whose case-folded name starts with text"""
+        key = _fold(text)
+        if not key:
+            return []
+        results = []
+        start = bisect.bisect_left(self._sorted_names, key)
+        for name in self._sorted_names[start:start + limit]:
+            if not name.startswith(key):
+                break
+            results.append(self._by_name[name])
+        return results
+
+    def lookup(self, name: str) -> Optional[Dict[str, Any]]:
+        """Resolve a customer name: exact, then unique prefix, then unique token"""
+        key = _fold(name)
+        if not key:
+            return None
+        customer = self._by_name.get(key)
+        if customer is not None:
+            return customer
+        candidates = self.prefix(key, limit=2)
+        if len(candidates) == 1:
+            return candidates[0]
+        matches = self.scan(key)
+        if len(matches) == 1 or (matches and matches[0].score > matches[1].score):
+            return matches[0].customer
+        return None
+
+    def resolve_id(self, name: str) -> Optional[Any]:
+        customer = self.lookup(name)
+        return customer.get("id") if customer else None
+
+    def scan(self, message: str) -> List[CustomerMatch]:
+        """All customers mentioned in a message, best match first.
+
+        A full-name mention scores above any token mention; token mentions
+        are weighted by how few customers share the token.
+        """
+        scores: Dict[int, List[Any]] = {}
+        for index, _ in self._matcher.scan(_fold(message)):
+            pattern, kind = self._pattern_kinds[index]
+            if kind == "name":
+                hits = [(self._by_name[pattern], 10.0 + len(pattern))]
+            else:
+                owners = self._by_token[pattern]
+                hits = [(customer, 1.0 / len(owners)) for customer in owners]
+            for customer, score in hits:
+                entry = scores.setdefault(id(customer), [customer, "token", 0.0])
+                if kind == "name":
+                    entry[1] = "name"
+                entry[2] += score
+        ranked = sorted(scores.values(), key=lambda entry: -entry[2])
+        return [CustomerMatch(customer, kind, score) for customer, kind, score in ranked]
+
+    def find_in_message(self, message: str) -> Optional[Dict[str, Any]]:
+        """The single customer a message refers to, or None when nothing (or a tie) matches"""
+        matches = self.scan(message)
+        if not matches:
+            return None
+        if len(matches) > 1 and matches[1].score == matches[0].score:
+            return None
+        return matches[0].customer
+
+
+_index: Optional[CustomerIndex] = None
+_index_lock = threading.Lock()
+
+
+def get_customer_index(customers: Sequence[Dict[str, Any]]) -> CustomerIndex:
+    """Index for a customer list, rebuilt only when the list object changes.
+
+    The entity cache hands out the same list until it refreshes, so this
+    rebuilds exactly once per cache refresh.
+    """
+    global _index
+    index = _index
+    if index is not None and index.customers is customers:
+        return index
+    with _index_lock:
+        if _index is None or _index.customers is not customers:
+            _index = CustomerIndex(customers)
+        return _index
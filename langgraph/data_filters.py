@@ -0,0 +1,305 @@
+#!/usr/bin/env python3
+"""
+SC Micro Data Filters
+Filter, sort and cursor parameters for the list endpoints, a local equivalent of the backend query, and
+filters derived from a chat message.
+"""
+
+import re
+import json
+import base64
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from customer_index import get_customer_index
+
+# Response header carrying the cursor of the next page ("" on the last page).
+# Its presence tells the client the backend applied limit/cursor itself.
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 1000
+
+WORK_REQUEST_STATUSES = ("pending", "quoted", "po-received", "in-progress", "on-hold", "shipped", "payment",
+                         "completed", "cancelled")
+PROJECT_STATUSES = ("planning", "active", "on-hold", "completed", "cancelled")
+PRIORITIES = ("high", "medium", "low")
+TIERS = ("Premium", "Gold", "Silver", "Bronze")
+PRIORITY_RANK = {"high": 0, "medium": 1, "low": 2}
+
+# Query parameters accepted by each list endpoint; mirrored by LIST_QUERIES in database/db.js
+LIST_QUERIES: Dict[str, Dict[str, Any]] = {
+    "work_requests": {
+        "path": "work-requests",
+        "filters": ("status", "priority", "customer_id"),
+        "customer_column": "customer_name",
+        "date_column": "created_date",
+        "sorts": ("created_date", "target_date", "priority", "budget", "status", "customer_name", "id"),
+        "statuses": WORK_REQUEST_STATUSES,
+        "open_statuses": ("pending", "quoted", "po-received", "in-progress", "on-hold"),
+        "default_sort": "-created_date",
+    },
+    "customers": {
+        "path": "customers",
+        "filters": ("tier",),
+        "customer_column": "name",
+        "date_column": None,
+        "sorts": ("name", "tier", "total_value", "total_projects", "completion_rate", "id"),
+        "statuses": (),
+        "open_statuses": (),
+        "default_sort": "name",
+    },
+    "projects": {
+        "path": "projects",
+        "filters": ("status", "priority", "customer_id", "type"),
+        "customer_column": "customer_name",
+        "date_column": "start_date",
+        "sorts": ("start_date", "target_date", "priority", "budget", "status", "name", "customer_name", "id"),
+        "statuses": PROJECT_STATUSES,
+        "open_statuses": ("planning", "active", "on-hold"),
+        "default_sort": "-start_date",
+    },
+}
+
+
+def encode_cursor(offset: int) -> str:
+    raw = json.dumps({"offset": offset}, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> int:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        offset = int(json.loads(raw)["offset"])
+    except (ValueError, KeyError, TypeError) as e:
+        raise ValueError(f"Invalid cursor: {cursor!r}") from e
+    if offset < 0:
+        raise ValueError(f"Invalid cursor: {cursor!r}")
+    return offset
+
+
+def _values(value: Any) -> List[str]:
+    items = value if isinstance(value, (list, tuple, set)) else str(value).split(",")
+    return [str(item).strip() for item in items if str(item).strip()]
+
+
+def _slug(value: str) -> str:
+    return re.sub(r"[\s_]+", "-", value.strip().lower())
+
+
+def build_query(table: str, **filters: Any) -> Dict[str, str]:
+    """Validate and normalize list query parameters for a table.
+
+    Accepts the table's filters plus customer, date_from/date_to
+    (YYYY-MM-DD), updated_since (rows whose updated_at is at or after this
+    "YYYY-MM-DD HH:MM:SS" timestamp), sort (column, "-" prefix for
+    descending), limit and cursor. None values are dropped; multi-valued filters may be lists or
+    comma-separated strings. Raises ValueError on anything the backend
+    would reject.
+    """
+    spec = LIST_QUERIES[table]
+    params: Dict[str, str] = {}
+    for name, value in filters.items():
+        if value is None or value == "" or value == []:
+            continue
+        if name in ("status", "priority", "type"):
+            if name not in spec["filters"]:
+                raise ValueError(f"{table} cannot be filtered by {name}")
+            params[name] = ",".join(_slug(item) for item in _values(value))
+        elif name == "tier":
+            if name not in spec["filters"]:
+                raise ValueError(f"{table} cannot be filtered by {name}")
+            params[name] = ",".join(item.capitalize() for item in _values(value))
+        elif name == "customer_id":
+            if name not in spec["filters"]:
+                raise ValueError(f"{table} cannot be filtered by {name}")
+            params[name] = ",".join(str(int(item)) for item in _values(value))
+        elif name == "customer":
+            params[name] = str(value).strip()
+        elif name in ("date_from", "date_to"):
+            if not spec["date_column"]:
+                raise ValueError(f"{table} has no date to filter by")
+            params[name] = date.fromisoformat(str(value)[:10]).isoformat()
+        elif name == "updated_since":
+            # SQLite's CURRENT_TIMESTAMP format, so string comparison orders correctly
+            params[name] = datetime.fromisoformat(str(value)).isoformat(sep=" ", timespec="seconds")
+        elif name == "sort":
+            if str(value).lstrip("-") not in spec["sorts"]:
+                raise ValueError(f"{table} cannot be sorted by {value}")
+            params[name] = str(value)
+        elif name == "limit":
+            params[name] = str(max(1, min(int(value), MAX_PAGE_SIZE)))
+        elif name == "cursor":
+            decode_cursor(str(value))
+            params[name] = str(value)
+        else:
+            raise ValueError(f"Unknown filter for {table}: {name}")
+    return params
+
+
+def sort_key(column: str):
+    """Row sort key for a column, matching the backend's ORDER BY column, id"""
+    def key(row: Dict[str, Any]):
+        value = row.get(column)
+        if column == "priority" and value is not None:
+            value = PRIORITY_RANK.get(str(value).lower(), len(PRIORITY_RANK))
+        # NULLs first ascending, as SQLite orders them
+        return (value is not None, value if value is not None else 0, row.get("id") or 0)
+    return key
+
+
+def apply_query(table: str, rows: Sequence[Dict[str, Any]], params: Dict[str, str],
+                paged: bool = False) -> Tuple[Sequence[Dict[str, Any]], Optional[str]]:
+    """Apply list query parameters to rows locally, as the backend does.
+
+    Used when the backend ignores the parameters (older deployments or a
+    plain table dump) and to filter a shared table per message. Filtering
+    and sorting are idempotent, so rows the backend already filtered pass
+    through unchanged. paged=True means the backend already applied
+    limit/cursor. Returns (rows, next_cursor); with no params the input
+    list itself is returned.
+    """
+    if not params:
+        return rows, None
+    spec = LIST_QUERIES[table]
+    selected: Iterable[Dict[str, Any]] = rows
+    for name in spec["filters"]:
+        if name in params:
+            wanted = {value.casefold() for value in params[name].split(",")}
+            selected = [row for row in selected if str(row.get(name, "")).casefold() in wanted]
+    if "customer" in params:
+        customer = params["customer"].casefold()
+        column = spec["customer_column"]
+        selected = [row for row in selected if str(row.get(column) or "").casefold() == customer]
+    if spec["date_column"] and ("date_from" in params or "date_to" in params):
+        column = spec["date_column"]
+        low, high = params.get("date_from"), params.get("date_to")
+        selected = [row for row in selected if row.get(column)
+                    and (low is None or str(row[column])[:10] >= low)
+                    and (high is None or str(row[column])[:10] <= high)]
+    if "updated_since" in params:
+        since = params["updated_since"]
+        selected = [row for row in selected if row.get("updated_at") and str(row["updated_at"]) >= since]
+    selected = list(selected)
+    if "sort" in params:
+        column = params["sort"].lstrip("-")
+        selected.sort(key=sort_key(column), reverse=params["sort"].startswith("-"))
+
+    if paged or ("limit" not in params and "cursor" not in params):
+        return selected, None
+    offset = decode_cursor(params["cursor"]) if "cursor" in params else 0
+    limit = int(params.get("limit", DEFAULT_PAGE_SIZE))
+    page = selected[offset:offset + limit]
+    next_cursor = encode_cursor(offset + limit) if offset + limit < len(selected) else None
+    return page, next_cursor
+
+
+# Message phrases that map to filter values
+_STATUS_PHRASES = (
+    (r"in[\s-]?progress", "in-progress"),
+    (r"on[\s-]?hold", "on-hold"),
+    (r"po[\s-]?received", "po-received"),
+    (r"pending", "pending"),
+    (r"quoted", "quoted"),
+    (r"shipped", "shipped"),
+    (r"completed|finished", "completed"),
+    (r"cancell?ed", "cancelled"),
+    (r"planning|planned", "planning"),
+    (r"active", "active"),
+)
+_STATUS_PATTERN = re.compile(r"\b(?:" + "|".join(f"(?P<s{index}>{pattern})"
+                                                 for index, (pattern, _) in enumerate(_STATUS_PHRASES)) + r")\b")
+_OPEN_PATTERN = re.compile(r"\b(?:open|outstanding|unfinished)\b")
+_PRIORITY_PATTERN = re.compile(r"\b(?:(high|medium|low)[\s-]*priority|priority\s*(?:of\s*|is\s*|=\s*)?(high|medium|low))\b")
+_URGENT_PATTERN = re.compile(r"\burgent\b")
+_TIER_PATTERN = re.compile(r"\b(premium|gold|silver|bronze)\b")
+_SINCE_PATTERN = re.compile(r"\b(?:since|after|from)\s+(\d{4}-\d{2}-\d{2})\b")
+_UNTIL_PATTERN = re.compile(r"\b(?:before|until|to|through)\s+(\d{4}-\d{2}-\d{2})\b")
+_LAST_DAYS_PATTERN = re.compile(r"\b(?:last|past)\s+(\d{1,3})\s+days?\b")
+
+
+def _date_range(message: str, today: date) -> Dict[str, str]:
+    bounds: Dict[str, str] = {}
+    if "this week" in message:
+        bounds["date_from"] = (today - timedelta(days=today.weekday())).isoformat()
+    elif "this month" in message:
+        bounds["date_from"] = today.replace(day=1).isoformat()
+    elif "last month" in message:
+        last_day = today.replace(day=1) - timedelta(days=1)
+        bounds["date_from"] = last_day.replace(day=1).isoformat()
+        bounds["date_to"] = last_day.isoformat()
+    elif "this year" in message:
+        bounds["date_from"] = today.replace(month=1, day=1).isoformat()
+    match = _LAST_DAYS_PATTERN.search(message)
+    if match:
+        bounds["date_from"] = (today - timedelta(days=int(match.group(1)))).isoformat()
+    match = _SINCE_PATTERN.search(message)
+    if match:
+        bounds["date_from"] = match.group(1)
+    match = _UNTIL_PATTERN.search(message)
+    if match:
+        bounds["date_to"] = match.group(1)
+    return bounds
+
+
+def filters_from_message(message: str, customers: Optional[Sequence[Dict[str, Any]]] = None,
+                         today: Optional[date] = None) -> Dict[str, Dict[str, str]]:
+    """Per-table list query parameters implied by a chat message.
+
+    "high-priority pending requests" filters work requests (and projects)
+    by priority and status, "Premium customers" filters customers by tier,
+    a named customer (when the customer table is at hand) filters work
+    requests and projects by customer_id, and phrases like "this month" or
+    "since 2024-01-01" bound their dates. Status words only apply to the
+    tables whose statuses they name. Tables without filters are omitted.
+    """
+    text = message.casefold()
+    today = today or date.today()
+
+    statuses = []
+    for match in _STATUS_PATTERN.finditer(text):
+        status = _STATUS_PHRASES[int(match.lastgroup[1:])][1]
+        if status not in statuses:
+            statuses.append(status)
+    wants_open = bool(_OPEN_PATTERN.search(text))
+
+    priorities = []
+    for match in _PRIORITY_PATTERN.finditer(text):
+        priority = match.group(1) or match.group(2)
+        if priority not in priorities:
+            priorities.append(priority)
+    if not priorities and _URGENT_PATTERN.search(text):
+        priorities.append("high")
+
+    tiers = []
+    for match in _TIER_PATTERN.finditer(text):
+        tier = match.group(1).capitalize()
+        if tier not in tiers:
+            tiers.append(tier)
+
+    customer_ids: List[str] = []
+    if customers:
+        customer_ids = [str(match.customer["id"]) for match in get_customer_index(customers).scan(message)
+                        if match.kind == "name" and match.customer.get("id") is not None]
+
+    dates = _date_range(text, today)
+
+    result: Dict[str, Dict[str, str]] = {}
+    for table, spec in LIST_QUERIES.items():
+        params: Dict[str, str] = {}
+        table_statuses = [status for status in statuses if status in spec["statuses"]]
+        if not table_statuses and wants_open:
+            table_statuses = list(spec["open_statuses"])
+        if table_statuses:
+            params["status"] = ",".join(table_statuses)
+        if priorities and "priority" in spec["filters"]:
+            params["priority"] = ",".join(priorities)
+        if tiers and "tier" in spec["filters"]:
+            params["tier"] = ",".join(tiers)
+        if customer_ids and "customer_id" in spec["filters"]:
+            params["customer_id"] = ",".join(customer_ids)
+        if dates and spec["date_column"]:
+            params.update(dates)
+        if params:
+            result[table] = params
+    return result
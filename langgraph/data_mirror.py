@@ -0,0 +1,264 @@
+#!/usr/bin/env python3
+"""
+SC Micro Data Mirror
+In-process copy of the customer, work request and project tables, kept current with updated_at deltas and tombstones.
+"""
+
+import os
+import time
+import bisect
+import logging
+import threading
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+from agent_env import env_float
+from data_filters import LIST_QUERIES, apply_query, sort_key
+from metrics_engine import DashboardMetrics
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_RECONCILE_SECONDS = 3600.0
+
+# Distinct filtered pages remembered per table between changes
+MAX_PAGES = 128
+
+# Tables synced together (as context gathering does) share one tombstone read
+TOMBSTONE_INTERVAL = 1.0
+
+
+class TableMirror:
+    """Rows of one table by id, plus the table in the API's default order.
+
+    The ordered copy is maintained with bisect, so applying a change costs
+    O(log n) comparisons and a pointer move rather than a re-sort. view()
+    hands out a new list per version, so readers never see it change.
+    on_change, when given, is called as on_change(table, removed, added,
+    full=...) for every change, under the mirror's lock.
+    """
+
+    def __init__(self, table: str, on_change: Optional[Callable[..., None]] = None):
+        self.table = table
+        self._on_change = on_change
+        sort = LIST_QUERIES[table]["default_sort"]
+        self._key = sort_key(sort.lstrip("-"))
+        self._descending = sort.startswith("-")
+        self._lock = threading.Lock()
+        self.rows: Dict[Any, Dict[str, Any]] = {}
+        self._keys: List[Any] = []
+        self._ordered: List[Dict[str, Any]] = []
+        self._view: Optional[List[Dict[str, Any]]] = None
+        self._pages: Dict[Any, Dict[str, Any]] = {}
+        self.high_water: Optional[str] = None
+        self.loaded_at: Optional[float] = None
+        self.version = 0
+        self.full_loads = 0
+        self.delta_loads = 0
+        self.rows_applied = 0
+
+    @property
+    def loaded(self) -> bool:
+        return self.loaded_at is not None
+
+    def delta_since(self, reconcile_seconds: float) -> Optional[str]:
+        """High-water mark for the next delta, or None when a full load is due"""
+        if self.loaded_at is None or self.high_water is None:
+            return None
+        if reconcile_seconds > 0 and time.monotonic() - self.loaded_at >= reconcile_seconds:
+            return None
+        return self.high_water
+
+    def _bump(self, row: Dict[str, Any]):
+        updated = row.get("updated_at")
+        if updated and (self.high_water is None or str(updated) > self.high_water):
+            self.high_water = str(updated)
+
+    def _changed(self):
+        self.version += 1
+        self._view = None
+        self._pages.clear()
+
+    def replace(self, rows: Iterable[Dict[str, Any]]):
+        """Full load: the mirror becomes exactly these rows"""
+        # Keys are unique (they end with the id), so rows themselves are never compared
+        keyed = sorted((self._key(row), row) for row in rows if row.get("id") is not None)
+        stamps = [str(row["updated_at"]) for _, row in keyed if row.get("updated_at")]
+        with self._lock:
+            if self._on_change is not None:
+                self._on_change(self.table, list(self.rows.values()), [row for _, row in keyed], full=True)
+            self.rows = {row["id"]: row for _, row in keyed}
+            self._keys = [key for key, _ in keyed]
+            self._ordered = [row for _, row in keyed]
+            self.high_water = max(stamps) if stamps else None
+            self.loaded_at = time.monotonic()
+            self.full_loads += 1
+            self._changed()
+
+    def _unlink(self, row: Dict[str, Any]):
+        position = bisect.bisect_left(self._keys, self._key(row))
+        del self._keys[position]
+        del self._ordered[position]
+
+    def upsert(self, rows: Iterable[Dict[str, Any]]) -> int:
+        """Apply changed rows from a delta; returns how many differed from the mirror"""
+        changed = 0
+        removed: List[Dict[str, Any]] = []
+        added: List[Dict[str, Any]] = []
+        with self._lock:
+            for row in rows:
+                row_id = row.get("id")
+                if row_id is None:
+                    continue
+                self._bump(row)
+                previous = self.rows.get(row_id)
+                if previous == row:
+                    continue
+                if previous is not None:
+                    self._unlink(previous)
+                    removed.append(previous)
+                added.append(row)
+                key = self._key(row)
+                position = bisect.bisect_left(self._keys, key)
+                self._keys.insert(position, key)
+                self._ordered.insert(position, row)
+                self.rows[row_id] = row
+                changed += 1
+            self.delta_loads += 1
+            self.rows_applied += changed
+            if changed:
+                if self._on_change is not None:
+                    self._on_change(self.table, removed, added)
+                self._changed()
+        return changed
+
+    def remove(self, ids: Iterable[Any]) -> int:
+        removed: List[Dict[str, Any]] = []
+        with self._lock:
+            for row_id in ids:
+                row = self.rows.pop(row_id, None)
+                if row is not None:
+                    self._unlink(row)
+                    removed.append(row)
+            if removed:
+                if self._on_change is not None:
+                    self._on_change(self.table, removed, ())
+                self._changed()
+        return len(removed)
+
+    def view(self) -> List[Dict[str, Any]]:
+        """Every row in the API's default order"""
+        with self._lock:
+            if self._view is None:
+                self._view = self._ordered[::-1] if self._descending else list(self._ordered)
+            return self._view
+
+    def page(self, params: Dict[str, str]) -> Dict[str, Any]:
+        """One page for build_query() params as {"items", "next_cursor"}"""
+        rows = self.view()
+        if not params:
+            return {"items": rows, "next_cursor": None}
+        key = (self.version, tuple(sorted(params.items())))
+        page = self._pages.get(key)
+        if page is None:
+            items, next_cursor = apply_query(self.table, rows, params)
+            page = {"items": items, "next_cursor": next_cursor}
+            with self._lock:
+                if len(self._pages) >= MAX_PAGES:
+                    self._pages.clear()
+                self._pages[key] = page
+        return page
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "rows": len(self.rows),
+            "high_water": self.high_water,
+            "version": self.version,
+            "full_loads": self.full_loads,
+            "delta_loads": self.delta_loads,
+            "rows_applied": self.rows_applied,
+        }
+
+
+class DataMirror:
+    """Mirrors of every list table, their dashboard KPIs and the shared tombstone cursor.
+
+    Deletes arrive as tombstones (the API's deleted_rows table, read past
+    tombstone_cursor). Against an API without them, and as a safety net for
+    changes that do not touch updated_at (such as a renamed customer
+    showing up in joined customer_name columns), each table is fully
+    reloaded every reconcile_seconds. The API prunes tombstones after
+    TOMBSTONE_RETENTION_HOURS, which must exceed reconcile_seconds.
+
+    Configuration comes from the environment:
+        AGENT_DATA_MIRROR                 0 turns the mirror off (pages are fetched per request)
+        AGENT_MIRROR_RECONCILE_SECONDS    full reload interval per table (default 3600, 0 disables)
+    """
+
+    def __init__(self, reconcile_seconds: Optional[float] = None):
+        self.reconcile_seconds = reconcile_seconds if reconcile_seconds is not None else env_float(
+            "AGENT_MIRROR_RECONCILE_SECONDS", DEFAULT_RECONCILE_SECONDS)
+        # Every change to a mirrored table also updates the KPIs (metrics_engine.py)
+        self.metrics = DashboardMetrics()
+        self.tables = {table: TableMirror(table, self.metrics.changed) for table in LIST_QUERIES}
+        self.tombstone_cursor = 0
+        self.tombstones_supported = True
+        self._tombstones_read: Optional[float] = None
+        self._lock = threading.Lock()
+
+    def table(self, table: str) -> TableMirror:
+        return self.tables[table]
+
+    def tombstones_due(self) -> bool:
+        """Whether a delta sync should read new tombstones now; marks them as read"""
+        if not self.tombstones_supported:
+            return False
+        now = time.monotonic()
+        with self._lock:
+            if self._tombstones_read is not None and now - self._tombstones_read < TOMBSTONE_INTERVAL:
+                return False
+            self._tombstones_read = now
+            return True
+
+    def apply_tombstones(self, entries: Iterable[Dict[str, Any]]) -> int:
+        """Drop deleted rows; entries are {"id", "table_name", "row_id"} past the cursor"""
+        doomed: Dict[str, List[Any]] = {}
+        with self._lock:
+            for entry in entries:
+                if entry.get("id") is None or entry["id"] <= self.tombstone_cursor:
+                    continue
+                self.tombstone_cursor = entry["id"]
+                if entry.get("table_name") in self.tables:
+                    doomed.setdefault(entry["table_name"], []).append(entry.get("row_id"))
+        return sum(self.tables[table].remove(ids) for table, ids in doomed.items())
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "tables": {table: mirror.stats() for table, mirror in self.tables.items()},
+            "tombstone_cursor": self.tombstone_cursor,
+            "tombstones_supported": self.tombstones_supported,
+            "reconcile_seconds": self.reconcile_seconds,
+        }
+
+
+_mirror: Optional[DataMirror] = None
+_mirror_lock = threading.Lock()
+
+
+def mirror_enabled() -> bool:
+    return os.getenv("AGENT_DATA_MIRROR", "1").lower() not in ("0", "false", "no", "off")
+
+
+def get_data_mirror() -> DataMirror:
+    """Return the process-wide data mirror"""
+    global _mirror
+    if _mirror is None:
+        with _mirror_lock:
+            if _mirror is None:
+                _mirror = DataMirror()
+    return _mirror
+
+
+def reset_data_mirror():
+    """Drop every mirrored row; the next read does a full load"""
+    global _mirror
+    with _mirror_lock:
+        _mirror = None
@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+"""
+SC Micro Local Intent Model
+Keyword-weighted intent classifier that runs in one regex pass and reports a confidence score.
+"""
+
+import re
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+# The nine intents understood by the agent, in tie-break order
+INTENTS = (
+    "customer_management",
+    "general_query",
+    "dashboard_analysis",
+    "work_request_management",
+    "project_tracking",
+    "data_import_export",
+    "reporting",
+    "navigation",
+    "error_troubleshooting",
+)
+
+DEFAULT_INTENT = "general_query"
+
+# (regex, intent, weight). Literal phrases get word boundaries; entries
+# starting with "re:" are used verbatim.
+INTENT_FEATURES: Tuple[Tuple[str, str, float], ...] = (
+    # customer_management
+    ("customers?", "customer_management", 2.0),
+    ("clients?", "customer_management", 1.5),
+    ("tiers?", "customer_management", 2.0),
+    ("relationships?", "customer_management", 2.0),
+    ("tell me about", "customer_management", 1.5),
+    ("about", "customer_management", 0.5),
+    ("techcorp", "customer_management", 1.5),
+    ("innovate", "customer_management", 1.5),
+    ("microtech", "customer_management", 1.5),
+    ("premium|gold|silver|bronze", "customer_management", 1.0),
+    # general_query
+    ("please give me a simple answer", "general_query", 3.0),
+    ("what is", "general_query", 0.75),
+    ("how much", "general_query", 0.75),
+    ("calculate", "general_query", 2.0),
+    ("math", "general_query", 2.0),
+    ("equals", "general_query", 1.5),
+    ("numbers?", "general_query", 1.0),
+    ("answer", "general_query", 1.0),
+    ("sum", "general_query", 1.0),
+    ("total", "general_query", 0.5),
+    (r"re:\d+\s*[-+*/x]\s*\d+", "general_query", 3.0),
+    (r"re:\?", "general_query", 0.25),
+    # dashboard_analysis
+    ("dashboard", "dashboard_analysis", 3.0),
+    ("overview", "dashboard_analysis", 2.0),
+    ("metrics?", "dashboard_analysis", 2.0),
+    ("kpis?", "dashboard_analysis", 2.0),
+    ("how are we doing", "dashboard_analysis", 2.0),
+    ("status", "dashboard_analysis", 1.5),
+    ("summary", "dashboard_analysis", 1.0),
+    # work_request_management
+    ("work requests?", "work_request_management", 3.0),
+    ("new request", "work_request_management", 2.5),
+    ("requests?", "work_request_management", 1.0),
+    ("create", "work_request_management", 1.5),
+    ("update", "work_request_management", 1.5),
+    ("pending", "work_request_management", 1.0),
+    ("priority", "work_request_management", 1.0),
+    # project_tracking
+    ("projects?", "project_tracking", 2.0),
+    ("timelines?", "project_tracking", 2.0),
+    ("optimi[sz]e|optimi[sz]ation", "project_tracking", 2.0),
+    ("milestones?", "project_tracking", 1.5),
+    ("schedule", "project_tracking", 1.0),
+    ("tracking", "project_tracking", 1.0),
+    # data_import_export
+    ("csv", "data_import_export", 3.0),
+    ("import(?:s|ed|ing)?", "data_import_export", 2.5),
+    ("export(?:s|ed|ing)?", "data_import_export", 2.5),
+    ("upload(?:s|ed|ing)?", "data_import_export", 2.0),
+    ("download", "data_import_export", 1.5),
+    # reporting
+    ("reports?", "reporting", 2.5),
+    ("analytics", "reporting", 2.5),
+    ("insights?", "reporting", 1.5),
+    ("trends?", "reporting", 1.5),
+    # navigation
+    ("navigate", "navigation", 3.0),
+    ("go to", "navigation", 2.5),
+    ("where (?:is|can i)", "navigation", 2.0),
+    ("page", "navigation", 1.5),
+    ("find", "navigation", 1.0),
+    # error_troubleshooting
+    ("errors?", "error_troubleshooting", 3.0),
+    ("not working", "error_troubleshooting", 2.5),
+    ("problems?", "error_troubleshooting", 2.5),
+    ("trouble", "error_troubleshooting", 2.5),
+    ("issues?", "error_troubleshooting", 2.0),
+    ("broken", "error_troubleshooting", 2.0),
+    ("fail(?:ed|ing|s)?", "error_troubleshooting", 2.0),
+    ("fix", "error_troubleshooting", 2.0),
+    ("help", "error_troubleshooting", 0.75),
+)
+
+
+class IntentPrediction(NamedTuple):
+    intent: str
+    confidence: float
+    scores: Dict[str, float]
+
+
+class KeywordIntentClassifier:
+    """Scores every intent in a single scan of the message.
+
+    All features are compiled into one alternation of named groups, so
+    classification is one regex pass plus a dictionary update per match.
+    Confidence combines the margin over the runner-up with the strength of
+    the winning score: ((top - second) / top) * (top / (top + saturation)).
+    """
+
+    def __init__(self, features: Iterable[Tuple[str, str, float]] = INTENT_FEATURES,
+                 intents: Iterable[str] = INTENTS, saturation: float = 0.5):
+        self.intents = tuple(intents)
+        self.saturation = saturation
+        self._weights: Dict[str, Tuple[str, float]] = {}
+        alternatives: List[Tuple[int, str]] = []
+        for index, (pattern, intent, weight) in enumerate(features):
+            group = f"f{index}"
+            self._weights[group] = (intent, weight)
+            if pattern.startswith("re:"):
+                body = pattern[3:]
+            else:
+                body = rf"\b(?:{pattern})\b"
+            alternatives.append((len(pattern), f"(?P<{group}>{body})"))
+        # Longer phrases first so "work request" wins over "request"
+        alternatives.sort(key=lambda item: -item[0])
+        self._pattern = re.compile("|".join(alt for _, alt in alternatives), re.IGNORECASE)
+        self._order = {intent: rank for rank, intent in enumerate(self.intents)}
+
+    def scores(self, message: str) -> Dict[str, float]:
+        scores: Dict[str, float] = {}
+        weights = self._weights
+        for match in self._pattern.finditer(message):
+            intent, weight = weights[match.lastgroup]
+            scores[intent] = scores.get(intent, 0.0) + weight
+        return scores
+
+    def predict(self, message: str) -> IntentPrediction:
+        scores = self.scores(message)
+        if not scores:
+            return IntentPrediction(DEFAULT_INTENT, 0.0, scores)
+        ranked = sorted(scores.items(), key=lambda item: (-item[1], self._order.get(item[0], len(self._order))))
+        intent, top = ranked[0]
+        second = ranked[1][1] if len(ranked) > 1 else 0.0
+        confidence = ((top - second) / top) * (top / (top + self.saturation))
+        return IntentPrediction(intent, round(confidence, 4), scores)
+
+
+_default_classifier: Optional[KeywordIntentClassifier] = None
+
+
+def get_intent_classifier() -> KeywordIntentClassifier:
+    """Return the shared classifier, compiling it on first use"""
+    global _default_classifier
+    if _default_classifier is None:
+        _default_classifier = KeywordIntentClassifier()
+    return _default_classifier
+
+
+def classify_intent(message: str) -> IntentPrediction:
+    """Classify a message with the shared local classifier"""
+    return get_intent_classifier().predict(message)
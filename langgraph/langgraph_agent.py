@@ -5,13 +5,16 @@ A comprehensive agent for enterprise work request management, customer relations
 """
 
 import os
+import sys
 import json
+import time
+import sqlite3
 import asyncio
-from typing import Dict, List, Any, TypedDict, Annotated
-from datetime import datetime, timedelta
+from typing import Dict, List, Any, AsyncIterator, NamedTuple, Optional, TypedDict, Annotated
+from datetime import datetime
 import logging
 import re
-import requests
+import threading
 
 # Load environment variables from .env file
 try:
@@ -22,15 +25,28 @@ except ImportError:
 
 # LangGraph and LangChain imports
 from langgraph.graph import StateGraph, END
-from langgraph.prebuilt import ToolNode
-from langchain_core.messages import HumanMessage, AIMessage, SystemMessage
-from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
-from langchain_openai import ChatOpenAI
-from langchain_anthropic import ChatAnthropic
+from langchain_core.messages import HumanMessage
+from langchain_core.prompts import ChatPromptTemplate
 from langchain_core.tools import tool
-from langchain_core.output_parsers import JsonOutputParser
-from pydantic import BaseModel, Field
-from langchain_core.prompts import SystemMessagePromptTemplate, HumanMessagePromptTemplate
+from langchain_core.runnables import RunnableLambda
+
+from agent_cache import context_fingerprint, get_entity_cache, get_intent_cache, get_response_cache
+from agent_env import env_float
+from agent_metrics import (instrument, instrument_tool, record_cache, record_llm_usage, record_parse,
+                           record_payload, record_route, request_scope, span)
+from backend_client import get_backend_client, reset_backend_client
+from context_projection import project_context
+from customer_index import get_customer_index
+from data_mirror import get_data_mirror, mirror_enabled
+from data_filters import DEFAULT_PAGE_SIZE, NEXT_CURSOR_HEADER, apply_query, build_query, filters_from_message
+from intent_model import INTENTS, classify_intent
+from llm_json import StreamingJSONParser, parse_llm_json, strip_code_fences
+from llm_registry import get_registry
+from metrics_engine import DashboardMetrics, compute_dashboard_metrics, snapshot_rows
+from model_routing import get_model_router, latency_budget
+from response_templates import FOLLOW_UP_INTENTS, render_template_response
+from semantic_cache import get_semantic_cache, semantic_cache_enabled
+from sqlite_backend import get_sqlite_backend
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -42,138 +58,457 @@ class AgentState(TypedDict):
     current_page: Annotated[str, "Current page the user is on"]
     user_role: Annotated[str, "User's role in the system"]
     intent: Annotated[str, "Detected intent from user message"]
+    intent_confidence: Annotated[float, "Confidence of the detected intent (0-1)"]
     context: Annotated[Dict, "Additional context and data"]
+    context_stats: Annotated[Dict, "Rows and estimated tokens of context sent to the LLM"]
+    speculative_intents: Annotated[List, "Intents whose context is prefetched for a fused classify-and-answer call"]
     response: Annotated[Dict, "Final response to user"]
     suggested_actions: Annotated[List, "Suggested actions for user"]
     follow_up_questions: Annotated[List, "Follow-up questions to ask"]
 
 # Initialize LLM (supports multiple providers)
-def get_llm():
-    """Initialize LLM based on environment configuration"""
-    logger.info("Checking LLM configuration...")
-    
-    # Try OpenAI first
-    if os.getenv("OPENAI_API_KEY"):
-        logger.info("Using OpenAI LLM")
-        return ChatOpenAI(
-            model="gpt-4-turbo-preview",
-            temperature=0.1,
-            max_tokens=2000
-        )
-    # Try Anthropic Claude
-    elif os.getenv("ANTHROPIC_API_KEY"):
-        logger.info("Using Anthropic LLM")
-        return ChatAnthropic(
-            model="claude-3-sonnet-20240229",
-            temperature=0.1,
-            max_tokens=2000
-        )
-    # Fallback to local Ollama
+def get_llm(tier: Optional[str] = None):
+    """Return the shared LLM client for the current environment configuration.
+
+    Clients live in the process-wide registry (see llm_registry.py), so
+    calling this from every node is cheap and reuses connection pools.
+    With a tier (see model_routing.py) the client runs that tier's model.
+    """
+    registry = get_registry()
+    if tier is None:
+        return registry.get()
+    provider, _, _ = registry.resolve_default()
+    return registry.get(model=get_model_router().model_for(tier, provider))
+
+def _route_llm(stage: str, intent: str = "") -> tuple:
+    """(client, tier) for an LLM stage under the model policy; client is None when the stage should skip the LLM"""
+    route = get_model_router().route(stage, intent)
+    llm = get_llm(route.tier) if route.tier else None
+    if llm is None and route.tier:
+        record_route(stage, intent, "none", "unavailable")
     else:
-        logger.info("No API keys found, trying Ollama...")
-        try:
-            from langchain_community.llms import Ollama
-            llm = Ollama(model="llama2", temperature=0.1)
-            logger.info("Ollama LLM initialized successfully")
-            return llm
-        except Exception as e:
-            logger.warning(f"No LLM configured. Using template responses. Error: {e}")
-            return None
+        record_route(stage, intent, route.tier or "none", route.reason)
+    return llm, route.tier
 
-# Tools for the agent
-@tool
-def get_work_requests() -> str:
-    """Get all work requests from the system"""
+class BackendError(Exception):
+    """Raised when the database API answers with an unexpected status"""
+
+# Data access helpers shared by the tools and the context gatherer. Reads go
+# through the entity cache (agent_cache.py); callers must treat the returned
+# rows as read-only because they are shared between requests.
+def _get(path: str, params: Optional[Dict[str, str]] = None):
+    resource = path.split("/", 1)[0]
+    with span("backend", resource):
+        response = get_backend_client().get(path, params=params or None)
+    record_payload(resource, len(response.content))
+    if response.status_code != 200:
+        raise BackendError(response.status_code)
+    return response
+
+async def _aget(path: str, params: Optional[Dict[str, str]] = None):
+    resource = path.split("/", 1)[0]
+    with span("backend", resource):
+        response = await get_backend_client().aget(path, params=params or None)
+    record_payload(resource, len(response.content))
+    if response.status_code != 200:
+        raise BackendError(response.status_code)
+    return response
+
+def _load_json(path: str) -> Any:
+    return _get(path).json()
+
+async def _aload_json(path: str) -> Any:
+    return (await _aget(path)).json()
+
+def _to_page(table: str, params: Dict[str, str], response) -> Dict[str, Any]:
+    """One page of a list endpoint as {"items", "next_cursor"}.
+
+    The query is re-applied locally so backends that ignore the parameters
+    still return only matching rows; the next-cursor header marks a
+    backend that paged the rows itself.
+    """
+    paged = NEXT_CURSOR_HEADER in response.headers
+    items, next_cursor = apply_query(table, response.json(), params, paged=paged)
+    if paged:
+        next_cursor = response.headers[NEXT_CURSOR_HEADER] or None
+    return {"items": items, "next_cursor": next_cursor}
+
+def _cache_key(path: str, params: Dict[str, str]) -> Any:
+    # Unfiltered reads keep the bare path key shared with create_work_request
+    return (path, tuple(sorted(params.items()))) if params else path
+
+def _fetch_json(entity: str, path: str, label: str, default: Any,
+                load: Optional[Any] = None, key: Optional[Any] = None) -> Any:
+    """Read an entity through the cache, returning default (uncached) on failure"""
+    loaded = []
+    
+    def loader():
+        loaded.append(True)
+        return load() if load else _load_json(path)
+    
     try:
-        response = requests.get('http://localhost:3001/api/database/work-requests', timeout=5)
-        if response.status_code == 200:
-            work_requests = response.json()
-            return json.dumps(work_requests, indent=2)
-        else:
-            logger.error(f"Failed to fetch work requests: {response.status_code}")
-            return json.dumps([], indent=2)
+        value = get_entity_cache().get_or_load(entity, key or path, loader)
+        record_cache(entity, hit=not loaded)
+        return value
+    except BackendError as e:
+        logger.error(f"Failed to fetch {label}: {e}")
     except Exception as e:
-        logger.error(f"Error fetching work requests: {e}")
-        return json.dumps([], indent=2)
+        logger.error(f"Error fetching {label}: {e}")
+    return default
 
-@tool
-def get_customers() -> str:
-    """Get all customers from the system"""
+async def _afetch_json(entity: str, path: str, label: str, default: Any,
+                       load: Optional[Any] = None, key: Optional[Any] = None) -> Any:
+    """Async variant of _fetch_json that never blocks the event loop"""
+    loaded = []
+    
+    def loader():
+        loaded.append(True)
+        return load() if load else _aload_json(path)
+    
+    try:
+        value = await get_entity_cache().aget_or_load(entity, key or path, loader)
+        record_cache(entity, hit=not loaded)
+        return value
+    except BackendError as e:
+        logger.error(f"Failed to fetch {label}: {e}")
+    except Exception as e:
+        logger.error(f"Error fetching {label}: {e}")
+    return default
+
+# Co-located deployments read the SQLite file directly (sqlite_backend.py);
+# any SQLite error falls back to the database API for that read
+def _read_direct(resource: str, read: Any) -> Any:
+    direct = get_sqlite_backend()
+    if direct is None:
+        return None
     try:
-        response = requests.get('http://localhost:3001/api/database/customers', timeout=5)
-        if response.status_code == 200:
-            customers = response.json()
-            return json.dumps(customers, indent=2)
+        with span("sqlite", resource):
+            return read(direct)
+    except sqlite3.Error as e:
+        logger.warning(f"SQLite read of {resource} failed ({e}); using the database API")
+        return None
+
+async def _aread_direct(resource: str, read: Any) -> Any:
+    if get_sqlite_backend() is None:
+        return None
+    # Off the event loop: unfiltered reads of large tables take milliseconds. to_thread
+    # copies the request's context, so the read's span lands in its trace
+    return await asyncio.to_thread(_read_direct, resource, read)
+
+def _load_page(table: str, params: Dict[str, str]) -> Dict[str, Any]:
+    page = _read_direct(table, lambda direct: direct.page(table, params))
+    if page is not None:
+        return page
+    path = LIST_PATHS[table]
+    return _to_page(table, params, _get(path, params))
+
+async def _aload_page(table: str, params: Dict[str, str]) -> Dict[str, Any]:
+    page = await _aread_direct(table, lambda direct: direct.page(table, params))
+    if page is not None:
+        return page
+    path = LIST_PATHS[table]
+    return _to_page(table, params, await _aget(path, params))
+
+# Mirrored tables (data_mirror.py): the first read loads a whole table, and
+# reads after its entity cache TTL pull only the rows changed since the
+# mirror's high-water mark plus new tombstones
+def _tombstones_missing(mirror, error: BackendError) -> bool:
+    if error.args and error.args[0] == 404:
+        mirror.tombstones_supported = False
+        logger.info("Database API has no deleted-rows endpoint; deletes wait for the periodic full reload")
+        return True
+    return False
+
+def _sync_tombstones(mirror):
+    if not mirror.tombstones_due():
+        return
+    after_id = mirror.tombstone_cursor
+    try:
+        entries = _read_direct("deleted_rows", lambda direct: direct.deleted_rows(after_id))
+        if entries is None:
+            entries = _get('deleted-rows', {"after_id": str(after_id)}).json()
+    except BackendError as e:
+        if _tombstones_missing(mirror, e):
+            return
+        raise
+    mirror.apply_tombstones(entries)
+
+async def _async_tombstones(mirror):
+    if not mirror.tombstones_due():
+        return
+    after_id = mirror.tombstone_cursor
+    try:
+        entries = await _aread_direct("deleted_rows", lambda direct: direct.deleted_rows(after_id))
+        if entries is None:
+            entries = (await _aget('deleted-rows', {"after_id": str(after_id)})).json()
+    except BackendError as e:
+        if _tombstones_missing(mirror, e):
+            return
+        raise
+    mirror.apply_tombstones(entries)
+
+def _refresh_mirror(table: str) -> Dict[str, Any]:
+    """Bring a table's mirror up to date and return all of its rows as a page"""
+    mirror = get_data_mirror()
+    state = mirror.table(table)
+    since = state.delta_since(mirror.reconcile_seconds)
+    try:
+        # A full load already reflects earlier deletes, and ids are never reused,
+        # so tombstones are only read alongside deltas
+        if since is None:
+            state.replace(_load_page(table, {})["items"])
         else:
-            logger.error(f"Failed to fetch customers: {response.status_code}")
-            return json.dumps([], indent=2)
+            state.upsert(_load_page(table, build_query(table, updated_since=since))["items"])
+            _sync_tombstones(mirror)
     except Exception as e:
-        logger.error(f"Error fetching customers: {e}")
-        return json.dumps([], indent=2)
+        if not state.loaded:
+            raise
+        logger.warning(f"Delta sync of {table} failed ({e}); serving mirrored rows")
+    return state.page({})
 
-@tool
-def get_projects() -> str:
-    """Get all projects from the system"""
+async def _arefresh_mirror(table: str) -> Dict[str, Any]:
+    mirror = get_data_mirror()
+    state = mirror.table(table)
+    since = state.delta_since(mirror.reconcile_seconds)
     try:
-        response = requests.get('http://localhost:3001/api/database/projects', timeout=5)
-        if response.status_code == 200:
-            projects = response.json()
-            return json.dumps(projects, indent=2)
+        if since is None:
+            state.replace((await _aload_page(table, {}))["items"])
         else:
-            logger.error(f"Failed to fetch projects: {response.status_code}")
-            return json.dumps([], indent=2)
+            state.upsert((await _aload_page(table, build_query(table, updated_since=since)))["items"])
+            await _async_tombstones(mirror)
     except Exception as e:
-        logger.error(f"Error fetching projects: {e}")
-        return json.dumps([], indent=2)
+        if not state.loaded:
+            raise
+        logger.warning(f"Delta sync of {table} failed ({e}); serving mirrored rows")
+    return state.page({})
+
+def _load_table(table: str) -> Dict[str, Any]:
+    return _refresh_mirror(table) if mirror_enabled() else _load_page(table, {})
+
+def _fetch_page(table: str, label: str, params: Dict[str, str]) -> Dict[str, Any]:
+    """One cached page of a list endpoint; params come from build_query()"""
+    path = LIST_PATHS[table]
+    empty = {"items": [], "next_cursor": None}
+    if not mirror_enabled():
+        return _fetch_json(table, path, label, empty,
+                           load=lambda: _load_page(table, params), key=_cache_key(path, params))
+    # The entity cache TTL bounds how often the mirror syncs
+    if _fetch_json(table, path, label, None, load=lambda: _refresh_mirror(table)) is None:
+        return empty
+    return get_data_mirror().table(table).page(params)
+
+async def _afetch_page(table: str, label: str, params: Dict[str, str]) -> Dict[str, Any]:
+    path = LIST_PATHS[table]
+    empty = {"items": [], "next_cursor": None}
+    if not mirror_enabled():
+        return await _afetch_json(table, path, label, empty,
+                                  load=lambda: _aload_page(table, params), key=_cache_key(path, params))
+    if await _afetch_json(table, path, label, None, load=lambda: _arefresh_mirror(table)) is None:
+        return empty
+    return get_data_mirror().table(table).page(params)
+
+def invalidate_data_cache(*entities: str):
+    """Drop cached rows for the given entities (all when none are named) and every cached answer"""
+    get_entity_cache().invalidate(*entities)
+    get_response_cache().clear()
+    get_semantic_cache().clear()
+
+def cache_stats() -> Dict[str, Dict[str, Any]]:
+    """Hit/miss counters for every cached entity"""
+    return get_entity_cache().stats()
+
+LIST_PATHS = {"work_requests": 'work-requests', "customers": 'customers', "projects": 'projects'}
+
+# The list fetchers take build_query() filters (status, priority, tier, dates,
+# sort, limit, cursor...); with none they return the whole table
+def fetch_work_requests(**filters: Any) -> List[Dict]:
+    return _fetch_page("work_requests", "work requests", build_query("work_requests", **filters))["items"]
+
+def fetch_customers(**filters: Any) -> List[Dict]:
+    return _fetch_page("customers", "customers", build_query("customers", **filters))["items"]
+
+def fetch_projects(**filters: Any) -> List[Dict]:
+    return _fetch_page("projects", "projects", build_query("projects", **filters))["items"]
+
+def fetch_dashboard_metrics() -> Dict:
+    """Dashboard KPIs computed from the table rows (metrics_engine.py).
+
+    With the mirror on they are maintained as rows change and read in
+    O(1), and stay available from the mirrored rows while the backend is
+    down. "complete" is false until every table has been loaded.
+    """
+    if mirror_enabled():
+        for table in METRIC_TABLES:
+            _fetch_page(table, LIST_PATHS[table], {})
+        metrics = get_data_mirror().metrics.snapshot()
+    else:
+        metrics = _fetch_json("dashboard_metrics", 'dashboard/metrics', "dashboard metrics",
+                              DashboardMetrics().snapshot(), load=_compute_metrics)
+    _save_metrics_snapshot(metrics)
+    return metrics
+
+async def afetch_work_requests(**filters: Any) -> List[Dict]:
+    return (await _afetch_page("work_requests", "work requests", build_query("work_requests", **filters)))["items"]
+
+async def afetch_customers(**filters: Any) -> List[Dict]:
+    return (await _afetch_page("customers", "customers", build_query("customers", **filters)))["items"]
+
+async def afetch_projects(**filters: Any) -> List[Dict]:
+    return (await _afetch_page("projects", "projects", build_query("projects", **filters)))["items"]
+
+async def afetch_dashboard_metrics() -> Dict:
+    if mirror_enabled():
+        for table in METRIC_TABLES:
+            await _afetch_page(table, LIST_PATHS[table], {})
+        metrics = get_data_mirror().metrics.snapshot()
+    else:
+        metrics = await _afetch_json("dashboard_metrics", 'dashboard/metrics', "dashboard metrics",
+                                     DashboardMetrics().snapshot(), load=_acompute_metrics)
+    _save_metrics_snapshot(metrics)
+    return metrics
+
+METRIC_TABLES = ("customers", "work_requests", "projects")
+
+# Without the mirror the KPIs are recomputed from whole tables once per cache TTL
+def _compute_metrics() -> Dict:
+    return compute_dashboard_metrics(*(_load_page(table, {})["items"] for table in METRIC_TABLES))
+
+async def _acompute_metrics() -> Dict:
+    return compute_dashboard_metrics(*[(await _aload_page(table, {}))["items"] for table in METRIC_TABLES])
+
+_metrics_saved_at: Optional[float] = None
+_metrics_saved_lock = threading.Lock()
+
+def _save_metrics_snapshot(metrics: Dict):
+    """Persist complete KPIs to the dashboard_metrics table every AGENT_METRICS_SNAPSHOT_SECONDS (off by default)"""
+    global _metrics_saved_at
+    interval = env_float("AGENT_METRICS_SNAPSHOT_SECONDS", 0.0)
+    if interval <= 0 or not metrics.get("complete"):
+        return
+    now = time.monotonic()
+    with _metrics_saved_lock:
+        if _metrics_saved_at is not None and now - _metrics_saved_at < interval:
+            return
+        _metrics_saved_at = now
+    # Off the request path: reads stay O(1)
+    threading.Thread(target=_put_metrics_snapshot, args=(snapshot_rows(metrics),), daemon=True).start()
+
+def _put_metrics_snapshot(rows: List[Dict]):
+    try:
+        response = get_backend_client().put('dashboard/metrics/snapshot', json={"metrics": rows})
+        if response.status_code != 200:
+            logger.warning(f"Failed to save dashboard metrics snapshot: {response.status_code}")
+    except Exception as e:
+        logger.warning(f"Error saving dashboard metrics snapshot: {e}")
+
+# Tools for the agent. The list tools return one page of matching rows as
+# {"items": [...], "next_cursor": ...}; pass next_cursor back to continue.
+def _resolve_customer_filter(table: str, filters: Dict[str, Any], customers: List[Dict]) -> Dict[str, Any]:
+    """Turn a customer name into a customer_id filter when it names exactly one customer"""
+    name = filters.get("customer")
+    if name and table != "customers":
+        customer = get_customer_index(customers).lookup(name)
+        if customer is not None and customer.get("id") is not None:
+            filters = {**filters, "customer": None, "customer_id": customer["id"]}
+    return filters
+
+def _page_json(page: Any) -> str:
+    return json.dumps(page, separators=(",", ":"), default=str)
+
+def _list_tool(table: str, label: str, filters: Dict[str, Any]) -> str:
+    try:
+        if filters.get("customer") and table != "customers":
+            filters = _resolve_customer_filter(table, filters, fetch_customers())
+        params = build_query(table, **filters)
+    except ValueError as e:
+        return _page_json({"success": False, "error": str(e)})
+    return _page_json(_fetch_page(table, label, params))
+
+async def _alist_tool(table: str, label: str, filters: Dict[str, Any]) -> str:
+    try:
+        if filters.get("customer") and table != "customers":
+            filters = _resolve_customer_filter(table, filters, await afetch_customers())
+        params = build_query(table, **filters)
+    except ValueError as e:
+        return _page_json({"success": False, "error": str(e)})
+    return _page_json(await _afetch_page(table, label, params))
+
+@tool
+def get_work_requests(status: Optional[str] = None, priority: Optional[str] = None, customer: Optional[str] = None,
+                      date_from: Optional[str] = None, date_to: Optional[str] = None, sort: Optional[str] = None,
+                      limit: int = DEFAULT_PAGE_SIZE, cursor: Optional[str] = None) -> str:
+    """Get work requests matching optional filters, one page at a time.
+
+    status and priority take comma-separated values (e.g. "pending,in-progress" or "high"),
+    customer is a customer name, date_from/date_to bound the created date (YYYY-MM-DD), sort is
+    a column with an optional "-" for descending (e.g. "-created_date", "priority"), and cursor
+    is the next_cursor of the previous page.
+    """
+    return _list_tool("work_requests", "work requests", {
+        "status": status, "priority": priority, "customer": customer, "date_from": date_from,
+        "date_to": date_to, "sort": sort, "limit": limit, "cursor": cursor})
+
+@tool
+def get_customers(tier: Optional[str] = None, customer: Optional[str] = None, sort: Optional[str] = None,
+                  limit: int = DEFAULT_PAGE_SIZE, cursor: Optional[str] = None) -> str:
+    """Get customers matching optional filters, one page at a time.
+
+    tier takes comma-separated tiers (Premium, Gold, Silver, Bronze), customer is an exact
+    customer name, sort is a column with an optional "-" for descending (e.g. "-total_value"),
+    and cursor is the next_cursor of the previous page.
+    """
+    return _list_tool("customers", "customers", {
+        "tier": tier, "customer": customer, "sort": sort, "limit": limit, "cursor": cursor})
+
+@tool
+def get_projects(status: Optional[str] = None, priority: Optional[str] = None, customer: Optional[str] = None,
+                 type: Optional[str] = None, date_from: Optional[str] = None, date_to: Optional[str] = None,
+                 sort: Optional[str] = None, limit: int = DEFAULT_PAGE_SIZE, cursor: Optional[str] = None) -> str:
+    """Get projects matching optional filters, one page at a time.
+
+    status, priority and type take comma-separated values (e.g. "active,planning"), customer
+    is a customer name, date_from/date_to bound the start date (YYYY-MM-DD), sort is a column
+    with an optional "-" for descending (e.g. "-budget"), and cursor is the next_cursor of the
+    previous page.
+    """
+    return _list_tool("projects", "projects", {
+        "status": status, "priority": priority, "customer": customer, "type": type,
+        "date_from": date_from, "date_to": date_to, "sort": sort, "limit": limit, "cursor": cursor})
 
 @tool
 def get_dashboard_metrics() -> str:
     """Get current dashboard metrics and KPIs"""
-    try:
-        response = requests.get('http://localhost:3001/api/database/dashboard/metrics', timeout=5)
-        if response.status_code == 200:
-            metrics = response.json()
-            return json.dumps(metrics, indent=2)
-        else:
-            logger.error(f"Failed to fetch dashboard metrics: {response.status_code}")
-            # Fallback to mock metrics
-            metrics = {
-                "total_work_requests": 5,
-                "pending_requests": 2,
-                "completed_requests": 3,
-                "completion_rate": 0.85,
-                "average_project_time": 45,
-                "total_revenue": 125000,
-                "active_customers": 3,
-                "high_priority_items": 1
-            }
-            return json.dumps(metrics, indent=2)
-    except Exception as e:
-        logger.error(f"Error fetching dashboard metrics: {e}")
-        # Fallback to mock metrics
-        metrics = {
-            "total_work_requests": 5,
-            "pending_requests": 2,
-            "completed_requests": 3,
-            "completion_rate": 0.85,
-            "average_project_time": 45,
-            "total_revenue": 125000,
-            "active_customers": 3,
-            "high_priority_items": 1
-        }
-        return json.dumps(metrics, indent=2)
+    return json.dumps(fetch_dashboard_metrics(), indent=2)
+
+# Async variants used by tool.ainvoke()
+async def _aget_work_requests(**filters: Any) -> str:
+    return await _alist_tool("work_requests", "work requests", filters)
+
+async def _aget_customers(**filters: Any) -> str:
+    return await _alist_tool("customers", "customers", filters)
+
+async def _aget_projects(**filters: Any) -> str:
+    return await _alist_tool("projects", "projects", filters)
+
+async def _aget_dashboard_metrics() -> str:
+    return json.dumps(await afetch_dashboard_metrics(), indent=2)
+
+get_work_requests.coroutine = _aget_work_requests
+get_customers.coroutine = _aget_customers
+get_projects.coroutine = _aget_projects
+get_dashboard_metrics.coroutine = _aget_dashboard_metrics
 
 @tool
 def create_work_request(customer: str, project_type: str, description: str, priority: str, target_date: str) -> str:
     """Create a new work request"""
     try:
-        # First, find the customer ID
-        customers_response = requests.get('http://localhost:3001/api/database/customers', timeout=5)
-        if customers_response.status_code != 200:
+        # First, find the customer ID (served from the entity cache when warm)
+        try:
+            customers = get_entity_cache().get_or_load("customers", 'customers', lambda: _load_table("customers"))["items"]
+        except BackendError:
             return json.dumps({"success": False, "error": "Failed to fetch customers"}, indent=2)
         
-        customers = customers_response.json()
-        customer_obj = next((c for c in customers if c['name'].lower() == customer.lower()), None)
+        customer_obj = get_customer_index(customers).lookup(customer)
         
         if not customer_obj:
             return json.dumps({"success": False, "error": f"Customer '{customer}' not found"}, indent=2)
@@ -189,10 +524,10 @@ def create_work_request(customer: str, project_type: str, description: str, prio
             "status": "pending"
         }
         
-        response = requests.post('http://localhost:3001/api/database/work-requests', 
-                               json=work_request_data, timeout=5)
+        response = get_backend_client().post('work-requests', json=work_request_data)
         
         if response.status_code == 201:
+            invalidate_data_cache("work_requests", "dashboard_metrics")
             new_request = response.json()
             return json.dumps({"success": True, "work_request": new_request}, indent=2)
         else:
@@ -206,7 +541,8 @@ def update_work_request(request_id: str, status: str, notes: str = "") -> str:
     """Update an existing work request"""
     try:
         # Get the current work request
-        response = requests.get(f'http://localhost:3001/api/database/work-requests/{request_id}', timeout=5)
+        client = get_backend_client()
+        response = client.get(f'work-requests/{request_id}')
         if response.status_code != 200:
             return json.dumps({"success": False, "error": "Work request not found"}, indent=2)
         
@@ -219,10 +555,10 @@ def update_work_request(request_id: str, status: str, notes: str = "") -> str:
             "notes": notes
         }
         
-        update_response = requests.put(f'http://localhost:3001/api/database/work-requests/{request_id}', 
-                                     json=update_data, timeout=5)
+        update_response = client.put(f'work-requests/{request_id}', json=update_data)
         
         if update_response.status_code == 200:
+            invalidate_data_cache("work_requests", "dashboard_metrics")
             return json.dumps({
                 "success": True,
                 "message": f"Work request {request_id} updated to status: {status}",
@@ -234,233 +570,227 @@ def update_work_request(request_id: str, status: str, notes: str = "") -> str:
         logger.error(f"Error updating work request: {e}")
         return json.dumps({"success": False, "error": str(e)}, indent=2)
 
+for _tool in (get_work_requests, get_customers, get_projects, get_dashboard_metrics,
+              create_work_request, update_work_request):
+    instrument_tool(_tool)
+
 # Node definitions
+# Local classifications at or above this confidence skip the LLM round trip
+INTENT_CONFIDENCE_THRESHOLD = env_float("AGENT_INTENT_CONFIDENCE_THRESHOLD", 0.5)
+
+INTENT_PROMPT = ChatPromptTemplate.from_messages([
+    ("system", """You are an intent classifier for an enterprise management system. \
+    Classify the user's intent into one of these categories:\
+    - dashboard_analysis: Questions about metrics, status, overview\
+    - work_request_management: Creating, updating, or managing work requests\
+    - customer_management: Customer-related questions, asking about specific customers (like "TechCorp Industries"), customer tiers, relationships\
+    - project_tracking: Project timeline, optimization, tracking\
+    - data_import_export: CSV operations, data import/export\
+    - reporting: Analytics, reports, insights\
+    - navigation: Help with finding pages or features\
+    - error_troubleshooting: Problems, errors, issues\
+    - general_query: General questions, math, or unrelated queries\
+    
+    IMPORTANT: If the user asks about a specific company/customer (like "TechCorp Industries", "Innovate Solutions", etc.), classify as customer_management.
+    
+    Respond with only the intent category."""),
+    ("user", "{message}")
+])
+
+# Follow-up questions suggested by the templates, pinned in the intent cache
+# so clicking one never costs an LLM call
+SUGGESTED_FOLLOW_UP_INTENTS = FOLLOW_UP_INTENTS
+
+for _question, _intent in SUGGESTED_FOLLOW_UP_INTENTS.items():
+    get_intent_cache().pin(_question, _intent)
+
+def intent_cache_stats() -> Dict[str, Any]:
+    """Hit rate and size of the message -> intent memo"""
+    return get_intent_cache().stats()
+
+def response_cache_stats() -> Dict[str, Any]:
+    """Hit rate and size of the generated-answer cache"""
+    return get_response_cache().stats()
+
+def semantic_cache_stats() -> Dict[str, Any]:
+    """Hits, near misses and thresholds per intent of the paraphrase cache"""
+    return get_semantic_cache().stats()
+
+def model_routing_stats() -> Dict[str, Any]:
+    """Latency budget, per-tier latency estimates and route counts of the model policy"""
+    return get_model_router().stats()
+
+def _llm_text(result: Any) -> str:
+    """Text of a chat model message or a plain completion string"""
+    return getattr(result, "content", result).strip()
+
+def _resolve_llm_intent(llm_intent: str, intent: str, confidence: float) -> tuple:
+    if llm_intent in INTENTS:
+        return llm_intent, 1.0
+    logger.warning(f"LLM returned unknown intent {llm_intent!r}, keeping {intent}")
+    return intent, confidence
+
+class LocalIntent(NamedTuple):
+    intent: str
+    confidence: float
+    # False when the prediction is below the confidence threshold and the LLM should be asked
+    settled: bool
+    # True when it came from the intent cache (and needs no put)
+    cached: bool
+
+def _local_intent(message: str) -> LocalIntent:
+    """Intent from the intent cache (one lookup) or, on a miss, the local model"""
+    cached = get_intent_cache().get(message)
+    if cached is not None:
+        return LocalIntent(cached[0], cached[1], True, True)
+    prediction = classify_intent(message)
+    return LocalIntent(prediction.intent, prediction.confidence,
+                       prediction.confidence >= INTENT_CONFIDENCE_THRESHOLD, False)
+
 def intent_classifier(state: AgentState) -> AgentState:
-    """Classify user intent from the message"""
-    llm = get_llm()
-    if not llm:
-        # Fallback to rule-based classification
-        message = state["messages"][-1].content.lower()
-        # Check for customer queries first (before general queries)
-        if any(word in message for word in ["customer", "tier", "relationship", "techcorp", "innovate", "microtech", "about", "tell me about"]):
-            intent = "customer_management"
-        elif any(word in message for word in ["what is", "how much", "calculate", "+", "-", "*", "/", "math", "number", "answer", "sum", "total", "equals", "?", "please give me a simple answer"]):
-            intent = "general_query"
-        elif any(word in message for word in ["dashboard", "status", "metrics", "overview"]):
-            intent = "dashboard_analysis"
-        elif any(word in message for word in ["work request", "create", "new request"]):
-            intent = "work_request_management"
-        elif any(word in message for word in ["project", "timeline", "optimize"]):
-            intent = "project_tracking"
-        elif any(word in message for word in ["csv", "import", "export"]):
-            intent = "data_import_export"
-        elif any(word in message for word in ["report", "analytics"]):
-            intent = "reporting"
-        elif any(word in message for word in ["navigate", "go to", "find"]):
-            intent = "navigation"
-        elif any(word in message for word in ["error", "problem", "trouble", "help", "fix"]):
-            intent = "error_troubleshooting"
-        else:
-            intent = "general_query"
-    else:
-        # Use LLM for intent classification
-        prompt = ChatPromptTemplate.from_messages([
-            ("system", """You are an intent classifier for an enterprise management system. \
-            Classify the user's intent into one of these categories:\
-            - dashboard_analysis: Questions about metrics, status, overview\
-            - work_request_management: Creating, updating, or managing work requests\
-            - customer_management: Customer-related questions, asking about specific customers (like "TechCorp Industries"), customer tiers, relationships\
-            - project_tracking: Project timeline, optimization, tracking\
-            - data_import_export: CSV operations, data import/export\
-            - reporting: Analytics, reports, insights\
-            - navigation: Help with finding pages or features\
-            - error_troubleshooting: Problems, errors, issues\
-            - general_query: General questions, math, or unrelated queries\
-            
-            IMPORTANT: If the user asks about a specific company/customer (like "TechCorp Industries", "Innovate Solutions", etc.), classify as customer_management.
-            
-            Respond with only the intent category."""),
-            ("user", "{message}")
-        ])
-        chain = prompt | llm
-        intent = chain.invoke({"message": state["messages"][-1].content}).content.strip()
+    """Classify user intent from the message.
+
+    Normalized messages are memoized in the intent cache. On a miss the
+    local keyword model answers first; the LLM is only consulted when its
+    confidence is below INTENT_CONFIDENCE_THRESHOLD.
+    """
+    message = state["messages"][-1].content
+    intent, confidence, settled, cached = _local_intent(message)
+    if cached:
+        state["intent"], state["intent_confidence"] = intent, confidence
+        return state
+    
+    if not settled:
+        llm, tier = _route_llm("intent")
+        if llm:
+            # Use LLM for intent classification
+            chain = INTENT_PROMPT | llm
+            started = time.perf_counter()
+            try:
+                with span("llm", "intent"):
+                    reply = chain.invoke({"message": message})
+            except Exception as e:
+                # Keep the local prediction rather than failing the turn, but do not
+                # memoize it, so the LLM is asked again once it is reachable
+                logger.error(f"LLM intent classification failed ({tier} tier), keeping {intent}: {e}")
+                state["intent"] = intent
+                state["intent_confidence"] = confidence
+                return state
+            else:
+                get_model_router().observe(tier, time.perf_counter() - started)
+                record_llm_usage("intent", reply)
+                llm_intent = _llm_text(reply)
+                intent, confidence = _resolve_llm_intent(llm_intent, intent, confidence)
+    
+    get_intent_cache().put(message, intent, confidence)
     state["intent"] = intent
+    state["intent_confidence"] = confidence
     return state
 
+# Context each intent needs: context key -> (intents, sync fetcher, async fetcher)
+CONTEXT_SOURCES = {
+    "work_requests": (("dashboard_analysis", "work_request_management"), fetch_work_requests, afetch_work_requests),
+    "metrics": (("dashboard_analysis", "work_request_management", "reporting", "data_import_export"),
+                fetch_dashboard_metrics, afetch_dashboard_metrics),
+    "customers": (("customer_management", "dashboard_analysis", "reporting"), fetch_customers, afetch_customers),
+    "projects": (("project_tracking", "dashboard_analysis", "reporting"), fetch_projects, afetch_projects),
+}
+
+def _context_keys(*intents: str) -> List[str]:
+    return [key for key, (sources, _, _) in CONTEXT_SOURCES.items() if any(intent in sources for intent in intents)]
+
+def _context_filters(message: str, keys: List[str]) -> Dict[str, Dict[str, str]]:
+    """List filters implied by the message for the context keys being gathered.
+
+    Customer names are matched against the cached customer table only, so
+    deriving filters never costs a backend round trip.
+    """
+    customers = get_entity_cache().cache("customers").peek('customers')
+    filters = filters_from_message(message, customers["items"] if customers else None)
+    return {key: filters[key] for key in keys if key in filters}
+
 def context_gatherer(state: AgentState) -> AgentState:
-    """Gather relevant context based on intent"""
+    """Gather relevant context based on intent, fetching only rows the message asks about"""
     context = {}
+    keys = _context_keys(*(state.get("speculative_intents") or [state["intent"]]))
+    filters = _context_filters(state["messages"][-1].content, keys)
     
-    if state["intent"] in ["dashboard_analysis", "work_request_management"]:
+    for key in keys:
         try:
-            context["work_requests"] = json.loads(get_work_requests.invoke(""))
-            context["metrics"] = json.loads(get_dashboard_metrics.invoke(""))
+            context[key] = CONTEXT_SOURCES[key][1](**filters.get(key, {}))
         except Exception as e:
-            logger.error(f"Error gathering work request context: {e}")
+            logger.error(f"Error gathering {key} context: {e}")
     
-    if state["intent"] in ["customer_management", "dashboard_analysis"]:
-        try:
-            context["customers"] = json.loads(get_customers.invoke(""))
-        except Exception as e:
-            logger.error(f"Error gathering customer context: {e}")
+    if filters:
+        context["filters"] = filters
+    state["context"] = context
+    return state
+
+async def acontext_gatherer(state: AgentState) -> AgentState:
+    """Gather relevant context based on intent, issuing all fetches concurrently"""
+    keys = _context_keys(*(state.get("speculative_intents") or [state["intent"]]))
+    filters = _context_filters(state["messages"][-1].content, keys)
+    results = await asyncio.gather(*(CONTEXT_SOURCES[key][2](**filters.get(key, {})) for key in keys),
+                                   return_exceptions=True)
     
-    if state["intent"] in ["project_tracking", "dashboard_analysis"]:
-        try:
-            context["projects"] = json.loads(get_projects.invoke(""))
-        except Exception as e:
-            logger.error(f"Error gathering project context: {e}")
+    context = {}
+    for key, result in zip(keys, results):
+        # BaseException: a cancelled fetch comes back as CancelledError
+        if isinstance(result, BaseException):
+            logger.error(f"Error gathering {key} context: {result!r}")
+            continue
+        context[key] = result
     
+    if filters:
+        context["filters"] = filters
     state["context"] = context
     return state
 
 def response_generator(state: AgentState) -> AgentState:
     """Generate response based on intent and context"""
-    llm = get_llm()
+    # Model tier for this intent, within what is left of the request's latency budget
+    llm, tier = _route_llm("response", state["intent"])
     
     if not llm:
-        logger.info("No LLM available, using template response")
+        logger.info("No LLM available or within budget, using template response")
         # Fallback to template responses
         response = generate_template_response(state)
     else:
-        logger.info("LLM available, using LLM response generation")
+        logger.info(f"LLM available, using LLM response generation ({tier} tier)")
         # Use LLM for response generation
-        response = generate_llm_response(state, llm)
+        response = generate_llm_response(state, llm, tier)
     
     state["response"] = response
     return state
 
 def generate_template_response(state: AgentState) -> Dict:
-    """Generate template-based response when LLM is not available"""
-    intent = state["intent"]
-    context = state["context"]
-    user_message = state["messages"][-1].content.lower()
-    
-    if intent == "general_query":
-        # Handle simple math and general questions
-        if "what is 2+2" in user_message or "2+2" in user_message:
-            return {
-                "response_message": """The answer to 2+2 is **4**. 
-
-I'm your SC Micro Assistant, and I can help you with much more than just math! I can assist with:
-
-• Dashboard analysis and metrics
-• Creating and managing work requests  
-• Customer relationship insights
-• Project optimization and timelines
-• CSV import/export operations
-
-What would you like to know about your enterprise system?""",
-                "suggested_actions": [
-                    {"action": "View Dashboard", "description": "See current metrics", "route": "/"},
-                    {"action": "Create Work Request", "description": "Add new request", "route": "/add-work-request"},
-                    {"action": "View Customers", "description": "Customer overview", "route": "/customers"}
-                ],
-                "follow_up_questions": [
-                    "Show me the dashboard overview",
-                    "How do I create a work request?",
-                    "What customers do we have?"
-                ]
-            }
-        else:
-            return {
-                "response_message": f"""I understand you're asking: "{state['messages'][-1].content}"
-
-I'm your SC Micro Assistant, and I'm here to help you with your enterprise management system. I can assist with:
-
-• Dashboard analysis and metrics
-• Creating and managing work requests  
-• Customer relationship insights
-• Project optimization and timelines
-• CSV import/export operations
-
-What would you like to know about your system?""",
-                "suggested_actions": [
-                    {"action": "View Dashboard", "description": "See current metrics", "route": "/"},
-                    {"action": "Create Work Request", "description": "Add new request", "route": "/add-work-request"},
-                    {"action": "View Customers", "description": "Customer overview", "route": "/customers"}
-                ],
-                "follow_up_questions": [
-                    "Show me the dashboard overview",
-                    "How do I create a work request?",
-                    "What customers do we have?"
-                ]
-            }
-    
-    elif intent == "customer_management":
-        customers = context.get("customers", [])
-        user_message = state["messages"][-1].content.lower()
-        
-        # Look for any customer name in the user message
-        for customer in customers:
-            customer_name = customer.get("name", "").lower()
-            # Use a simple substring match or token match for robustness
-            if customer_name in user_message or any(token in user_message for token in customer_name.split() if len(token) > 2):
-                return {
-                    "response_message": f"""🏢 **{customer.get('name', 'Unknown')} Customer Profile**\n\n• **Tier**: {customer.get('tier', 'Unknown')}\n• **Total Projects**: {customer.get('total_projects', 0)}\n• **Completion Rate**: {customer.get('completion_rate', 0) * 100:.1f}%\n• **Total Value**: ${customer.get('total_value', 0):,}\n• **Contact**: {customer.get('contact', 'N/A')}\n• **Email**: {customer.get('email', 'N/A')}\n• **Phone**: {customer.get('phone', 'N/A')}\n• **Address**: {customer.get('address', 'N/A')}\n\n**Customer Status**: {customer.get('name', 'Unknown')} is a {customer.get('tier', 'Unknown')} tier customer with {customer.get('total_projects', 0)} total projects and ${customer.get('total_value', 0):,} in total value.""",
-                    "suggested_actions": [
-                        {"action": "View All Customers", "description": "See complete customer list", "route": "/customers"},
-                        {"action": "Create Work Request", "description": f"Add new request for {customer.get('name', 'Unknown')}", "route": "/add-work-request"},
-                        {"action": "View Dashboard", "description": "See overall metrics", "route": "/"}
-                    ],
-                    "follow_up_questions": [
-                        f"What work requests does {customer.get('name', 'Unknown')} have?",
-                        f"Show me {customer.get('name', 'Unknown')}'s project history",
-                        f"How does {customer.get('name', 'Unknown')} compare to other customers?"
-                    ]
-                }
-        # General customer overview
-        return {
-            "response_message": f"""🏢 **Customer Management Overview**\n\nYou have {len(customers)} customers in the system:\n\n{chr(10).join([f"• **{c.get('name', 'Unknown')}** - {c.get('tier', 'Unknown')} Tier (${c.get('total_value', 0):,} total value)" for c in customers[:5]])}\n\n**Customer Tiers:**\n• Premium: High-value customers with excellent track record\n• Gold: Regular customers with good performance  \n• Silver: Developing relationships with potential\n• Bronze: New or occasional customers\n\n**Top Customers by Value:**\n{chr(10).join([f"• {c.get('name', 'Unknown')}: ${c.get('total_value', 0):,}" for c in sorted(customers, key=lambda x: x.get('total_value', 0), reverse=True)[:3]])}""",
-            "suggested_actions": [
-                {"action": "View All Customers", "description": "See complete customer list", "route": "/customers"},
-                {"action": "Create Work Request", "description": "Add new request", "route": "/add-work-request"},
-                {"action": "View Dashboard", "description": "See overall metrics", "route": "/"}
-            ],
-            "follow_up_questions": [
-                "Tell me about TechCorp Industries",
-                "Show me our Premium customers",
-                "Which customer has the most projects?"
-            ]
-        }
-    
-    elif intent == "dashboard_analysis":
-        metrics = context.get("metrics", {})
-        return {
-            "response_message": f"""📊 **Dashboard Overview**
-
-• Total Work Requests: {metrics.get('total_work_requests', 0)}
-• Pending Requests: {metrics.get('pending_requests', 0)}
-• Completion Rate: {metrics.get('completion_rate', 0.85) * 100:.1f}%
-• Average Project Time: {metrics.get('average_project_time', 45)} days
-• Total Revenue: ${metrics.get('total_revenue', 0):,}
-
-🚨 **Attention Needed**: You have {metrics.get('pending_requests', 0)} pending work requests that require your attention.""",
-            "suggested_actions": [
-                {"action": "View All Requests", "description": "See detailed work request list", "route": "/"},
-                {"action": "Create New Request", "description": "Add a new work request", "route": "/add-work-request"},
-                {"action": "View Customers", "description": "Check customer overview", "route": "/customers"}
-            ],
-            "follow_up_questions": [
-                "Show me high-priority pending requests",
-                "What's the completion rate for this month?",
-                "Which customers have the most active projects?"
-            ]
-        }
-    
-    # Add more template responses for other intents...
-    return {
-        "response_message": "I understand your request. Let me help you with that.",
-        "suggested_actions": [],
-        "follow_up_questions": []
-    }
+    """Generate template-based response when LLM is not available (see response_templates.py)"""
+    return render_template_response(state["intent"], state["context"], state["messages"][-1].content,
+                                    state.get("current_page") or "/")
 
 def clean_json_response(text):
     """Remove markdown code block formatting from LLM output."""
-    cleaned = re.sub(r"^```json\s*|^```\s*|\s*```$", "", text.strip(), flags=re.IGNORECASE | re.MULTILINE)
-    return cleaned.strip()
+    return strip_code_fences(text)
+
+def parse_llm_response(stage: str, content: str) -> tuple:
+    """(response, repaired) from an LLM answer; response is None when it holds no structured answer.
+
+    Fenced JSON, JSON followed by prose and truncated JSON are all accepted
+    (see llm_json.py); a repaired answer keeps only complete actions.
+    """
+    with span("parse", "parse_llm_json"):
+        parsed, repaired = parse_llm_json(content)
+    if not isinstance(parsed, dict) or "response_message" not in parsed:
+        record_parse(stage, "unstructured")
+        return None, False
+    if repaired:
+        parsed["suggested_actions"] = [action for action in parsed.get("suggested_actions") or []
+                                       if isinstance(action, dict) and action.get("action") and action.get("route")]
+    record_parse(stage, "repaired" if repaired else "parsed")
+    return parsed, repaired
 
-def generate_llm_response(state: AgentState, llm) -> Dict:
-    """Generate LLM-based response"""
+def generate_llm_response(state: AgentState, llm, tier: Optional[str] = None) -> Dict:
+    """Generate LLM-based response (tier, when given, gets the call's latency)"""
     intent = state["intent"]
     context = state["context"]
     user_message = state["messages"][-1].content
@@ -514,39 +844,212 @@ def generate_llm_response(state: AgentState, llm) -> Dict:
         "{system_prompt}\nCurrent context: {context}\nRespond in JSON format with: response_message, suggested_actions (array of objects with action, description, route), and follow_up_questions (array of strings)\nUser: {message}"
     )
     try:
+        # Only the relevant rows and columns, compactly serialized within the token budget
+        context_json, context_stats = project_context(context, intent, user_message)
+        state["context_stats"] = context_stats
+        logger.info(f"Prompt context: {sum(context_stats['rows_sent'].values())} rows, ~{context_stats['tokens']} tokens")
+        record_payload("prompt_context", len(context_json))
+        fingerprint = context_fingerprint(context_json)
+        cached = get_response_cache().get(intent, user_message, fingerprint)
+        record_cache("responses", hit=cached is not None)
+        if cached is None and semantic_cache_enabled():
+            # A paraphrase of a question already answered for this role and data
+            with span("cache", "semantic"):
+                cached = get_semantic_cache().get(intent, state["user_role"], fingerprint, user_message)
+            record_cache("semantic_responses", hit=cached is not None)
+        if cached is not None:
+            return cached
         chain = prompt | llm
-        response = chain.invoke({
-            "system_prompt": system_prompt,
-            "context": json.dumps(context, indent=2),
-            "message": user_message
-        })
+        started = time.perf_counter()
+        with span("llm", "response"):
+            response = chain.invoke({
+                "system_prompt": system_prompt,
+                "context": context_json,
+                "message": user_message
+            })
+        if tier:
+            get_model_router().observe(tier, time.perf_counter() - started)
+        record_llm_usage("response", response)
         # Parse JSON response
-        try:
-            cleaned_content = clean_json_response(response.content)
-            parsed_response = json.loads(cleaned_content)
-            return parsed_response
-        except json.JSONDecodeError:
-            # Fallback if JSON parsing fails
+        parsed_response, repaired = parse_llm_response("response", response.content)
+        if parsed_response is None:
+            # Fallback if no JSON answer can be recovered
             return {
                 "response_message": response.content,
                 "suggested_actions": [],
                 "follow_up_questions": []
             }
+        if not repaired:
+            # Truncated answers are served but not reused
+            get_response_cache().put(intent, user_message, fingerprint, parsed_response)
+            if semantic_cache_enabled():
+                get_semantic_cache().put(intent, state["user_role"], fingerprint, user_message, parsed_response)
+        return parsed_response
     except Exception as e:
         logger.error(f"Error generating LLM response: {e}")
         return generate_template_response(state)
 
-# Create the LangGraph workflow
-def create_agent():
-    """Create the LangGraph agent workflow"""
+# Single-call mode (AGENT_GRAPH_MODE=fused): when the local intent model is unsure,
+# context is prefetched for every likely intent and one LLM call classifies the
+# message and answers it, instead of an intent call followed by a response call
+GRAPH_MODES = ("staged", "fused")
+
+# Intent most questions asked on a page have, prefetched along with the local guesses
+PAGE_INTENTS = {
+    "/": "dashboard_analysis",
+    "/customers": "customer_management",
+    "/add-work-request": "work_request_management",
+    "/csv-upload": "data_import_export",
+}
+
+FUSED_PROMPT = ChatPromptTemplate.from_template(
+    """You are an enterprise management assistant for SC Micro. Classify the user's message into one intent, then answer it.
+Intents:
+- dashboard_analysis: metrics, status, overview
+- work_request_management: creating, updating or managing work requests
+- customer_management: customers, specific companies (like "TechCorp Industries"), tiers, relationships
+- project_tracking: project timelines, optimization, tracking
+- data_import_export: CSV import/export
+- reporting: analytics, reports, insights
+- navigation: finding pages or features
+- error_troubleshooting: problems, errors, issues
+- general_query: general questions, math or unrelated queries
+IMPORTANT: Only suggest actions and routes that actually exist in the SC Micro system:
+- Available routes: "/", "/customers", "/add-work-request", "/csv-upload"
+- Available actions: "View Dashboard", "View Customers", "Create Work Request", "Upload CSV"
+Do not invent routes or features that don't exist.
+Current page: {current_page}
+Current context: {context}
+Respond in JSON format with: intent (first, one of the intents above), response_message, suggested_actions (array of objects with action, description, route), and follow_up_questions (array of strings)
+User: {message}"""
+)
+
+def graph_mode() -> str:
+    """"staged" (default) or "fused", from AGENT_GRAPH_MODE"""
+    mode = os.getenv("AGENT_GRAPH_MODE", "staged").strip().lower()
+    return mode if mode in GRAPH_MODES else "staged"
+
+def _speculative_intents(message: str, intent: str, current_page: str) -> List[str]:
+    """The local guess, every other intent the local model scored and the page's intent"""
+    candidates = [intent, *classify_intent(message).scores, PAGE_INTENTS.get(current_page)]
+    return list(dict.fromkeys(candidate for candidate in candidates if candidate))
+
+def _prefetch_covers(intent: str, candidates: List[str]) -> bool:
+    """Whether context prefetched for candidates includes everything intent needs"""
+    return set(_context_keys(intent)) <= set(_context_keys(*candidates))
+
+def speculative_intent_classifier(state: AgentState) -> AgentState:
+    """Fused-mode intent node: the cached or local intent, never an LLM call.
+
+    When the local model is unsure, speculative_intents lists the intents
+    whose context the gatherer prefetches for the fused response call.
+    """
+    message = state["messages"][-1].content
+    intent, confidence, settled, cached = _local_intent(message)
+    if settled and not cached:
+        get_intent_cache().put(message, intent, confidence)
+    state["intent"] = intent
+    state["intent_confidence"] = confidence
+    state["speculative_intents"] = [] if settled else _speculative_intents(
+        message, intent, state.get("current_page") or "/")
+    return state
+
+def generate_fused_response(state: AgentState, llm, tier: Optional[str] = None) -> Optional[Dict]:
+    """Classify and answer in one LLM call; sets the intent and returns the response.
+
+    Returns None when the call fails or the chosen intent needs context that
+    was not prefetched, leaving the caller to answer the classified intent.
+    """
+    user_message = state["messages"][-1].content
+    candidates = state["speculative_intents"]
+    # Projected for the local guess; the other prefetched tables keep their default columns
+    context_json, context_stats = project_context(state["context"], state["intent"], user_message)
+    state["context_stats"] = context_stats
+    record_payload("prompt_context", len(context_json))
+    chain = FUSED_PROMPT | llm
+    try:
+        started = time.perf_counter()
+        with span("llm", "fused"):
+            response = chain.invoke({
+                "current_page": state.get("current_page") or "/",
+                "context": context_json,
+                "message": user_message
+            })
+        if tier:
+            get_model_router().observe(tier, time.perf_counter() - started)
+        record_llm_usage("fused", response)
+    except Exception as e:
+        logger.error(f"Error generating fused response: {e}")
+        return None
+    parsed, _ = parse_llm_response("fused", response.content)
+    if parsed is None:
+        # Unstructured completion: keep it as the answer to the local guess
+        get_intent_cache().put(user_message, state["intent"], state["intent_confidence"])
+        return {"response_message": response.content, "suggested_actions": [], "follow_up_questions": []}
+    
+    intent, confidence = _resolve_llm_intent(str(parsed.pop("intent", "")).strip(),
+                                             state["intent"], state["intent_confidence"])
+    state["intent"], state["intent_confidence"] = intent, confidence
+    get_intent_cache().put(user_message, intent, confidence)
+    if not _prefetch_covers(intent, candidates):
+        logger.info(f"Fused call chose {intent}, outside the prefetched context")
+        record_route("fused", intent, tier or "none", "mispredicted")
+        return None
+    return parsed
+
+def fused_response_generator(state: AgentState) -> AgentState:
+    """Fused-mode response node: one LLM call for unsettled messages, else response_generator"""
+    if not state.get("speculative_intents"):
+        return response_generator(state)
+    
+    llm, tier = _route_llm("fused", state["intent"])
+    response = generate_fused_response(state, llm, tier) if llm else None
+    state["speculative_intents"] = []
+    if response is None:
+        # No LLM or budget left, or a misprediction: answer the (re)classified
+        # intent with exactly its context, as the staged graph would
+        if not llm:
+            get_intent_cache().put(state["messages"][-1].content, state["intent"], state["intent_confidence"])
+        return response_generator(context_gatherer(state))
+    state["response"] = response
+    return state
+
+# Compiled graphs, keyed by graph configuration (see _agent_cache_key)
+_compiled_agents: Dict[tuple, Any] = {}
+_compiled_agents_lock = threading.Lock()
+
+def _agent_nodes() -> Dict[str, Any]:
+    """Node callables for the agent graph as (sync, async) pairs, looked up at call time"""
+    if graph_mode() == "fused":
+        return {
+            "intent_classifier": (speculative_intent_classifier, None),
+            "context_gatherer": (context_gatherer, acontext_gatherer),
+            "response_generator": (fused_response_generator, None),
+        }
+    return {
+        "intent_classifier": (intent_classifier, None),
+        "context_gatherer": (context_gatherer, acontext_gatherer),
+        "response_generator": (response_generator, None),
+    }
+
+def _agent_cache_key(nodes: Dict[str, Any]) -> tuple:
+    # Node identities are part of the key, so rebinding a node function
+    # (e.g. in tests or after a hot patch) never serves a stale graph
+    return tuple(nodes.items())
+
+def _build_agent(nodes: Dict[str, Any]):
+    """Build and compile the LangGraph agent workflow"""
     
     # Create the graph
     workflow = StateGraph(AgentState)
     
     # Add nodes
-    workflow.add_node("intent_classifier", intent_classifier)
-    workflow.add_node("context_gatherer", context_gatherer)
-    workflow.add_node("response_generator", response_generator)
+    for name, (func, afunc) in nodes.items():
+        func = instrument(func, "node", name)
+        if afunc:
+            # Nodes with an async variant use it under ainvoke() and the sync one under invoke()
+            func = RunnableLambda(func, afunc=instrument(afunc, "node", name))
+        workflow.add_node(name, func)
     
     # Add edges
     workflow.set_entry_point("intent_classifier")
@@ -555,53 +1058,295 @@ def create_agent():
     workflow.add_edge("response_generator", END)
     
     # Compile the graph
-    app = workflow.compile()
+    return workflow.compile()
+
+# Create the LangGraph workflow
+def create_agent(use_cache: bool = True):
+    """Return the compiled LangGraph agent workflow.
+
+    The graph is compiled once per process and configuration and reused by
+    every run_agent call. Pass use_cache=False to get a private, freshly
+    compiled graph.
+    """
+    nodes = _agent_nodes()
+    if not use_cache:
+        return _build_agent(nodes)
     
+    key = _agent_cache_key(nodes)
+    app = _compiled_agents.get(key)
+    if app is None:
+        with _compiled_agents_lock:
+            app = _compiled_agents.get(key)
+            if app is None:
+                app = _build_agent(nodes)
+                _compiled_agents[key] = app
+                logger.info("Compiled agent graph")
     return app
 
-# Main function to run the agent
-async def run_agent(message: str, current_page: str = "/", user_role: str = "operator") -> Dict:
-    """Run the LangGraph agent with a user message"""
-    
-    # Create the agent
-    agent = create_agent()
-    
-    # Initialize state
-    state = {
+def invalidate_agent_cache():
+    """Drop every compiled graph; the next create_agent() call recompiles"""
+    with _compiled_agents_lock:
+        _compiled_agents.clear()
+
+def warm_up_agent():
+    """Startup hook: compile the graph and build the LLM client ahead of the first request"""
+    create_agent()
+    get_llm()
+
+async def shutdown_agent():
+    """Shutdown hook: close backend connections, this loop's async client first"""
+    await get_backend_client().aclose()
+    reset_backend_client()
+
+def _initial_state(message: str, current_page: str, user_role: str) -> Dict:
+    return {
         "messages": [HumanMessage(content=message)],
         "current_page": current_page,
         "user_role": user_role,
         "intent": "",
+        "intent_confidence": 0.0,
         "context": {},
+        "context_stats": {},
+        "speculative_intents": [],
         "response": {},
         "suggested_actions": [],
         "follow_up_questions": []
     }
+
+def _format_result(result: Dict) -> Dict:
+    """Shape a final graph state into the public run_agent response"""
+    response = result.get("response") or {}
+    return {
+        "response_message": response.get("response_message", "I'm sorry, I couldn't process your request."),
+        "suggested_actions": response.get("suggested_actions", []),
+        "follow_up_questions": response.get("follow_up_questions", []),
+        "intent": result.get("intent", ""),
+        "context": result.get("context", {}),
+        "context_stats": result.get("context_stats", {})
+    }
+
+def _error_result() -> Dict:
+    return {
+        "response_message": "I encountered an error while processing your request. Please try again.",
+        "suggested_actions": [],
+        "follow_up_questions": [],
+        "intent": "",
+        "context": {}
+    }
+
+# Main function to run the agent
+async def run_agent(message: str, current_page: str = "/", user_role: str = "operator",
+                    trace: bool = False, latency_budget_ms: Optional[float] = None) -> Dict:
+    """Run the LangGraph agent with a user message.
+
+    With trace=True the result carries a "trace" entry with per-node
+    timings, LLM token usage, payload sizes, cache hits and model routes
+    for this call. latency_budget_ms (default: the model policy's budget,
+    0 for none) bounds the LLM calls; see model_routing.py.
+    """
+    
+    # Reuse the compiled agent
+    agent = create_agent()
+    
+    # Initialize state
+    state = _initial_state(message, current_page, user_role)
+    budget = get_model_router().budget_ms if latency_budget_ms is None else latency_budget_ms
+    
+    async with request_scope(trace) as request_trace, latency_budget(budget):
+        try:
+            # Run the agent
+            result = _format_result(await agent.ainvoke(state))
+        except Exception as e:
+            logger.error(f"Error running agent: {e}")
+            result = _error_result()
+    if request_trace is not None:
+        result["trace"] = request_trace.to_dict()
+    return result
+
+class _FusedIntentGate:
+    """Holds a fused call's streamed text until its intent is known.
+
+    The text is released once the intent turns out to be covered by the
+    prefetched context, and dropped otherwise (the node then answers in a
+    second call, whose text streams instead).
+    """
+    
+    def __init__(self, candidates: List[str]):
+        self.candidates = candidates
+        self.parser = StreamingJSONParser(field=None, capture=("intent",))
+        self.buffer: List[str] = []
+        self.open: Optional[bool] = None
+    
+    def feed(self, text: str) -> str:
+        if self.open is not None:
+            return text if self.open else ""
+        self.buffer.append(text)
+        self.parser.feed(text)
+        intent = self.parser.values.get("intent")
+        if intent is None and not self.parser.complete:
+            return ""
+        # An answer without an intent keeps the local guess, which is covered
+        self.open = intent not in INTENTS or _prefetch_covers(intent, self.candidates)
+        return "".join(self.buffer) if self.open else ""
+
+async def stream_agent(message: str, current_page: str = "/", user_role: str = "operator",
+                       latency_budget_ms: Optional[float] = None) -> AsyncIterator[Dict]:
+    """Run the agent and yield events as soon as each stage produces them.
+
+    Events, in order:
+        {"type": "intent", "intent": ..., "confidence": ...}
+        {"type": "token", "text": ...}          (zero or more)
+        {"type": "final", **run_agent response}
+
+    In fused mode the intent of a message the local model is unsure of comes
+    from the response call, so its intent event follows the token events.
+
+    Token text is the response_message field decoded incrementally from the
+    response generator's LLM output (via the graph's "messages" stream, with
+    llm_json.StreamingJSONParser); template responses and unstructured
+    completions arrive as a single token event. latency_budget_ms works as in run_agent.
+    """
+    agent = create_agent()
+    state = _initial_state(message, current_page, user_role)
+    extractor = StreamingJSONParser()
+    streamed_tokens = False
+    intent_sent = False
+    fused_run, fused_gate = None, None
+    budget = get_model_router().budget_ms if latency_budget_ms is None else latency_budget_ms
     
     try:
-        # Run the agent
-        result = await agent.ainvoke(state)
-        
-        # Extract the response
-        response = result["response"]
+        async with latency_budget(budget):
+            async for mode, chunk in agent.astream(state, stream_mode=["updates", "messages"]):
+                if mode == "messages":
+                    message_chunk, metadata = chunk
+                    if metadata.get("langgraph_node") != "response_generator":
+                        continue
+                    content = message_chunk.content if isinstance(message_chunk.content, str) else ""
+                    if state.get("speculative_intents"):
+                        # First LLM run of a fused response node: gate it on its intent
+                        if fused_gate is None:
+                            fused_run = getattr(message_chunk, "id", None)
+                            fused_gate = _FusedIntentGate(state["speculative_intents"])
+                        if getattr(message_chunk, "id", None) == fused_run:
+                            content = fused_gate.feed(content)
+                    text = extractor.feed(content) if content else ""
+                    if text:
+                        streamed_tokens = True
+                        yield {"type": "token", "text": text}
+                    continue
+            
+                for node, update in chunk.items():
+                    if not update:
+                        continue
+                    state.update(update)
+                    if not intent_sent and state.get("intent") and not state.get("speculative_intents"):
+                        intent_sent = True
+                        yield {
+                            "type": "intent",
+                            "intent": state.get("intent", ""),
+                            "confidence": state.get("intent_confidence", 0.0)
+                        }
         
-        return {
-            "response_message": response.get("response_message", "I'm sorry, I couldn't process your request."),
-            "suggested_actions": response.get("suggested_actions", []),
-            "follow_up_questions": response.get("follow_up_questions", []),
-            "intent": result.get("intent", ""),
-            "context": result.get("context", {})
-        }
+        final = _format_result(state)
+        if not streamed_tokens:
+            yield {"type": "token", "text": final["response_message"]}
+        yield {"type": "final", **final}
         
     except Exception as e:
-        logger.error(f"Error running agent: {e}")
-        return {
-            "response_message": "I encountered an error while processing your request. Please try again.",
-            "suggested_actions": [],
-            "follow_up_questions": [],
-            "intent": "",
-            "context": {}
-        }
+        logger.error(f"Error streaming agent: {e}")
+        yield {"type": "final", **_error_result()}
+
+async def _classify_batch(messages: List[str], max_concurrency: int) -> List[tuple]:
+    """Classify many messages, sending only the unsettled ones to the LLM in one batch"""
+    results = [_local_intent(message) for message in messages]
+    unsettled = [index for index, result in enumerate(results) if not result.settled]
+    
+    llm, tier = _route_llm("intent") if unsettled else (None, None)
+    if llm:
+        chain = INTENT_PROMPT | llm
+        started = time.perf_counter()
+        with span("llm", "intent"):
+            replies = await chain.abatch(
+                [{"message": messages[index]} for index in unsettled],
+                config={"max_concurrency": max_concurrency},
+                return_exceptions=True
+            )
+        # Calls run max_concurrency at a time; the router wants the latency of one
+        waves = -(-len(unsettled) // max(1, max_concurrency))
+        get_model_router().observe(tier, (time.perf_counter() - started) / waves)
+        for index, reply in zip(unsettled, replies):
+            intent, confidence = results[index][:2]
+            if isinstance(reply, Exception):
+                logger.error(f"Batch intent classification failed: {reply}")
+                continue
+            record_llm_usage("intent", reply)
+            results[index] = LocalIntent(*_resolve_llm_intent(_llm_text(reply), intent, confidence), True, False)
+    
+    classified = []
+    for message, (intent, confidence, settled, cached) in zip(messages, results):
+        if settled and not cached:
+            get_intent_cache().put(message, intent, confidence)
+        classified.append((intent, confidence))
+    return classified
+
+async def run_agent_batch(messages: List[Any], current_page: str = "/", user_role: str = "operator",
+                          max_concurrency: int = 8) -> List[Dict]:
+    """Run the agent over many messages, sharing classification and context fetching.
+
+    messages may be strings or dicts with "message" and optional
+    "current_page"/"user_role". Intents are classified together (one batched
+    LLM call for the uncertain ones), each context table the batch needs is
+    fetched once, and responses are generated with at most max_concurrency
+    in flight. Results come back in input order with the run_agent shape; a
+    failed item gets the error response plus an "error" field.
+    """
+    items = [item if isinstance(item, dict) else {"message": item} for item in messages]
+    texts = [str(item.get("message", "")) for item in items]
+    if not items:
+        return []
+    
+    try:
+        intents = await _classify_batch(texts, max_concurrency)
+    except Exception as e:
+        logger.error(f"Error classifying batch: {e}")
+        intents = [(classify_intent(text).intent, 0.0) for text in texts]
+    
+    # One fetch per context table for the whole batch
+    keys = sorted({key for intent, _ in intents for key in _context_keys(intent)})
+    fetched = await asyncio.gather(*(CONTEXT_SOURCES[key][2]() for key in keys), return_exceptions=True)
+    shared_context = {}
+    for key, value in zip(keys, fetched):
+        if isinstance(value, BaseException):
+            logger.error(f"Error gathering {key} context: {value!r}")
+        else:
+            shared_context[key] = value
+    
+    semaphore = asyncio.Semaphore(max_concurrency)
+    
+    async def generate(item: Dict, text: str, intent: str, confidence: float) -> Dict:
+        state = _initial_state(text, item.get("current_page") or current_page, item.get("user_role") or user_role)
+        state["intent"] = intent
+        state["intent_confidence"] = confidence
+        keys = [key for key in _context_keys(intent) if key in shared_context]
+        # Tables are fetched whole once per batch and narrowed per message
+        filters = _context_filters(text, keys)
+        state["context"] = {key: apply_query(key, shared_context[key], filters[key])[0] if key in filters
+                            else shared_context[key] for key in keys}
+        if filters:
+            state["context"]["filters"] = filters
+        try:
+            async with semaphore:
+                # to_thread copies the request's context (trace, latency budget) into the worker thread
+                state = await asyncio.to_thread(response_generator, state)
+            return _format_result(state)
+        except Exception as e:
+            logger.error(f"Error running agent on batch item: {e}")
+            return {**_error_result(), "intent": intent, "error": str(e)}
+    
+    return await asyncio.gather(*(
+        generate(item, text, intent, confidence)
+        for item, text, (intent, confidence) in zip(items, texts, intents)
+    ))
 
 # Test function
 async def test_agent():
@@ -625,5 +1370,12 @@ async def test_agent():
         print("-" * 50)
 
 if __name__ == "__main__":
-    # Run test if executed directly
-    asyncio.run(test_agent()) 
\ No newline at end of file
+    if "--worker" in sys.argv:
+        # Resident worker mode (JSON lines over stdin/stdout or a socket, see agent_worker.py)
+        sys.modules.setdefault("langgraph_agent", sys.modules[__name__])
+        from agent_worker import main as worker_main
+        worker_main([arg for arg in sys.argv[1:] if arg != "--worker"])
+    else:
+        # Run test if executed directly
+        warm_up_agent()
+        asyncio.run(test_agent()) 
\ No newline at end of file
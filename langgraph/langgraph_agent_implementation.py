@@ -4,15 +4,16 @@ A comprehensive AI assistant for the SC Micro Enterprise Management System
 """
 
 import json
-from typing import Dict, List, Any, Optional
-from datetime import datetime, timedelta
+from typing import Dict, List, Any, AsyncIterator
 import asyncio
 from langgraph.graph import StateGraph, END
-from langgraph.prebuilt import ToolNode
-from langchain_core.messages import HumanMessage, AIMessage
-from langchain_openai import ChatOpenAI
-from langchain_core.tools import tool
-import pandas as pd
+from langchain_core.messages import HumanMessage
+
+from agent_cache import context_fingerprint
+from agent_metrics import instrument, record_cache, record_llm_usage
+from llm_registry import get_registry
+from metrics_engine import compute_dashboard_metrics
+from semantic_cache import get_semantic_cache, semantic_cache_enabled
 
 # Mock data for demonstration
 MOCK_WORK_REQUESTS = [
@@ -61,7 +62,11 @@ class SCMicroAssistant:
     """Main assistant class for SC Micro Enterprise Management System"""
     
     def __init__(self, openai_api_key: str):
-        self.llm = ChatOpenAI(api_key=openai_api_key, temperature=0.1)
+        # Shared with run_agent through the process-wide registry
+        self.llm = get_registry().get("openai", api_key=openai_api_key, temperature=0.1)
+        if self.llm is None:
+            # Every node needs the LLM; fail here as ChatOpenAI() itself would
+            raise RuntimeError("OpenAI LLM client could not be initialized")
         self.graph = self._build_graph()
         
     def _build_graph(self) -> StateGraph:
@@ -76,21 +81,26 @@ class SCMicroAssistant:
             "work_requests": List[Dict],
             "customers": List[Dict], 
             "projects": List[Dict],
+            "intent": str,
             "node_outputs": Dict,
             "final_response": Dict
         })
         
-        # Add nodes
-        workflow.add_node("user_input_processor", self._process_user_input)
-        workflow.add_node("dashboard_analyzer", self._analyze_dashboard)
-        workflow.add_node("work_request_assistant", self._assist_work_requests)
-        workflow.add_node("customer_relationship_manager", self._manage_customer_relationships)
-        workflow.add_node("project_optimizer", self._optimize_projects)
-        workflow.add_node("data_import_export_helper", self._help_data_operations)
-        workflow.add_node("report_generator", self._generate_reports)
-        workflow.add_node("navigation_helper", self._help_navigation)
-        workflow.add_node("error_troubleshooter", self._troubleshoot_errors)
-        workflow.add_node("response_generator", self._generate_response)
+        # Add nodes, timed under "assistant.<node>" (see agent_metrics.py)
+        nodes = {
+            "user_input_processor": self._process_user_input,
+            "dashboard_analyzer": self._analyze_dashboard,
+            "work_request_assistant": self._assist_work_requests,
+            "customer_relationship_manager": self._manage_customer_relationships,
+            "project_optimizer": self._optimize_projects,
+            "data_import_export_helper": self._help_data_operations,
+            "report_generator": self._generate_reports,
+            "navigation_helper": self._help_navigation,
+            "error_troubleshooter": self._troubleshoot_errors,
+            "response_generator": self._generate_response,
+        }
+        for name, node in nodes.items():
+            workflow.add_node(name, instrument(node, "node", f"assistant.{name}"))
         
         # Add edges with conditional routing
         workflow.add_conditional_edges(
@@ -140,6 +150,7 @@ class SCMicroAssistant:
         """
         
         response = await self.llm.ainvoke([HumanMessage(content=classification_prompt)])
+        record_llm_usage("assistant_intent", response)
         intent = response.content.strip().lower()
         
         # Extract entities
@@ -147,6 +158,7 @@ class SCMicroAssistant:
         
         return {
             **state,
+            "intent": intent,
             "node_outputs": {
                 "intent": intent,
                 "entities": entities,
@@ -182,9 +194,10 @@ class SCMicroAssistant:
         customers = MOCK_CUSTOMERS
         
         # Calculate metrics
-        total_requests = len(work_requests)
-        pending_requests = len([wr for wr in work_requests if wr["status"] == "pending"])
-        completion_rate = 0.85  # Mock calculation
+        metrics = compute_dashboard_metrics(customers, work_requests, [])
+        total_requests = metrics["total_work_requests"]
+        pending_requests = metrics["pending_requests"]
+        completion_rate = metrics["completion_rate"]
         
         insights = []
         if pending_requests > 5:
@@ -209,7 +222,7 @@ class SCMicroAssistant:
                     "total_requests": total_requests,
                     "pending_requests": pending_requests,
                     "completion_rate": completion_rate,
-                    "average_project_time": 45  # days
+                    "average_project_time": metrics["average_project_time"]  # days
                 }
             }
         }
@@ -457,7 +470,22 @@ class SCMicroAssistant:
         Keep the response concise and focused.
         """
         
-        response = await self.llm.ainvoke([HumanMessage(content=response_prompt)])
+        # Paraphrases of an answered question with the same analysis results reuse its answer
+        cache = get_semantic_cache() if semantic_cache_enabled() else None
+        # Scoped by the intent this turn was routed on; specialists replace node_outputs
+        intent = state["intent"]
+        data_version = context_fingerprint(json.dumps(node_outputs, sort_keys=True, default=str))
+        cached = cache.get(intent, state["user_role"], data_version, user_message) if cache else None
+        if cache:
+            record_cache("assistant_responses", hit=cached is not None)
+        if cached is not None:
+            response_message = cached["response_message"]
+        else:
+            response = await self.llm.ainvoke([HumanMessage(content=response_prompt)])
+            record_llm_usage("assistant_response", response)
+            response_message = response.content
+            if cache and isinstance(response_message, str):
+                cache.put(intent, state["user_role"], data_version, user_message, {"response_message": response_message})
         
         # Generate suggested actions
         suggested_actions = []
@@ -471,7 +499,7 @@ class SCMicroAssistant:
         return {
             **state,
             "final_response": {
-                "response_message": response.content,
+                "response_message": response_message,
                 "suggested_actions": suggested_actions,
                 "follow_up_questions": [
                     "Would you like me to help you create a new work request?",
@@ -480,9 +508,8 @@ class SCMicroAssistant:
             }
         }
     
-    async def process_message(self, message: str, current_page: str = "/", user_role: str = "operator") -> Dict:
-        """Process a user message and return response"""
-        initial_state = {
+    def _initial_state(self, message: str, current_page: str, user_role: str) -> Dict:
+        return {
             "user_message": message,
             "current_page": current_page,
             "user_role": user_role,
@@ -490,13 +517,45 @@ class SCMicroAssistant:
             "work_requests": MOCK_WORK_REQUESTS,
             "customers": MOCK_CUSTOMERS,
             "projects": [],
+            "intent": "",
             "node_outputs": {},
             "final_response": {}
         }
+    
+    async def process_message(self, message: str, current_page: str = "/", user_role: str = "operator") -> Dict:
+        """Process a user message and return response"""
+        initial_state = self._initial_state(message, current_page, user_role)
         
         result = await self.graph.ainvoke(initial_state)
         return result["final_response"]
 
+    async def stream_message(self, message: str, current_page: str = "/", user_role: str = "operator") -> AsyncIterator[Dict]:
+        """Process a user message, yielding intent, response tokens and the final response as they arrive"""
+        state = self._initial_state(message, current_page, user_role)
+        streamed_tokens = False
+        
+        async for mode, chunk in self.graph.astream(state, stream_mode=["updates", "messages"]):
+            if mode == "messages":
+                message_chunk, metadata = chunk
+                if metadata.get("langgraph_node") == "response_generator" and isinstance(message_chunk.content, str) \
+                        and message_chunk.content:
+                    streamed_tokens = True
+                    yield {"type": "token", "text": message_chunk.content}
+                continue
+            
+            for node, update in chunk.items():
+                if not update:
+                    continue
+                state.update(update)
+                if node == "user_input_processor":
+                    outputs = update.get("node_outputs", {})
+                    yield {"type": "intent", "intent": outputs.get("intent", ""), "confidence": outputs.get("confidence", 0.0)}
+        
+        # Cached answers arrive whole
+        if not streamed_tokens:
+            yield {"type": "token", "text": state["final_response"].get("response_message", "")}
+        yield {"type": "final", **state["final_response"]}
+
 # Example usage
 async def main():
     """Example usage of the SC Micro Assistant"""
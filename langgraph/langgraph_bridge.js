@@ -7,6 +7,7 @@
 
 import { spawn } from 'child_process';
 import path from 'path';
+import readline from 'readline';
 import { fileURLToPath } from 'url';
 
 const __filename = fileURLToPath(import.meta.url);
@@ -15,6 +16,7 @@ const __dirname = path.dirname(__filename);
 class LangGraphBridge {
     constructor() {
         this.pythonProcess = null;
+        this.workerReady = null;
         this.isReady = false;
         this.pendingRequests = new Map();
         this.requestId = 0;
@@ -40,6 +42,9 @@ class LangGraphBridge {
                 await this.installPackages();
             }
             
+            // Start the resident worker so the first chat does not pay for setup
+            await this.startWorker();
+            
             console.log('✅ LangGraph agent initialized successfully');
             this.isReady = true;
             
@@ -121,103 +126,141 @@ class LangGraphBridge {
     }
 
     /**
-     * Process a chat message using the LangGraph agent
+     * Start the resident Python agent worker (JSON lines over stdin/stdout)
      */
-    async processMessage(message, currentPage = '/', userRole = 'operator') {
-        if (!this.isReady) {
-            // Fallback to mock response if LangGraph is not available
-            return this.getMockResponse(message);
+    startWorker() {
+        if (this.workerReady) {
+            return this.workerReady;
         }
 
-        return new Promise(async (resolve, reject) => {
-            const requestId = ++this.requestId;
-            
-            // Create a temporary Python script for this request
-            const tempScript = await this.createTempScript(message, currentPage, userRole, requestId);
-            
-            const python = spawn('python3', [tempScript]);
-            let output = '';
-            let error = '';
-            
-            python.stdout.on('data', (data) => {
-                output += data.toString();
+        this.workerReady = new Promise((resolve, reject) => {
+            const worker = spawn('python3', [path.join(__dirname, 'langgraph_agent.py'), '--worker'], {
+                cwd: __dirname,
+                stdio: ['pipe', 'pipe', 'pipe']
             });
-            
-            python.stderr.on('data', (data) => {
-                error += data.toString();
-            });
-            
-            python.on('close', (code) => {
-                // Clean up temp script
+            this.pythonProcess = worker;
+
+            const lines = readline.createInterface({ input: worker.stdout });
+            lines.on('line', (line) => {
+                let message;
                 try {
-                    import('fs').then(fs => fs.unlinkSync(tempScript));
+                    message = JSON.parse(line);
                 } catch (e) {
-                    // Ignore cleanup errors
+                    console.error('Invalid message from LangGraph worker:', line);
+                    return;
+                }
+
+                if (message.type === 'ready') {
+                    console.log(`✅ LangGraph worker ready (pid ${message.pid})`);
+                    resolve(worker);
+                    return;
+                }
+
+                if (message.type === 'error' && message.id == null) {
+                    // A request line the worker could not read (e.g. over its size limit)
+                    console.error('LangGraph worker error:', message.error);
+                    return;
+                }
+
+                const pending = this.pendingRequests.get(message.id);
+                if (!pending) {
+                    return;
                 }
-                
-                if (code === 0 && output.trim()) {
-                    try {
-                        const response = JSON.parse(output.trim());
-                        resolve(response);
-                    } catch (e) {
-                        console.error('Failed to parse LangGraph response:', e);
-                        resolve(this.getMockResponse(message));
-                    }
+                this.pendingRequests.delete(message.id);
+                clearTimeout(pending.timer);
+                if (message.type === 'result') {
+                    pending.resolve(message.result);
                 } else {
-                    console.error('LangGraph agent error:', error);
-                    resolve(this.getMockResponse(message));
+                    pending.reject(new Error(message.error || `Unexpected worker reply: ${message.type}`));
                 }
             });
-            
-            python.on('error', (err) => {
-                console.error('Failed to spawn Python process:', err);
-                resolve(this.getMockResponse(message));
+
+            worker.stderr.on('data', (data) => {
+                console.error(`🐍 ${data.toString().trim()}`);
+            });
+
+            // Writes after the worker died (EPIPE) must not become uncaught exceptions
+            worker.stdin.on('error', (err) => {
+                console.error('LangGraph worker stdin error:', err.message);
+                this.rejectPending(new Error('LangGraph worker is not accepting requests'));
+            });
+
+            worker.on('error', (err) => {
+                console.error('Failed to spawn LangGraph worker:', err);
+                reject(err);
+            });
+
+            worker.on('close', (code) => {
+                console.log(`LangGraph worker exited with code ${code}`);
+                this.pythonProcess = null;
+                this.workerReady = null;
+                reject(new Error('LangGraph worker exited before becoming ready'));
+                this.rejectPending(new Error('LangGraph worker exited'));
             });
         });
+
+        return this.workerReady;
+    }
+
+    /**
+     * Fail every request still waiting for a worker reply
+     */
+    rejectPending(error) {
+        for (const pending of this.pendingRequests.values()) {
+            clearTimeout(pending.timer);
+            pending.reject(error);
+        }
+        this.pendingRequests.clear();
+    }
+
+    /**
+     * Send one request to the worker and wait for its reply
+     */
+    async sendToWorker(payload, timeoutMs = 60000) {
+        const worker = await this.startWorker();
+        const id = String(++this.requestId);
+
+        return new Promise((resolve, reject) => {
+            const timer = setTimeout(() => {
+                this.pendingRequests.delete(id);
+                reject(new Error('LangGraph worker request timed out'));
+            }, timeoutMs);
+
+            this.pendingRequests.set(id, { resolve, reject, timer });
+            worker.stdin.write(JSON.stringify({ id, ...payload }) + '\n');
+        });
     }
 
     /**
-     * Create a temporary Python script for processing a single request
+     * Process a chat message using the LangGraph agent
      */
-    async createTempScript(message, currentPage, userRole, requestId) {
-        const fs = await import('fs');
-        const tempScript = `temp_agent_${requestId}.py`;
-        
-        const scriptContent = `
-#!/usr/bin/env python3
-import sys
-import json
-import asyncio
-import os
-
-# Add current directory to Python path
-sys.path.append('${__dirname}')
-
-try:
-    from langgraph_agent import run_agent
-    
-    async def main():
-        response = await run_agent(
-            message="${message.replace(/"/g, '\\"')}",
-            current_page="${currentPage}",
-            user_role="${userRole}"
-        )
-        print(json.dumps(response))
-    
-    asyncio.run(main())
-    
-except Exception as e:
-    print(json.dumps({
-        "response_message": f"Error: {str(e)}",
-        "suggested_actions": [],
-        "follow_up_questions": [],
-        "intent": "",
-        "context": {}
-    }))
-`;
-        
-        fs.writeFileSync(tempScript, scriptContent);
-        return tempScript;
+    async processMessage(message, currentPage = '/', userRole = 'operator') {
+        if (!this.isReady) {
+            // Fallback to mock response if LangGraph is not available
+            return this.getMockResponse(message);
+        }
+
+        try {
+            return await this.sendToWorker({
+                type: 'chat',
+                message,
+                current_page: currentPage,
+                user_role: userRole
+            });
+        } catch (error) {
+            console.error('LangGraph agent error:', error.message);
+            return this.getMockResponse(message);
+        }
+    }
+
+    /**
+     * Ask the worker to finish in-flight requests and exit
+     */
+    shutdown() {
+        if (this.pythonProcess) {
+            this.pythonProcess.stdin.write(JSON.stringify({ id: 'shutdown', type: 'shutdown' }) + '\n');
+            this.pythonProcess.stdin.end();
+        }
     }
 
     /**
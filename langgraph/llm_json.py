@@ -0,0 +1,265 @@
+#!/usr/bin/env python3
+"""
+SC Micro LLM JSON
+Incremental parser for JSON answers streamed by the LLM, tolerant of code fences, prose and truncation.
+"""
+
+import re
+import json
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+_ESCAPES = {'"': '"', '\\': '\\', '/': '/', 'b': '\b', 'f': '\f', 'n': '\n', 'r': '\r', 't': '\t'}
+_FENCES = re.compile(r"^```json\s*|^```\s*|\s*```$", re.IGNORECASE | re.MULTILINE)
+_STRING_SPECIAL = re.compile(r'["\\]')
+_SCALAR_END = re.compile(r'[\s,\]}]')
+_CLOSERS = {"{": "}", "[": "]"}
+
+
+def strip_code_fences(text: str) -> str:
+    """Remove markdown code block formatting from LLM output"""
+    return _FENCES.sub("", text.strip()).strip()
+
+
+class StreamingJSONParser:
+    """Parses the first JSON object in LLM output as it streams in.
+
+    Text before the object (code fences, a sentence of preamble) and after
+    it is skipped. feed() returns the newly decoded characters of `field`,
+    a top-level string, so the answer can be shown while it is generated;
+    top-level strings named in `capture` are kept in `values` once complete.
+    close() returns the object, repairing a truncated one: a top-level
+    string (the answer text) is closed where it stopped, anything after
+    the last complete value (a key without a value, half a number or a
+    nested string, a trailing comma) is dropped and open arrays and
+    objects are closed.
+    """
+
+    def __init__(self, field: Optional[str] = "response_message", capture: Iterable[str] = ()):
+        self.field = field
+        self.capture = frozenset(capture)
+        self.values: Dict[str, str] = {}
+        # True once the object's closing brace has been seen
+        self.complete = False
+        self._raw: List[str] = []          # JSON text consumed, from the opening brace
+        self._length = 0
+        self._stack: List[str] = []        # open containers, "{" or "["
+        self._state = "seek"
+        self._pending = ""                 # escape sequence split across chunks
+        self._scalar = ""
+        self._key = ""                     # last key of the top-level object
+        self._decoded: Optional[List[str]] = None  # decoded characters of a key or watched string
+        self._is_key = False
+        self._emit = False
+        self._safe = (0, ())               # (length, open containers) after the last complete value
+
+    def _append(self, text: str):
+        self._raw.append(text)
+        self._length += len(text)
+
+    def _mark_safe(self):
+        self._safe = (self._length, tuple(self._stack))
+
+    def _open(self, char: str):
+        self._append(char)
+        self._stack.append(char)
+        self._state = "key" if char == "{" else "value"
+        self._mark_safe()
+
+    def _close(self, char: str):
+        if not self._stack or _CLOSERS[self._stack[-1]] != char:
+            self._state = "invalid"
+            return
+        if self._raw and self._raw[-1] == ",":
+            # Trailing comma before the closer
+            self._raw.pop()
+            self._length -= 1
+        self._append(char)
+        self._stack.pop()
+        self._mark_safe()
+        if self._stack:
+            self._state = "after"
+        else:
+            self._state = "done"
+            self.complete = True
+
+    def _start_string(self, is_key: bool):
+        self._append('"')
+        self._is_key = is_key
+        top_level = len(self._stack) == 1
+        self._emit = not is_key and top_level and self._key == self.field
+        captured = not is_key and top_level and self._key in self.capture
+        self._decoded = [] if (is_key and top_level) or self._emit or captured else None
+        self._state = "string"
+
+    def _end_string(self):
+        self._append('"')
+        decoded = "".join(self._decoded) if self._decoded is not None else None
+        self._decoded = None
+        self._emit = False
+        if self._is_key:
+            if decoded is not None:
+                self._key = decoded
+            self._state = "colon"
+            return
+        if decoded is not None and self._key in self.capture:
+            self.values[self._key] = decoded
+        self._mark_safe()
+        self._state = "after"
+
+    def _escape(self, text: str, index: int) -> Tuple[Optional[str], int]:
+        """Decode the escape at text[index]; (None, index) when the chunk ends inside it"""
+        if index + 1 >= len(text):
+            return None, index
+        kind = text[index + 1]
+        if kind != "u":
+            return _ESCAPES.get(kind, kind), index + 2
+        if index + 6 > len(text):
+            return None, index
+        try:
+            code = int(text[index + 2:index + 6], 16)
+        except ValueError:
+            return "\ufffd", index + 6
+        if 0xD800 <= code < 0xDC00:
+            # High surrogate: combine with the low half that should follow
+            if index + 12 > len(text):
+                return None, index
+            if text[index + 6:index + 8] == "\\u":
+                try:
+                    low = int(text[index + 8:index + 12], 16)
+                except ValueError:
+                    low = 0
+                if 0xDC00 <= low < 0xE000:
+                    return chr(0x10000 + ((code - 0xD800) << 10) + (low - 0xDC00)), index + 12
+            return "\ufffd", index + 6
+        return chr(code), index + 6
+
+    def feed(self, text: str) -> str:
+        """Consume a chunk; return the newly decoded characters of `field`"""
+        if self._pending:
+            text, self._pending = self._pending + text, ""
+        out: List[str] = []
+        index, end = 0, len(text)
+        while index < end and self._state not in ("done", "invalid"):
+            state = self._state
+            if state == "string":
+                match = _STRING_SPECIAL.search(text, index)
+                stop = match.start() if match else end
+                if stop > index:
+                    chunk = text[index:stop]
+                    self._append(chunk)
+                    if self._decoded is not None:
+                        self._decoded.append(chunk)
+                    if self._emit:
+                        out.append(chunk)
+                    index = stop
+                    continue
+                if text[index] == '"':
+                    self._end_string()
+                    index += 1
+                    continue
+                decoded, after = self._escape(text, index)
+                if decoded is None:
+                    self._pending = text[index:]
+                    break
+                self._append(text[index:after])
+                if self._decoded is not None:
+                    self._decoded.append(decoded)
+                if self._emit:
+                    out.append(decoded)
+                index = after
+                continue
+
+            char = text[index]
+            if state == "seek":
+                start = text.find("{", index)
+                if start < 0:
+                    break
+                self._open("{")
+                index = start + 1
+                continue
+            if state == "scalar":
+                match = _SCALAR_END.search(text, index)
+                stop = match.start() if match else end
+                self._scalar += text[index:stop]
+                index = stop
+                if match:
+                    self._append(self._scalar)
+                    self._scalar = ""
+                    self._mark_safe()
+                    self._state = "after"
+                continue
+            index += 1
+            if char.isspace():
+                continue
+            if state == "key":
+                if char == '"':
+                    self._start_string(is_key=True)
+                elif char == "}":
+                    self._close(char)
+                elif char != ",":
+                    self._state = "invalid"
+            elif state == "colon":
+                if char == ":":
+                    self._append(char)
+                    self._state = "value"
+                else:
+                    self._state = "invalid"
+            elif state == "value":
+                if char == '"':
+                    self._start_string(is_key=False)
+                elif char in "{[":
+                    self._open(char)
+                elif char in "]}":
+                    self._close(char)
+                elif char in "-0123456789tfn":
+                    self._scalar = char
+                    self._state = "scalar"
+                else:
+                    self._state = "invalid"
+            elif state == "after":
+                if char == ",":
+                    self._append(char)
+                    self._state = "key" if self._stack[-1] == "{" else "value"
+                elif char in "]}":
+                    self._close(char)
+                else:
+                    self._state = "invalid"
+        return "".join(out)
+
+    def close(self) -> Optional[Any]:
+        """The parsed object, repaired if the text stopped early; None if there is none"""
+        if self._state in ("seek", "invalid"):
+            return None
+        raw = "".join(self._raw)
+        if self._state == "scalar" and self._scalar:
+            # A number or literal at the very end of the text may be whole
+            candidate = raw + self._scalar + "".join(_CLOSERS[c] for c in reversed(self._stack))
+            try:
+                return json.loads(candidate)
+            except ValueError:
+                pass
+        if self._state == "string" and not self._is_key and len(self._stack) == 1:
+            text = raw + '"' + "".join(_CLOSERS[c] for c in reversed(self._stack))
+        else:
+            length, stack = self._safe
+            text = raw[:length].rstrip().rstrip(",") + "".join(_CLOSERS[c] for c in reversed(stack))
+        try:
+            return json.loads(text)
+        except ValueError:
+            return None
+
+
+def parse_llm_json(text: str) -> Tuple[Optional[Any], bool]:
+    """(value, repaired) for a whole LLM answer.
+
+    Well-formed JSON, fenced or not, takes the plain json.loads path; other
+    text goes through StreamingJSONParser. value is None when no object can
+    be recovered.
+    """
+    try:
+        return json.loads(strip_code_fences(text)), False
+    except ValueError:
+        pass
+    parser = StreamingJSONParser(field=None)
+    parser.feed(text)
+    return parser.close(), not parser.complete
@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+"""
+SC Micro LLM Provider Registry
+Process-wide cache of long-lived LLM clients shared by every agent entry point.
+"""
+
+import os
+import hashlib
+import logging
+import threading
+from typing import Any, Dict, Optional, Tuple
+
+from agent_env import env_float, env_int
+
+logger = logging.getLogger(__name__)
+
+# Environment variables that influence which client get_llm() returns
+LLM_ENV_VARS = (
+    "OPENAI_API_KEY",
+    "ANTHROPIC_API_KEY",
+    "OLLAMA_BASE_URL",
+    "OLLAMA_MODEL",
+    "TEMPERATURE",
+    "MAX_TOKENS",
+)
+
+DEFAULT_MODELS = {
+    "openai": "gpt-4-turbo-preview",
+    "anthropic": "claude-3-sonnet-20240229",
+    "ollama": "llama2",
+}
+
+# Parameters whose values must never end up in a registry key verbatim
+SECRET_PARAMS = ("api_key",)
+
+
+# Provider SDKs are imported by their builder on first use: each one costs
+# most of a second at import time and only one provider is ever active
+def _build_openai(model: Optional[str], params: Dict[str, Any]):
+    from langchain_openai import ChatOpenAI
+    if model:
+        params = {**params, "model": model}
+    return ChatOpenAI(**params)
+
+
+def _build_anthropic(model: Optional[str], params: Dict[str, Any]):
+    from langchain_anthropic import ChatAnthropic
+    if model:
+        params = {**params, "model": model}
+    return ChatAnthropic(**params)
+
+
+def _build_ollama(model: Optional[str], params: Dict[str, Any]):
+    from langchain_community.llms import Ollama
+    if model:
+        params = {**params, "model": model}
+    return Ollama(**params)
+
+
+PROVIDER_BUILDERS = {
+    "openai": _build_openai,
+    "anthropic": _build_anthropic,
+    "ollama": _build_ollama,
+}
+
+
+class LLMRegistry:
+    """Builds each LLM client once and hands out the same instance afterwards.
+
+    Clients are keyed by provider, model and constructor parameters so that
+    callers asking for the same configuration share one client (and with it
+    the underlying HTTP connection pool and TLS sessions). The registry
+    watches the LLM-related environment variables and drops every cached
+    client when they change, so rotating a key or switching provider takes
+    effect on the next request without a restart.
+    """
+
+    def __init__(self):
+        self._clients: Dict[Tuple, Any] = {}
+        self._lock = threading.RLock()
+        self._env_fingerprint = self._read_env_fingerprint()
+
+    @staticmethod
+    def _read_env_fingerprint() -> Tuple:
+        return tuple(os.getenv(name) for name in LLM_ENV_VARS)
+
+    @staticmethod
+    def _make_key(provider: str, model: Optional[str], params: Dict[str, Any]) -> Tuple:
+        items = []
+        for name, value in sorted(params.items()):
+            if name in SECRET_PARAMS and value is not None:
+                value = hashlib.sha256(str(value).encode("utf-8")).hexdigest()
+            items.append((name, value))
+        return (provider, model, tuple(items))
+
+    def _check_env(self):
+        fingerprint = self._read_env_fingerprint()
+        if fingerprint != self._env_fingerprint:
+            logger.info("LLM environment changed, reloading provider registry")
+            self._clients.clear()
+            self._env_fingerprint = fingerprint
+
+    def resolve_default(self) -> Tuple[Optional[str], Optional[str], Dict[str, Any]]:
+        """Return the (provider, model, params) configured by the environment"""
+        temperature = env_float("TEMPERATURE", 0.1)
+        max_tokens = env_int("MAX_TOKENS", 2000)
+
+        # Try OpenAI first, then Anthropic Claude, then local Ollama
+        if os.getenv("OPENAI_API_KEY"):
+            return "openai", DEFAULT_MODELS["openai"], {"temperature": temperature, "max_tokens": max_tokens}
+        if os.getenv("ANTHROPIC_API_KEY"):
+            return "anthropic", DEFAULT_MODELS["anthropic"], {"temperature": temperature, "max_tokens": max_tokens}
+        params: Dict[str, Any] = {"temperature": temperature}
+        if os.getenv("OLLAMA_BASE_URL"):
+            params["base_url"] = os.getenv("OLLAMA_BASE_URL")
+        return "ollama", os.getenv("OLLAMA_MODEL", DEFAULT_MODELS["ollama"]), params
+
+    def get(self, provider: Optional[str] = None, model: Optional[str] = None, **params):
+        """Return a shared client, building it on first use.
+
+        With no provider the environment default is used, mirroring the
+        OpenAI -> Anthropic -> Ollama fallback order. Returns None when the
+        provider cannot be initialized; that outcome is cached too so a
+        missing Ollama install is not retried on every turn. Callers that
+        have no template fallback must check for None.
+        """
+        with self._lock:
+            self._check_env()
+            if provider is None:
+                provider, default_model, default_params = self.resolve_default()
+                model = model or default_model
+                params = {**default_params, **params}
+
+            key = self._make_key(provider, model, params)
+            if key in self._clients:
+                return self._clients[key]
+
+            builder = PROVIDER_BUILDERS.get(provider)
+            if builder is None:
+                raise ValueError(f"Unknown LLM provider: {provider}")
+
+            try:
+                client = builder(model, params)
+                logger.info(f"Initialized {provider} LLM client ({model or 'default model'})")
+            except Exception as e:
+                logger.warning(f"No LLM configured. Using template responses. Error: {e}")
+                client = None
+
+            self._clients[key] = client
+            return client
+
+    def reload(self):
+        """Drop every cached client; the next get() rebuilds from the environment"""
+        with self._lock:
+            self._clients.clear()
+            self._env_fingerprint = self._read_env_fingerprint()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "clients": len(self._clients),
+                "providers": sorted({key[0] for key in self._clients}),
+            }
+
+
+_registry: Optional[LLMRegistry] = None
+_registry_lock = threading.Lock()
+
+
+def get_registry() -> LLMRegistry:
+    """Return the process-wide LLM registry"""
+    global _registry
+    if _registry is None:
+        with _registry_lock:
+            if _registry is None:
+                _registry = LLMRegistry()
+    return _registry
@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+"""
+SC Micro Metrics Engine
+Dashboard KPIs maintained incrementally from customer, work request and project rows.
+"""
+
+import json
+import threading
+from collections import Counter
+from datetime import date, datetime, timezone
+from typing import Any, Dict, Iterable, List, Optional
+
+from data_filters import LIST_QUERIES
+
+OPEN_STATUSES = {table: frozenset(spec["open_statuses"]) for table, spec in LIST_QUERIES.items()}
+
+
+def _days(row: Dict[str, Any]) -> Optional[int]:
+    """Days from start_date to completion_date of a completed project"""
+    try:
+        started = date.fromisoformat(str(row.get("start_date"))[:10])
+        finished = date.fromisoformat(str(row.get("completion_date"))[:10])
+    except ValueError:
+        return None
+    days = (finished - started).days
+    return days if days >= 0 else None
+
+
+def _number(value: Any) -> float:
+    try:
+        return float(value or 0)
+    except (TypeError, ValueError):
+        return 0.0
+
+
+class DashboardMetrics:
+    """Dashboard KPIs kept as running counters.
+
+    changed() subtracts the contribution of removed rows and adds that of
+    added rows, so a row update costs O(1) and snapshot() never rescans a
+    table. The snapshot carries both the database API's keys
+    (totalWorkRequests, pendingWorkRequests, ...) and the KPIs the
+    dashboard templates use:
+
+        completion_rate       completed / all work requests
+        average_project_time  mean days from start_date to completion_date of completed projects
+        total_revenue         budget of every project that is not cancelled
+        active_customers      customers with an open work request or project
+        high_priority_items   open high-priority work requests and projects
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._totals: Counter = Counter()
+        self._statuses: Dict[str, Counter] = {"work_requests": Counter(), "projects": Counter()}
+        self._open_by_customer: Counter = Counter()
+        self._high_priority = 0
+        self._revenue = 0.0
+        self._duration_days = 0
+        self._durations = 0
+        self._loaded = set()
+        self._snapshot: Optional[Dict[str, Any]] = None
+        self.calculated_at: Optional[str] = None
+
+    def _apply(self, table: str, row: Dict[str, Any], sign: int):
+        self._totals[table] += sign
+        if table == "customers":
+            return
+        status = str(row.get("status") or "").lower()
+        self._statuses[table][status] += sign
+        is_open = status in OPEN_STATUSES[table]
+        if is_open and str(row.get("priority") or "").lower() == "high":
+            self._high_priority += sign
+        customer_id = row.get("customer_id")
+        if is_open and customer_id is not None:
+            self._open_by_customer[customer_id] += sign
+            if self._open_by_customer[customer_id] <= 0:
+                del self._open_by_customer[customer_id]
+        if table == "projects":
+            if status != "cancelled":
+                self._revenue += sign * _number(row.get("budget"))
+            if status == "completed":
+                days = _days(row)
+                if days is not None:
+                    self._duration_days += sign * days
+                    self._durations += sign
+
+    def changed(self, table: str, removed: Iterable[Dict[str, Any]] = (), added: Iterable[Dict[str, Any]] = (),
+                full: bool = False):
+        """Account for rows leaving and entering a table (full=True after a complete load)"""
+        if table not in LIST_QUERIES:
+            return
+        with self._lock:
+            for row in removed:
+                self._apply(table, row, -1)
+            for row in added:
+                self._apply(table, row, 1)
+            if full:
+                self._loaded.add(table)
+            self._snapshot = None
+            # UTC in SQLite's CURRENT_TIMESTAMP format, like the table's calculated_at
+            self.calculated_at = datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M:%S")
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Current KPIs; rebuilt at most once per change and never by scanning rows"""
+        with self._lock:
+            if self._snapshot is None:
+                work_requests = self._statuses["work_requests"]
+                total = self._totals["work_requests"]
+                self._snapshot = {
+                    "totalCustomers": self._totals["customers"],
+                    "totalWorkRequests": total,
+                    "totalProjects": self._totals["projects"],
+                    "pendingWorkRequests": work_requests["pending"],
+                    "activeProjects": self._statuses["projects"]["active"],
+                    "total_work_requests": total,
+                    "pending_requests": work_requests["pending"],
+                    "completed_requests": work_requests["completed"],
+                    "completion_rate": round(work_requests["completed"] / total, 4) if total else 0.0,
+                    "average_project_time": round(self._duration_days / self._durations, 1) if self._durations else 0,
+                    "total_revenue": round(self._revenue, 2),
+                    "active_customers": len(self._open_by_customer),
+                    "high_priority_items": self._high_priority,
+                    "complete": self._loaded >= set(LIST_QUERIES),
+                    "calculated_at": self.calculated_at,
+                }
+            return self._snapshot
+
+
+def compute_dashboard_metrics(customers: Iterable[Dict[str, Any]], work_requests: Iterable[Dict[str, Any]],
+                              projects: Iterable[Dict[str, Any]]) -> Dict[str, Any]:
+    """One-off KPIs for a set of tables"""
+    metrics = DashboardMetrics()
+    metrics.changed("customers", added=customers, full=True)
+    metrics.changed("work_requests", added=work_requests, full=True)
+    metrics.changed("projects", added=projects, full=True)
+    return metrics.snapshot()
+
+
+def snapshot_rows(metrics: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """A snapshot in the dashboard_metrics table's shape (metric_name, metric_value, calculated_at)"""
+    calculated_at = metrics.get("calculated_at")
+    return [{"metric_name": name, "metric_value": json.dumps(value), "calculated_at": calculated_at}
+            for name, value in metrics.items() if name not in ("calculated_at", "complete")]
@@ -0,0 +1,226 @@
+#!/usr/bin/env python3
+"""
+SC Micro Model Routing
+Maps each LLM stage and intent to a model tier and keeps calls within the request's latency budget.
+"""
+
+import os
+import json
+import time
+import logging
+import threading
+import contextvars
+from typing import Any, Dict, NamedTuple, Optional
+
+logger = logging.getLogger(__name__)
+
+# Tiers from cheapest to most capable; routing only ever downgrades along this order
+TIERS = ("small", "large")
+
+DEFAULT_POLICY: Dict[str, Any] = {
+    # Tier per LLM stage ("fused" classifies and answers in one call);
+    # "response" is refined per intent below
+    "stages": {"intent": "small", "response": "large", "fused": "large"},
+    # Response tier per intent (intents not listed use stages["response"])
+    "intents": {
+        "general_query": "small",
+        "navigation": "small",
+        "data_import_export": "small",
+        "error_troubleshooting": "small",
+    },
+    # Model per provider and tier; the large tier is the provider's default model
+    "models": {
+        "openai": {"small": "gpt-3.5-turbo", "large": "gpt-4-turbo-preview"},
+        "anthropic": {"small": "claude-3-haiku-20240307", "large": "claude-3-sonnet-20240229"},
+        "ollama": {},
+    },
+    # Expected call latency per tier until calls have been observed
+    "expected_ms": {"small": 1500, "large": 6000},
+    # Default per-request latency budget (0 for none)
+    "budget_ms": 15000,
+}
+
+# Weight of the newest call in the running latency estimate
+LATENCY_SMOOTHING = 0.2
+
+_deadline: "contextvars.ContextVar[Optional[float]]" = contextvars.ContextVar("agent_deadline", default=None)
+
+
+class Route(NamedTuple):
+    tier: Optional[str]  # None: answer without an LLM
+    reason: str          # "policy", "downgraded" or "over_budget"
+
+
+class latency_budget:
+    """Give the enclosed request a deadline of budget_ms from now (None or 0 for none).
+
+    Usable as a sync or async context manager, like request_scope; the
+    deadline is a context variable, so it follows the request into graph
+    nodes and executor threads.
+    """
+
+    def __init__(self, budget_ms: Optional[float]):
+        self.budget_ms = budget_ms
+        self._token = None
+
+    def __enter__(self) -> Optional[float]:
+        deadline = time.monotonic() + self.budget_ms / 1000.0 if self.budget_ms else None
+        self._token = _deadline.set(deadline)
+        return deadline
+
+    def __exit__(self, exc_type, exc, tb):
+        try:
+            _deadline.reset(self._token)
+        except ValueError:
+            # An async generator closed from another context (e.g. after its consumer gave up)
+            pass
+        return False
+
+    async def __aenter__(self) -> Optional[float]:
+        return self.__enter__()
+
+    async def __aexit__(self, exc_type, exc, tb):
+        return self.__exit__(exc_type, exc, tb)
+
+
+def remaining_ms() -> Optional[float]:
+    """Milliseconds left in the current request's budget, or None without one"""
+    deadline = _deadline.get()
+    return None if deadline is None else (deadline - time.monotonic()) * 1000.0
+
+
+def _merge(base: Dict[str, Any], override: Dict[str, Any]) -> Dict[str, Any]:
+    merged = dict(base)
+    for key, value in override.items():
+        merged[key] = _merge(base[key], value) if isinstance(value, dict) and isinstance(base.get(key), dict) else value
+    return merged
+
+
+def load_policy() -> Dict[str, Any]:
+    """DEFAULT_POLICY with the deployment's overrides.
+
+    AGENT_MODEL_POLICY holds JSON, or the path of a JSON file, in the shape
+    of DEFAULT_POLICY; only the keys it names are replaced.
+    AGENT_MODEL_SMALL / AGENT_MODEL_LARGE name the model of a tier for
+    whichever provider is active, and AGENT_LATENCY_BUDGET_MS sets the
+    default budget.
+    """
+    policy = DEFAULT_POLICY
+    raw = os.getenv("AGENT_MODEL_POLICY", "").strip()
+    if raw:
+        try:
+            if not raw.startswith("{"):
+                with open(raw, "r", encoding="utf-8") as f:
+                    raw = f.read()
+            policy = _merge(policy, json.loads(raw))
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring invalid AGENT_MODEL_POLICY: {e}")
+    budget = os.getenv("AGENT_LATENCY_BUDGET_MS")
+    if budget is not None:
+        try:
+            policy = {**policy, "budget_ms": float(budget)}
+        except ValueError:
+            logger.warning(f"Ignoring invalid AGENT_LATENCY_BUDGET_MS={budget!r}")
+    return policy
+
+
+class ModelRouter:
+    """Picks the model tier for each LLM call.
+
+    The policy names a tier per stage (and per intent for responses). With
+    a latency budget in effect the tier is kept only if its expected
+    latency fits in what is left of the budget; otherwise the next smaller
+    tier that fits is used, and when none does the caller answers without
+    an LLM (local intent model, template response). Expected latency starts
+    at the policy's expected_ms and follows observed calls (an exponential
+    moving average).
+    """
+
+    def __init__(self, policy: Optional[Dict[str, Any]] = None):
+        self.policy = policy if policy is not None else load_policy()
+        self._lock = threading.Lock()
+        self._latency_ms: Dict[str, float] = {tier: float(ms) for tier, ms in self.policy["expected_ms"].items()}
+        self._calls: Dict[str, int] = {tier: 0 for tier in TIERS}
+        self._routes: Dict[str, int] = {}
+
+    @property
+    def budget_ms(self) -> float:
+        return float(self.policy.get("budget_ms") or 0)
+
+    def tier_for(self, stage: str, intent: str = "") -> str:
+        tier = self.policy["stages"].get(stage, TIERS[-1])
+        if stage == "response":
+            tier = self.policy["intents"].get(intent, tier)
+        return tier if tier in TIERS else TIERS[-1]
+
+    def model_for(self, tier: str, provider: Optional[str]) -> Optional[str]:
+        """Model name of a tier for a provider; None keeps the provider's default"""
+        override = os.getenv(f"AGENT_MODEL_{tier.upper()}")
+        if override:
+            return override
+        return self.policy["models"].get(provider or "", {}).get(tier)
+
+    def expected_ms(self, tier: str) -> float:
+        return self._latency_ms.get(tier, 0.0)
+
+    def route(self, stage: str, intent: str = "") -> Route:
+        tier = self.tier_for(stage, intent)
+        remaining = remaining_ms()
+        route = Route(tier, "policy")
+        if remaining is not None and self.expected_ms(tier) > remaining:
+            smaller = [t for t in TIERS[:TIERS.index(tier)] if self.expected_ms(t) <= remaining]
+            route = Route(smaller[-1], "downgraded") if smaller else Route(None, "over_budget")
+            self._relax(tier)
+        with self._lock:
+            key = f"{stage}:{route.tier or 'none'}:{route.reason}"
+            self._routes[key] = self._routes.get(key, 0) + 1
+        return route
+
+    def _relax(self, tier: str):
+        # A skipped tier is not observed, so its estimate drifts back to the
+        # policy's expectation and the tier gets retried once a slow spell is over
+        expected = self.policy["expected_ms"].get(tier)
+        if expected is not None:
+            with self._lock:
+                current = self._latency_ms.get(tier, expected)
+                self._latency_ms[tier] = current + LATENCY_SMOOTHING * (float(expected) - current)
+
+    def observe(self, tier: str, seconds: float):
+        """Fold a finished call's latency into the tier's estimate"""
+        with self._lock:
+            previous = self._latency_ms.get(tier)
+            ms = seconds * 1000.0
+            self._latency_ms[tier] = ms if previous is None else previous + LATENCY_SMOOTHING * (ms - previous)
+            self._calls[tier] = self._calls.get(tier, 0) + 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "budget_ms": self.budget_ms,
+                "tiers": {tier: {"expected_ms": round(self._latency_ms.get(tier, 0.0), 1),
+                                 "calls": self._calls.get(tier, 0)} for tier in TIERS},
+                "routes": dict(self._routes),
+                "stages": dict(self.policy["stages"]),
+                "intents": dict(self.policy["intents"]),
+            }
+
+
+_router: Optional[ModelRouter] = None
+_router_lock = threading.Lock()
+
+
+def get_model_router() -> ModelRouter:
+    """Return the process-wide model router"""
+    global _router
+    if _router is None:
+        with _router_lock:
+            if _router is None:
+                _router = ModelRouter()
+    return _router
+
+
+def reset_model_router():
+    """Drop the router; the next call re-reads the policy from the environment"""
+    global _router
+    with _router_lock:
+        _router = None
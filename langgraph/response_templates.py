@@ -0,0 +1,486 @@
+#!/usr/bin/env python3
+"""
+SC Micro Response Templates
+Data-backed template responses for every intent, rendered from the gathered context without an LLM.
+"""
+
+import re
+import threading
+from collections import Counter, OrderedDict
+from string import Formatter
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from customer_index import get_customer_index
+from intent_model import INTENTS
+
+# Summarised lists show at most this many rows
+LIST_LIMIT = 5
+
+OPEN_STATUSES = frozenset({"pending", "in-progress", "active", "planning"})
+PRIORITY_RANK = {"high": 0, "medium": 1, "low": 2}
+
+
+def _action(action: str, description: str, route: str) -> Dict[str, str]:
+    return {"action": action, "description": description, "route": route}
+
+
+VIEW_DASHBOARD = _action("View Dashboard", "See current metrics", "/")
+VIEW_CUSTOMERS = _action("View Customers", "Customer overview", "/customers")
+CREATE_REQUEST = _action("Create Work Request", "Add new request", "/add-work-request")
+UPLOAD_CSV = _action("Upload CSV", "Import work orders or projects", "/csv-upload")
+
+# Suggested actions and follow-up questions per intent, built once
+ACTIONS: Dict[str, Tuple[Dict[str, str], ...]] = {
+    "general_query": (VIEW_DASHBOARD, CREATE_REQUEST, VIEW_CUSTOMERS),
+    "customer_management": (
+        _action("View All Customers", "See complete customer list", "/customers"),
+        CREATE_REQUEST,
+        _action("View Dashboard", "See overall metrics", "/"),
+    ),
+    "dashboard_analysis": (
+        _action("View All Requests", "See detailed work request list", "/"),
+        _action("Create New Request", "Add a new work request", "/add-work-request"),
+        _action("View Customers", "Check customer overview", "/customers"),
+    ),
+    "work_request_management": (
+        CREATE_REQUEST,
+        _action("View All Requests", "See detailed work request list", "/"),
+        UPLOAD_CSV,
+    ),
+    "project_tracking": (VIEW_DASHBOARD, VIEW_CUSTOMERS, UPLOAD_CSV),
+    "data_import_export": (UPLOAD_CSV, VIEW_DASHBOARD),
+    "reporting": (VIEW_DASHBOARD, VIEW_CUSTOMERS),
+    "navigation": (VIEW_DASHBOARD, VIEW_CUSTOMERS, CREATE_REQUEST, UPLOAD_CSV),
+    "error_troubleshooting": (UPLOAD_CSV, VIEW_DASHBOARD),
+}
+
+# Follow-up questions suggested per intent, and the intent each one has
+FOLLOW_UPS: Dict[str, Tuple[str, ...]] = {
+    "general_query": (
+        "Show me the dashboard overview",
+        "How do I create a work request?",
+        "What customers do we have?",
+    ),
+    "customer_management": (
+        "Tell me about TechCorp Industries",
+        "Show me our Premium customers",
+        "Which customer has the most projects?",
+    ),
+    "dashboard_analysis": (
+        "Show me high-priority pending requests",
+        "What's the completion rate for this month?",
+        "Which customers have the most active projects?",
+    ),
+    "work_request_management": (
+        "Show me high-priority pending requests",
+        "How do I create a work request?",
+        "Show me the dashboard overview",
+    ),
+    "project_tracking": (
+        "Which projects are over budget?",
+        "Show me active projects",
+        "Show me the dashboard overview",
+    ),
+    "data_import_export": (
+        "What columns does the CSV need?",
+        "Show me the dashboard overview",
+    ),
+    "reporting": (
+        "Show me the dashboard overview",
+        "What customers do we have?",
+        "Show me active projects",
+    ),
+    "navigation": (
+        "How do I create a work request?",
+        "What customers do we have?",
+    ),
+    "error_troubleshooting": (
+        "What columns does the CSV need?",
+        "Show me the dashboard overview",
+    ),
+}
+
+FOLLOW_UP_INTENTS = {
+    "Show me the dashboard overview": "dashboard_analysis",
+    "How do I create a work request?": "work_request_management",
+    "What customers do we have?": "customer_management",
+    "Tell me about TechCorp Industries": "customer_management",
+    "Show me our Premium customers": "customer_management",
+    "Which customer has the most projects?": "customer_management",
+    "Show me high-priority pending requests": "work_request_management",
+    "What's the completion rate for this month?": "dashboard_analysis",
+    "Which customers have the most active projects?": "customer_management",
+    "Which projects are over budget?": "project_tracking",
+    "Show me active projects": "project_tracking",
+    "What columns does the CSV need?": "data_import_export",
+}
+
+# Pages of the app: (name, route, what is there, words that point to it)
+PAGES = (
+    ("Dashboard", "/", "metrics and the work request list", ("dashboard", "home", "metrics", "overview")),
+    ("Customers", "/customers", "customer list and profiles", ("customer", "client")),
+    ("Create Work Request", "/add-work-request", "new work requests", ("create", "new request", "add")),
+    ("CSV Upload", "/csv-upload", "import work orders and projects", ("csv", "upload", "import")),
+)
+
+
+def _compile(text: str) -> Callable[[Dict[str, Any]], str]:
+    """Check a template's fields once and return its renderer"""
+    for _, field, _, _ in Formatter().parse(text):
+        if field is not None and not field.isidentifier():
+            raise ValueError(f"Template field {field!r} must be a plain name")
+    return text.format_map
+
+
+GENERAL_TEMPLATE = _compile("""I understand you're asking: "{message}"
+
+I'm your SC Micro Assistant, and I'm here to help you with your enterprise management system. I can assist with:
+
+• Dashboard analysis and metrics
+• Creating and managing work requests
+• Customer relationship insights
+• Project optimization and timelines
+• CSV import/export operations
+
+What would you like to know about your system?""")
+
+ARITHMETIC_TEMPLATE = _compile("""The answer to {expression} is **{result}**.
+
+I'm your SC Micro Assistant, and I can help you with much more than just math! I can assist with:
+
+• Dashboard analysis and metrics
+• Creating and managing work requests
+• Customer relationship insights
+• Project optimization and timelines
+• CSV import/export operations
+
+What would you like to know about your enterprise system?""")
+
+CUSTOMER_PROFILE_TEMPLATE = _compile(
+    "🏢 **{name} Customer Profile**\n\n• **Tier**: {tier}\n• **Total Projects**: {total_projects}\n"
+    "• **Completion Rate**: {completion_rate:.1f}%\n• **Total Value**: ${total_value:,}\n• **Contact**: {contact}\n"
+    "• **Email**: {email}\n• **Phone**: {phone}\n• **Address**: {address}\n\n**Customer Status**: {name} is a "
+    "{tier} tier customer with {total_projects} total projects and ${total_value:,} in total value.")
+
+CUSTOMER_OVERVIEW_TEMPLATE = _compile(
+    "🏢 **Customer Management Overview**\n\nYou have {count} customers in the system:\n\n{listed}\n\n"
+    "**Customer Tiers:**\n• Premium: High-value customers with excellent track record\n"
+    "• Gold: Regular customers with good performance  \n• Silver: Developing relationships with potential\n"
+    "• Bronze: New or occasional customers\n\n**Top Customers by Value:**\n{top}")
+
+DASHBOARD_TEMPLATE = _compile("""📊 **Dashboard Overview**
+
+• Total Work Requests: {total_work_requests}
+• Pending Requests: {pending_requests}
+• Completion Rate: {completion_rate:.1f}%
+• Average Project Time: {average_project_time} days
+• Total Revenue: ${total_revenue:,.0f}
+
+🚨 **Attention Needed**: You have {pending_requests} pending work requests that require your attention.""")
+
+WORK_REQUESTS_TEMPLATE = _compile("""📋 **Work Requests**
+
+• Total: {total_work_requests} ({pending_requests} pending, {completed_requests} completed)
+• Open high-priority items: {high_priority_items}{scope}
+
+**Needs attention:**
+{attention}""")
+
+CREATE_REQUEST_TEMPLATE = _compile("""📝 **Creating a Work Request**
+
+1. Open **Create Work Request** (/add-work-request)
+2. Choose the customer, project type and priority
+3. Describe the work and set a target date
+4. Submit; the request starts as pending on the dashboard
+
+There are currently {pending_requests} pending work requests ({high_priority_items} open high-priority items).""")
+
+PROJECTS_TEMPLATE = _compile("""🗂️ **Project Tracking**
+
+• Projects: {count} ({statuses})
+• Budget of open projects: ${open_budget:,.0f}
+
+**Upcoming deadlines:**
+{deadlines}
+
+**Over budget:**
+{over_budget}""")
+
+DATA_IMPORT_TEMPLATE = _compile("""📁 **CSV Import**
+
+Upload work orders or projects on the **CSV Upload** page (/csv-upload). Columns used:
+
+• **Customer** (required): matched by name; unknown names become Bronze customers
+• **Project Information** / **Comments**: description and project type
+• **Completion Date**: target date
+• **Quote #**: a row with a known quote number updates that record instead of adding one
+• **PO#**, **Amount Invoiced ($)**, **PIC Name**
+
+Currently in the system: {totalWorkRequests} work requests, {totalProjects} projects and {totalCustomers} customers.""")
+
+REPORTING_TEMPLATE = _compile("""📈 **Reporting Summary**
+
+• Work requests: {total_work_requests} ({completion_rate:.1f}% completed, {pending_requests} pending)
+• Projects: {totalProjects} ({project_statuses})
+• Revenue: ${total_revenue:,.0f}
+• Active customers: {active_customers} of {totalCustomers}
+• Open high-priority items: {high_priority_items}
+
+**Top customers by value:**
+{top_customers}""")
+
+NAVIGATION_TEMPLATE = _compile("""🧭 **Navigation**
+
+{target}
+
+{pages}""")
+
+TROUBLESHOOT_TEMPLATE = _compile("""🛠️ **Troubleshooting: {topic}**
+
+{steps}
+
+If the problem persists, note the exact error message and the page you were on.""")
+
+PAGE_LINES = "\n".join(f"• **{name}** ({route}): {about}" for name, route, about, _ in PAGES)
+
+TROUBLESHOOTING = (
+    (("csv", "import", "upload"), "CSV import", (
+        "Check the file has a **Customer** column and every row names a customer",
+        "Save the file as UTF-8 CSV with a single header row",
+        "Dates should be YYYY-MM-DD; amounts may include $ and thousands separators",
+        "Rows with an existing **Quote #** update that record, so duplicates are expected to merge",
+    )),
+    (("save", "create", "submit", "form"), "Saving changes", (
+        "Fill in every required field (customer, project type, priority)",
+        "Make sure the target date is today or later",
+        "Reload the page and try again; the database API may have restarted",
+    )),
+    ((), "General", (
+        "Reload the page to pick up the latest data",
+        "Check that the dashboard shows its numbers; if it does not, the database API is down",
+        "Try the action again from the **Dashboard**",
+    )),
+)
+
+_ARITHMETIC = re.compile(r"(?<![\d.-])(-?\d+(?:\.\d+)?)\s*([-+*/x×])\s*(-?\d+(?:\.\d+)?)(?![\d.-])")
+_CREATE = re.compile(r"\b(?:create|new|add|submit|raise)\b")
+_OPERATORS = {
+    "+": lambda a, b: a + b,
+    "-": lambda a, b: a - b,
+    "*": lambda a, b: a * b,
+    "x": lambda a, b: a * b,
+    "×": lambda a, b: a * b,
+    "/": lambda a, b: a / b if b else None,
+}
+
+# Row views derived per context list, keyed by the list's identity like the customer index
+_views: "OrderedDict[Tuple[int, str], Tuple[Sequence[Dict[str, Any]], Any]]" = OrderedDict()
+_views_lock = threading.Lock()
+MAX_VIEWS = 64
+
+
+def _view(rows: Sequence[Dict[str, Any]], name: str, build: Callable[[Sequence[Dict[str, Any]]], Any]) -> Any:
+    """build(rows), computed once per rows object; the cache and mirror hand out the same list until data changes"""
+    key = (id(rows), name)
+    entry = _views.get(key)
+    if entry is not None and entry[0] is rows:
+        return entry[1]
+    value = build(rows)
+    with _views_lock:
+        _views[key] = (rows, value)
+        while len(_views) > MAX_VIEWS:
+            _views.popitem(last=False)
+    return value
+
+
+def _money(value: Any) -> Any:
+    return value or 0
+
+
+def _status_counts(rows: Sequence[Dict[str, Any]]) -> str:
+    counts = Counter(str(row.get("status") or "unknown").lower() for row in rows)
+    return ", ".join(f"{count} {status}" for status, count in counts.most_common()) or "none"
+
+
+def _customer_lines(customers: Sequence[Dict[str, Any]]) -> str:
+    return "\n".join(f"• **{c.get('name', 'Unknown')}** - {c.get('tier', 'Unknown')} Tier "
+                     f"(${_money(c.get('total_value')):,} total value)" for c in customers[:LIST_LIMIT])
+
+
+def _top_customer_lines(customers: Sequence[Dict[str, Any]], limit: int = 3) -> str:
+    top = sorted(customers, key=lambda c: _money(c.get("total_value")), reverse=True)[:limit]
+    return "\n".join(f"• {c.get('name', 'Unknown')}: ${_money(c.get('total_value')):,}" for c in top) or "• None yet"
+
+
+def _attention_lines(work_requests: Sequence[Dict[str, Any]]) -> str:
+    open_rows = [row for row in work_requests if str(row.get("status", "")).lower() in OPEN_STATUSES]
+    open_rows.sort(key=lambda row: (PRIORITY_RANK.get(str(row.get("priority", "")).lower(), 3),
+                                    str(row.get("target_date") or "9999")))
+    return "\n".join(
+        f"• #{row.get('id')} {row.get('customer_name') or 'Unknown'}: {row.get('project_type') or 'request'} "
+        f"({row.get('priority') or 'no'} priority, {row.get('status')}, due {row.get('target_date') or 'n/a'})"
+        for row in open_rows[:LIST_LIMIT]) or "• Nothing open"
+
+
+def _project_summary(projects: Sequence[Dict[str, Any]]) -> Dict[str, Any]:
+    open_rows = [row for row in projects if str(row.get("status", "")).lower() in OPEN_STATUSES]
+    upcoming = sorted((row for row in open_rows if row.get("target_date")), key=lambda row: str(row["target_date"]))
+    over = [row for row in projects
+            if row.get("actual_cost") is not None and row.get("budget") is not None
+            and float(row["actual_cost"]) > float(row["budget"])]
+    over.sort(key=lambda row: float(row["budget"]) - float(row["actual_cost"]))
+    return {
+        "count": len(projects),
+        "statuses": _status_counts(projects),
+        "open_budget": sum(float(_money(row.get("budget"))) for row in open_rows),
+        "deadlines": "\n".join(f"• {row.get('name', 'Project')} ({row.get('customer_name') or 'Unknown'}): "
+                               f"due {row['target_date']}, {row.get('status')}"
+                               for row in upcoming[:LIST_LIMIT]) or "• No open deadlines",
+        "over_budget": "\n".join(f"• {row.get('name', 'Project')}: ${float(row['actual_cost']):,.0f} spent of "
+                                 f"${float(row['budget']):,.0f}" for row in over[:LIST_LIMIT]) or "• None",
+    }
+
+
+def _metric_values(context: Dict[str, Any]) -> Dict[str, Any]:
+    metrics = context.get("metrics") or {}
+    return {
+        "total_work_requests": metrics.get("total_work_requests", metrics.get("totalWorkRequests", 0)),
+        "pending_requests": metrics.get("pending_requests", metrics.get("pendingWorkRequests", 0)),
+        "completed_requests": metrics.get("completed_requests", 0),
+        "completion_rate": (metrics.get("completion_rate") or 0) * 100,
+        "average_project_time": metrics.get("average_project_time", 0),
+        "total_revenue": metrics.get("total_revenue") or 0,
+        "active_customers": metrics.get("active_customers", 0),
+        "high_priority_items": metrics.get("high_priority_items", 0),
+        "totalCustomers": metrics.get("totalCustomers", 0),
+        "totalWorkRequests": metrics.get("totalWorkRequests", 0),
+        "totalProjects": metrics.get("totalProjects", 0),
+    }
+
+
+def _response(intent: str, message: str, actions: Optional[List[Dict[str, str]]] = None,
+              follow_ups: Optional[List[str]] = None) -> Dict[str, Any]:
+    return {
+        "response_message": message,
+        "suggested_actions": actions if actions is not None else list(ACTIONS[intent]),
+        "follow_up_questions": follow_ups if follow_ups is not None else list(FOLLOW_UPS[intent]),
+    }
+
+
+def _general(context: Dict[str, Any], message: str, current_page: str) -> Dict[str, Any]:
+    match = _ARITHMETIC.search(message)
+    if match:
+        left, operator, right = match.groups()
+        result = _OPERATORS[operator](float(left), float(right))
+        if result is not None:
+            expression = re.sub(r"\s+", "", match.group(0))
+            result = int(result) if float(result).is_integer() else round(result, 6)
+            return _response("general_query", ARITHMETIC_TEMPLATE({"expression": expression, "result": result}))
+    return _response("general_query", GENERAL_TEMPLATE({"message": message}))
+
+
+def _customers(context: Dict[str, Any], message: str, current_page: str) -> Dict[str, Any]:
+    customers = context.get("customers", [])
+    # Look for any customer name in the user message (one pass over the message)
+    customer = get_customer_index(customers).find_in_message(message.lower()) if customers else None
+    if customer is not None:
+        name = customer.get("name", "Unknown")
+        text = CUSTOMER_PROFILE_TEMPLATE({
+            "name": name,
+            "tier": customer.get("tier", "Unknown"),
+            "total_projects": customer.get("total_projects", 0),
+            "completion_rate": (customer.get("completion_rate") or 0) * 100,
+            "total_value": _money(customer.get("total_value")),
+            "contact": customer.get("contact", "N/A"),
+            "email": customer.get("email", "N/A"),
+            "phone": customer.get("phone", "N/A"),
+            "address": customer.get("address", "N/A"),
+        })
+        actions = [ACTIONS["customer_management"][0],
+                   _action("Create Work Request", f"Add new request for {name}", "/add-work-request"),
+                   ACTIONS["customer_management"][2]]
+        follow_ups = [f"What work requests does {name} have?", f"Show me {name}'s project history",
+                      f"How does {name} compare to other customers?"]
+        return _response("customer_management", text, actions, follow_ups)
+    text = CUSTOMER_OVERVIEW_TEMPLATE({
+        "count": len(customers),
+        "listed": _view(customers, "customer_lines", _customer_lines),
+        "top": _view(customers, "top_customers", _top_customer_lines),
+    })
+    return _response("customer_management", text)
+
+
+def _dashboard(context: Dict[str, Any], message: str, current_page: str) -> Dict[str, Any]:
+    return _response("dashboard_analysis", DASHBOARD_TEMPLATE(_metric_values(context)))
+
+
+def _work_requests(context: Dict[str, Any], message: str, current_page: str) -> Dict[str, Any]:
+    values = _metric_values(context)
+    text = message.lower()
+    if _CREATE.search(text) and "request" in text:
+        return _response("work_request_management", CREATE_REQUEST_TEMPLATE(values))
+    work_requests = context.get("work_requests", [])
+    filtered = bool(context.get("filters", {}).get("work_requests"))
+    values.update(scope=f"\n• Matching your question: {len(work_requests)}" if filtered else "",
+                  attention=_view(work_requests, "attention", _attention_lines))
+    return _response("work_request_management", WORK_REQUESTS_TEMPLATE(values))
+
+
+def _projects(context: Dict[str, Any], message: str, current_page: str) -> Dict[str, Any]:
+    projects = context.get("projects", [])
+    return _response("project_tracking", PROJECTS_TEMPLATE(_view(projects, "summary", _project_summary)))
+
+
+def _data_import(context: Dict[str, Any], message: str, current_page: str) -> Dict[str, Any]:
+    return _response("data_import_export", DATA_IMPORT_TEMPLATE(_metric_values(context)))
+
+
+def _reporting(context: Dict[str, Any], message: str, current_page: str) -> Dict[str, Any]:
+    values = _metric_values(context)
+    values["project_statuses"] = _view(context.get("projects", []), "statuses", _status_counts)
+    values["top_customers"] = _view(context.get("customers", []), "top_customers", _top_customer_lines)
+    return _response("reporting", REPORTING_TEMPLATE(values))
+
+
+def _navigation(context: Dict[str, Any], message: str, current_page: str) -> Dict[str, Any]:
+    text = message.lower()
+    target = next((page for page in PAGES if any(word in text for word in page[3])), None)
+    if target is not None:
+        lead = f"**{target[0]}** is at {target[1]}: {target[2]}."
+    else:
+        here = next((page for page in PAGES if page[1] == current_page), None)
+        lead = f"You are on **{here[0]}**. The main pages are:" if here else "The main pages are:"
+    actions = list(ACTIONS["navigation"])
+    if target is not None:
+        actions.sort(key=lambda action: action["route"] != target[1])
+    return _response("navigation", NAVIGATION_TEMPLATE({"target": lead, "pages": PAGE_LINES}), actions)
+
+
+def _troubleshooting(context: Dict[str, Any], message: str, current_page: str) -> Dict[str, Any]:
+    text = message.lower()
+    _, topic, steps = next(entry for entry in TROUBLESHOOTING if not entry[0] or any(w in text for w in entry[0]))
+    lines = "\n".join(f"{number}. {step}" for number, step in enumerate(steps, 1))
+    return _response("error_troubleshooting", TROUBLESHOOT_TEMPLATE({"topic": topic, "steps": lines}))
+
+
+RENDERERS: Dict[str, Callable[[Dict[str, Any], str, str], Dict[str, Any]]] = {
+    "general_query": _general,
+    "customer_management": _customers,
+    "dashboard_analysis": _dashboard,
+    "work_request_management": _work_requests,
+    "project_tracking": _projects,
+    "data_import_export": _data_import,
+    "reporting": _reporting,
+    "navigation": _navigation,
+    "error_troubleshooting": _troubleshooting,
+}
+
+_missing = set(INTENTS) - set(RENDERERS)
+if _missing:
+    raise RuntimeError(f"No response template for intents: {', '.join(sorted(_missing))}")
+
+
+def render_template_response(intent: str, context: Dict[str, Any], message: str,
+                             current_page: str = "/") -> Dict[str, Any]:
+    """Response for an intent rendered from gathered context (unknown intents get the general answer)"""
+    return RENDERERS.get(intent, _general)(context, message, current_page)
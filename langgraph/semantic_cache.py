@@ -0,0 +1,290 @@
+#!/usr/bin/env python3
+"""
+SC Micro Semantic Cache
+Answers reused across paraphrased questions, matched with offline hashed n-gram embeddings.
+"""
+
+import os
+import re
+import copy
+import math
+import time
+import zlib
+import logging
+import threading
+from collections import OrderedDict, deque
+from typing import Any, Dict, FrozenSet, Hashable, NamedTuple, Optional, Tuple
+
+from agent_cache import normalize_message
+from agent_env import env_float, env_int
+
+logger = logging.getLogger(__name__)
+
+# Words that carry no meaning for matching ("show me the dashboard" ~ "dashboard")
+STOPWORDS = frozenset("""
+a an the me my our us we you your i it its this that these those is are was were be been am do does did
+please can could would will should shall may might show tell give get let see list display what whats
+which who how have has of for to in on at by with about from and or any all some there here just now currently today
+""".split())
+
+# Phrasings folded onto one canonical word before embedding
+SYNONYMS = (
+    (r"how are we doing|how is (?:it|everything) going|at a glance|big picture|summary|snapshot", "overview"),
+    (r"kpis?|stats|statistics|numbers", "metrics"),
+    (r"clients?|accounts?", "customers"),
+    (r"tickets?|jobs?", "requests"),
+    (r"urgent|critical", "high"),
+    (r"add|open a|raise|submit", "create"),
+    (r"open|outstanding|waiting", "pending"),
+    (r"done|finished|closed", "completed"),
+    (r"change|edit|modify", "update"),
+)
+
+# Words that change the answer: a cached question only matches if it has the same ones
+DISCRIMINATORS = frozenset("""
+create update delete cancel complete assign
+high medium low pending completed active cancelled planning inprogress
+premium gold silver bronze
+yesterday week month quarter year
+not no without
+""".split())
+
+# Cosine similarity a cached question needs to answer a new one, per intent.
+# Answers that depend on few message details (the dashboard) match loosely;
+# ones that turn on exact wording (arithmetic, a named customer) strictly.
+DEFAULT_THRESHOLDS = {
+    "dashboard_analysis": 0.55,
+    "general_query": 0.9,
+    "customer_management": 0.8,
+}
+DEFAULT_THRESHOLD = 0.7
+
+# Best matches this far below the threshold are counted (and sampled) as near misses
+NEAR_MISS_MARGIN = 0.15
+
+_NUMBER = re.compile(r"\d+(?:\.\d+)?")
+_HYPHEN = re.compile(r"(?<=[a-z])-(?=[a-z])")
+_SYNONYMS = [(re.compile(rf"\b(?:{pattern})\b"), word) for pattern, word in SYNONYMS]
+
+
+def _stem(word: str) -> str:
+    if len(word) > 4 and word.endswith("ies"):
+        return word[:-3] + "y"
+    if len(word) > 3 and word.endswith("s") and not word.endswith("ss"):
+        return word[:-1]
+    return word
+
+
+class Embedding(NamedTuple):
+    vector: Dict[int, float]
+    # Numbers and DISCRIMINATORS in the message; both sides of a match must agree on them
+    markers: FrozenSet[str]
+
+
+class HashedNgramVectorizer:
+    """Sparse, L2-normalized embedding from hashed words, word pairs and character trigrams.
+
+    Needs no model or vocabulary: features are hashed into `buckets`
+    dimensions with CRC32, so embedding costs one pass over the message.
+    SYNONYMS fold common phrasings together, character trigrams tolerate
+    inflections and typos, and word pairs keep some word order.
+    """
+
+    def __init__(self, buckets: int = 1 << 20, word_weight: float = 1.0, pair_weight: float = 0.5,
+                 trigram_weight: float = 0.15):
+        self.buckets = buckets
+        self.word_weight = word_weight
+        self.pair_weight = pair_weight
+        self.trigram_weight = trigram_weight
+
+    def _add(self, vector: Dict[int, float], feature: str, weight: float):
+        bucket = zlib.crc32(feature.encode("utf-8")) % self.buckets
+        vector[bucket] = vector.get(bucket, 0.0) + weight
+
+    def embed(self, message: str) -> Embedding:
+        text = normalize_message(message)
+        # "high-priority" reads as "high priority", but in-progress stays one status
+        text = _HYPHEN.sub(" ", text.replace("in-progress", "inprogress"))
+        for pattern, word in _SYNONYMS:
+            text = pattern.sub(word, text)
+        words = [_stem(word) for word in text.split() if word not in STOPWORDS]
+        vector: Dict[int, float] = {}
+        for word in words:
+            self._add(vector, f"w:{word}", self.word_weight)
+            padded = f" {word} "
+            for start in range(len(padded) - 2):
+                self._add(vector, f"c:{padded[start:start + 3]}", self.trigram_weight)
+        for first, second in zip(words, words[1:]):
+            self._add(vector, f"p:{first} {second}", self.pair_weight)
+        norm = math.sqrt(sum(weight * weight for weight in vector.values()))
+        if norm:
+            vector = {bucket: weight / norm for bucket, weight in vector.items()}
+        markers = frozenset(_NUMBER.findall(text)) | {word for word in words if word in DISCRIMINATORS}
+        return Embedding(vector, markers)
+
+
+def cosine(first: Dict[int, float], second: Dict[int, float]) -> float:
+    """Cosine similarity of two normalized sparse vectors"""
+    if len(first) > len(second):
+        first, second = second, first
+    return sum(weight * second.get(bucket, 0.0) for bucket, weight in first.items())
+
+
+class _Entry:
+    __slots__ = ("scope", "message", "embedding", "response", "expires_at")
+
+    def __init__(self, scope: Hashable, message: str, embedding: Embedding, response: Any, expires_at: float):
+        self.scope = scope
+        self.message = message
+        self.embedding = embedding
+        self.response = response
+        self.expires_at = expires_at
+
+
+class SemanticCache:
+    """LRU+TTL store of answers, looked up by similarity of the question.
+
+    Entries live in scopes; a scope is (intent, user_role, data version),
+    where the data version is a fingerprint of the context the answer was
+    generated from, so a question is only ever matched against answers for
+    the same intent, role and data. Within a scope the most similar cached
+    question wins if it clears the intent's threshold and agrees on numbers
+    and DISCRIMINATORS. Scopes hold few entries, so the index is a plain scan.
+
+    Configuration comes from the environment:
+        AGENT_SEMANTIC_CACHE                  0 turns the cache off
+        AGENT_SEMANTIC_CACHE_MAXSIZE          cached answers (default 1024)
+        AGENT_SEMANTIC_CACHE_TTL              seconds an answer is reused (default 900)
+        AGENT_SEMANTIC_THRESHOLD              default similarity threshold (0.7)
+        AGENT_SEMANTIC_THRESHOLD_<INTENT>     threshold for one intent
+    """
+
+    def __init__(self, maxsize: int = 1024, ttl: float = 900.0, thresholds: Optional[Dict[str, float]] = None,
+                 default_threshold: Optional[float] = None, vectorizer: Optional[HashedNgramVectorizer] = None,
+                 samples: int = 50):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.default_threshold = default_threshold if default_threshold is not None else env_float(
+            "AGENT_SEMANTIC_THRESHOLD", DEFAULT_THRESHOLD)
+        self.thresholds = {**DEFAULT_THRESHOLDS, **(thresholds or {})}
+        self.vectorizer = vectorizer or HashedNgramVectorizer()
+        self._entries: "OrderedDict[Tuple[Hashable, str], _Entry]" = OrderedDict()
+        self._scopes: Dict[Hashable, Dict[str, _Entry]] = {}
+        self._lock = threading.Lock()
+        self._counts: Dict[str, Dict[str, int]] = {}
+        # Recent near misses as (intent, message, closest cached message, similarity)
+        self.near_miss_samples: "deque[Tuple[str, str, str, float]]" = deque(maxlen=samples)
+        self.evictions = 0
+
+    def threshold(self, intent: str) -> float:
+        return env_float(f"AGENT_SEMANTIC_THRESHOLD_{intent.upper()}",
+                         self.thresholds.get(intent, self.default_threshold))
+
+    def _count(self, intent: str, outcome: str):
+        counts = self._counts.setdefault(intent, {"hits": 0, "near_misses": 0, "misses": 0, "stores": 0})
+        counts[outcome] += 1
+
+    def _drop(self, key: Tuple[Hashable, str]):
+        entry = self._entries.pop(key)
+        scope = self._scopes[entry.scope]
+        del scope[entry.message]
+        if not scope:
+            del self._scopes[entry.scope]
+
+    def get(self, intent: str, user_role: str, data_version: str, message: str) -> Optional[Dict[str, Any]]:
+        """A copy of the answer to the closest cached question, or None"""
+        if self.maxsize <= 0 or self.ttl <= 0:
+            return None
+        scope = (intent, user_role, data_version)
+        embedding = self.vectorizer.embed(message)
+        now = time.monotonic()
+        best: Optional[_Entry] = None
+        similarity = 0.0
+        with self._lock:
+            for entry in list(self._scopes.get(scope, {}).values()):
+                if entry.expires_at < now:
+                    self._drop((scope, entry.message))
+                    continue
+                if entry.embedding.markers != embedding.markers:
+                    continue
+                score = cosine(embedding.vector, entry.embedding.vector)
+                if score > similarity:
+                    best, similarity = entry, score
+            threshold = self.threshold(intent)
+            if best is not None and similarity >= threshold:
+                self._count(intent, "hits")
+                self._entries.move_to_end((scope, best.message))
+                return copy.deepcopy(best.response)
+            if best is not None and similarity >= threshold - NEAR_MISS_MARGIN:
+                self._count(intent, "near_misses")
+                self.near_miss_samples.append((intent, message, best.message, round(similarity, 4)))
+            else:
+                self._count(intent, "misses")
+        return None
+
+    def put(self, intent: str, user_role: str, data_version: str, message: str, response: Dict[str, Any]):
+        if self.maxsize <= 0 or self.ttl <= 0:
+            return
+        scope = (intent, user_role, data_version)
+        embedding = self.vectorizer.embed(message)
+        if not embedding.vector:
+            return
+        normalized = normalize_message(message)
+        entry = _Entry(scope, normalized, embedding, copy.deepcopy(response), time.monotonic() + self.ttl)
+        with self._lock:
+            key = (scope, normalized)
+            if key in self._entries:
+                self._drop(key)
+            self._entries[key] = entry
+            self._scopes.setdefault(scope, {})[normalized] = entry
+            self._count(intent, "stores")
+            while len(self._entries) > self.maxsize:
+                self._drop(next(iter(self._entries)))
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._scopes.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Hits, near misses and misses per intent, plus recent near misses for tuning thresholds"""
+        with self._lock:
+            intents = {}
+            for intent, counts in self._counts.items():
+                lookups = counts["hits"] + counts["near_misses"] + counts["misses"]
+                intents[intent] = {**counts, "threshold": self.threshold(intent),
+                                   "hit_rate": round(counts["hits"] / lookups, 4) if lookups else 0.0}
+            return {
+                "size": len(self._entries),
+                "scopes": len(self._scopes),
+                "maxsize": self.maxsize,
+                "ttl": self.ttl,
+                "evictions": self.evictions,
+                "intents": intents,
+                "near_miss_samples": [
+                    {"intent": intent, "message": message, "cached_message": cached, "similarity": similarity}
+                    for intent, message, cached, similarity in self.near_miss_samples
+                ],
+            }
+
+
+_semantic_cache: Optional[SemanticCache] = None
+_semantic_cache_lock = threading.Lock()
+
+
+def semantic_cache_enabled() -> bool:
+    return os.getenv("AGENT_SEMANTIC_CACHE", "1").lower() not in ("0", "false", "no", "off")
+
+
+def get_semantic_cache() -> SemanticCache:
+    """Return the process-wide semantic cache"""
+    global _semantic_cache
+    if _semantic_cache is None:
+        with _semantic_cache_lock:
+            if _semantic_cache is None:
+                _semantic_cache = SemanticCache(
+                    maxsize=env_int("AGENT_SEMANTIC_CACHE_MAXSIZE", 1024),
+                    ttl=env_float("AGENT_SEMANTIC_CACHE_TTL", 900.0),
+                )
+    return _semantic_cache
@@ -0,0 +1,248 @@
+#!/usr/bin/env python3
+"""
+SC Micro SQLite Backend
+Direct read-only access to the database file for agents running on the same host as the database API.
+"""
+
+import os
+import sqlite3
+import logging
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+from data_filters import DEFAULT_PAGE_SIZE, decode_cursor, encode_cursor
+
+logger = logging.getLogger(__name__)
+
+# Where database/db.js keeps the file when DATABASE_PATH is not set
+DEFAULT_DATABASE_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                                     "database", "sc_micro.db")
+
+DEFAULT_MMAP_BYTES = 256 * 1024 * 1024
+
+# SQL behind each list endpoint; mirrors LIST_QUERIES in database/db.js so both
+# paths return the same rows in the same order
+SQL_QUERIES: Dict[str, Dict[str, Any]] = {
+    "work_requests": {
+        "select": "SELECT wr.*, c.name AS customer_name FROM work_requests wr "
+                  "LEFT JOIN customers c ON wr.customer_id = c.id",
+        "filters": {"status": "wr.status", "priority": "wr.priority", "customer_id": "wr.customer_id"},
+        "customer_column": "c.name",
+        "date_column": "wr.created_date",
+        "updated_column": "wr.updated_at",
+        "sorts": {"created_date": "wr.created_date", "target_date": "wr.target_date", "priority": "wr.priority",
+                  "budget": "wr.budget", "status": "wr.status", "customer_name": "c.name", "id": "wr.id"},
+        "id_column": "wr.id",
+        "default_order": "wr.created_date DESC",
+    },
+    "customers": {
+        "select": "SELECT * FROM customers",
+        "filters": {"tier": "tier"},
+        "customer_column": "name",
+        "date_column": None,
+        "updated_column": "updated_at",
+        "sorts": {"name": "name", "tier": "tier", "total_value": "total_value", "total_projects": "total_projects",
+                  "completion_rate": "completion_rate", "id": "id"},
+        "id_column": "id",
+        "default_order": "name",
+    },
+    "projects": {
+        "select": "SELECT p.*, c.name AS customer_name FROM projects p "
+                  "LEFT JOIN customers c ON p.customer_id = c.id",
+        "filters": {"status": "p.status", "priority": "p.priority", "customer_id": "p.customer_id", "type": "p.type"},
+        "customer_column": "c.name",
+        "date_column": "p.start_date",
+        "updated_column": "p.updated_at",
+        "sorts": {"start_date": "p.start_date", "target_date": "p.target_date", "priority": "p.priority",
+                  "budget": "p.budget", "status": "p.status", "name": "p.name", "customer_name": "c.name",
+                  "id": "p.id"},
+        "id_column": "p.id",
+        "default_order": "p.start_date DESC",
+    },
+}
+
+PRIORITY_ORDER = "CASE {column} WHEN 'high' THEN 0 WHEN 'medium' THEN 1 WHEN 'low' THEN 2 ELSE 3 END"
+
+
+def build_sql(table: str, params: Dict[str, str]) -> Tuple[str, List[Any], Optional[int], int]:
+    """SQL and arguments for a build_query() result.
+
+    Returns (sql, args, limit, offset); limit is None for an unpaged query.
+    Paged queries fetch one extra row to tell whether another page follows.
+    """
+    spec = SQL_QUERIES[table]
+    where: List[str] = []
+    args: List[Any] = []
+    for name, column in spec["filters"].items():
+        if name not in params:
+            continue
+        values = params[name].split(",")
+        collate = " COLLATE NOCASE" if name == "tier" else ""
+        where.append(f"{column}{collate} IN ({', '.join('?' * len(values))})")
+        args.extend(int(value) if name == "customer_id" else value for value in values)
+    if "customer" in params:
+        where.append(f"{spec['customer_column']} = ? COLLATE NOCASE")
+        args.append(params["customer"])
+    if "date_from" in params:
+        where.append(f"{spec['date_column']} >= ?")
+        args.append(params["date_from"])
+    if "date_to" in params:
+        where.append(f"{spec['date_column']} < date(?, '+1 day')")
+        args.append(params["date_to"])
+    if "updated_since" in params:
+        where.append(f"{spec['updated_column']} >= ?")
+        args.append(params["updated_since"])
+
+    sql = spec["select"]
+    if where:
+        sql += " WHERE " + " AND ".join(where)
+    if "sort" in params:
+        key = params["sort"].lstrip("-")
+        direction = "DESC" if params["sort"].startswith("-") else "ASC"
+        column = spec["sorts"][key]
+        expression = PRIORITY_ORDER.format(column=column) if key == "priority" else column
+        sql += f" ORDER BY {expression} {direction}, {spec['id_column']} {direction}"
+    else:
+        sql += f" ORDER BY {spec['default_order']}"
+
+    if "limit" not in params and "cursor" not in params:
+        return sql, args, None, 0
+    limit = int(params.get("limit", DEFAULT_PAGE_SIZE))
+    offset = decode_cursor(params["cursor"]) if "cursor" in params else 0
+    sql += " LIMIT ? OFFSET ?"
+    args.extend((limit + 1, offset))
+    return sql, args, limit, offset
+
+
+def _dict_rows(cursor: sqlite3.Cursor) -> List[Dict[str, Any]]:
+    # Later columns win, so the joined customer_name replaces the stored copy as in the API
+    names = [column[0] for column in cursor.description]
+    return [dict(zip(names, row)) for row in cursor.fetchall()]
+
+
+class SQLiteBackend:
+    """Read-only reader of the SC Micro SQLite file.
+
+    Each thread gets its own connection, opened with mode=ro and
+    query_only, memory-mapped I/O and a statement cache so the list and
+    tombstone queries are prepared once per connection. With the API's
+    database in WAL mode these readers never block its writes.
+
+    Configuration comes from the environment:
+        AGENT_SQLITE_MMAP_BYTES   mmap_size per connection (default 256 MiB, 0 disables)
+        AGENT_SQLITE_BUSY_TIMEOUT seconds to wait on a locked database (default 1)
+    """
+
+    def __init__(self, path: str, mmap_bytes: Optional[int] = None, busy_timeout: Optional[float] = None):
+        self.path = os.path.abspath(path)
+        self.mmap_bytes = mmap_bytes if mmap_bytes is not None else int(
+            os.getenv("AGENT_SQLITE_MMAP_BYTES", DEFAULT_MMAP_BYTES))
+        self.busy_timeout = busy_timeout if busy_timeout is not None else float(
+            os.getenv("AGENT_SQLITE_BUSY_TIMEOUT", 1.0))
+        self._local = threading.local()
+        self._connections: List[sqlite3.Connection] = []
+        self._lock = threading.Lock()
+        self.has_tombstones = False
+
+    def _connect(self) -> sqlite3.Connection:
+        connection = sqlite3.connect(f"file:{self.path}?mode=ro", uri=True, timeout=self.busy_timeout,
+                                     check_same_thread=False, cached_statements=256)
+        connection.execute("PRAGMA query_only = ON")
+        connection.execute(f"PRAGMA mmap_size = {int(self.mmap_bytes)}")
+        connection.execute("PRAGMA temp_store = MEMORY")
+        with self._lock:
+            self._connections.append(connection)
+        return connection
+
+    def connection(self) -> sqlite3.Connection:
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = self._local.connection = self._connect()
+        return connection
+
+    def check(self):
+        """Raise sqlite3.Error unless the file opens and has the API's tables"""
+        tables = {row[0] for row in self.connection().execute(
+            "SELECT name FROM sqlite_master WHERE type = 'table'")}
+        missing = {"customers", "work_requests", "projects"} - tables
+        if missing:
+            raise sqlite3.OperationalError(f"missing tables: {', '.join(sorted(missing))}")
+        self.has_tombstones = "deleted_rows" in tables
+
+    def page(self, table: str, params: Dict[str, str]) -> Dict[str, Any]:
+        """One page of a list endpoint as {"items", "next_cursor"}; params come from build_query()"""
+        sql, args, limit, offset = build_sql(table, params)
+        rows = _dict_rows(self.connection().execute(sql, args))
+        next_cursor = None
+        if limit is not None and len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = encode_cursor(offset + limit)
+        return {"items": rows, "next_cursor": next_cursor}
+
+    def deleted_rows(self, after_id: int) -> Optional[List[Dict[str, Any]]]:
+        """Tombstones past after_id, or None when the file predates the deleted_rows table"""
+        if not self.has_tombstones:
+            return None
+        return _dict_rows(self.connection().execute(
+            "SELECT id, table_name, row_id, deleted_at FROM deleted_rows WHERE id > ? ORDER BY id", (after_id,)))
+
+    def close(self):
+        with self._lock:
+            connections, self._connections = self._connections, []
+        for connection in connections:
+            connection.close()
+        self._local = threading.local()
+
+    def stats(self) -> Dict[str, Any]:
+        return {"path": self.path, "mmap_bytes": self.mmap_bytes, "connections": len(self._connections)}
+
+
+_backend: Optional[SQLiteBackend] = None
+_resolved = False
+_backend_lock = threading.Lock()
+
+
+def _database_path() -> str:
+    return os.getenv("AGENT_SQLITE_PATH") or os.getenv("DATABASE_PATH") or DEFAULT_DATABASE_PATH
+
+
+def get_sqlite_backend() -> Optional[SQLiteBackend]:
+    """Return the process-wide SQLite reader, or None when reads should use HTTP.
+
+    AGENT_DATA_BACKEND picks the path: "http", "sqlite", or "auto" (the
+    default), which uses the file at AGENT_SQLITE_PATH (else DATABASE_PATH,
+    else database/sc_micro.db) when it exists and opens. Resolved once;
+    reset_sqlite_backend() re-reads the environment.
+    """
+    global _backend, _resolved
+    if _resolved:
+        return _backend
+    with _backend_lock:
+        if _resolved:
+            return _backend
+        mode = os.getenv("AGENT_DATA_BACKEND", "auto").lower()
+        path = _database_path()
+        if mode != "http":
+            if os.path.isfile(path):
+                backend = SQLiteBackend(path)
+                try:
+                    backend.check()
+                    _backend = backend
+                    logger.info(f"Reading agent data directly from {backend.path}")
+                except sqlite3.Error as e:
+                    backend.close()
+                    logger.warning(f"Cannot read {path} ({e}); using the database API")
+            elif mode == "sqlite":
+                logger.warning(f"Database file {path} not found; using the database API")
+        _resolved = True
+        return _backend
+
+
+def reset_sqlite_backend():
+    """Close and drop the shared reader; the next call re-reads the environment"""
+    global _backend, _resolved
+    with _backend_lock:
+        if _backend is not None:
+            _backend.close()
+        _backend = None
+        _resolved = False